@@ -1,35 +1,114 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, g, render_template, request, jsonify, session, stream_with_context
 import os
 import json
-import threading
+import logging
 import time
 import sys
 import ssl
 from datetime import datetime
-import requests
-import tempfile
-import re
 from typing import Dict, List, Optional
 
+from utils.analysis_json import AnalysisFormatError, AnalysisUnavailableError
+from utils.lazy import LazyService
+from utils.logging_setup import configure_logging
+from utils.metrics import collect_upstream_stats, end_trace, metrics, start_trace, stats_samples
+from utils.session_store import ServerSideSessionInterface, create_session_store
+from utils.rate_limiter import RateLimitExceeded, get_scheduler_stats
+from utils.transcription_jobs import JobQueueFull
+
 try:
-    import assemblyai as aai
-    ASSEMBLYAI_AVAILABLE = True
+    from flask_sock import Sock
 except ImportError:
-    ASSEMBLYAI_AVAILABLE = False
+    Sock = None
 
-from utils.api_keys import get_api_keys
-from utils.content_generator import ContentGenerator
-from utils.voice_manager import VoiceManager
-from utils.ai_analyzer import AIAnalyzer
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = 'ai_learning_platform_secret_2024'
+app.session_interface = ServerSideSessionInterface(create_session_store())
+sock = Sock(app) if Sock else None
+
+STREAM_PARTIAL_INTERVAL = 0.25
+
+def _build_api_keys():
+    from utils.api_keys import get_api_keys
+    logger.info("🔄 Initializing AI Learning Platform...")
+    return get_api_keys()
+
+def _build_content_generator():
+    from utils.content_generator import ContentGenerator
+    from utils.content_library import create_content_library
+    return ContentGenerator(api_keys.get(), content_library=create_content_library())
+
+def _build_voice_manager():
+    from utils.voice_manager import VoiceManager
+    return VoiceManager(api_keys.get())
+
+def _build_ai_analyzer():
+    from utils.ai_analyzer import AIAnalyzer
+    return AIAnalyzer(api_keys.get())
+
+def _build_transcription_jobs():
+    from utils.transcription_jobs import TranscriptionJobManager
+    return TranscriptionJobManager(
+        voice_manager.get(),
+        max_workers=int(os.getenv('TRANSCRIPTION_WORKERS', '4')),
+        max_jobs=int(os.getenv('TRANSCRIPTION_MAX_JOBS', '500'))
+    )
+
+api_keys = LazyService('api_keys', _build_api_keys)
+content_generator = LazyService('content_generator', _build_content_generator)
+voice_manager = LazyService('voice_manager', _build_voice_manager)
+ai_analyzer = LazyService('ai_analyzer', _build_ai_analyzer)
+transcription_jobs = LazyService('transcription_jobs', _build_transcription_jobs)
 
-print("🔄 Initializing AI Learning Platform...")
-api_keys = get_api_keys()
-content_generator = ContentGenerator(api_keys)
-voice_manager = VoiceManager(api_keys)
-ai_analyzer = AIAnalyzer(api_keys)
+SERVICES = {
+    'content_generator': content_generator,
+    'voice_manager': voice_manager,
+    'ai_analyzer': ai_analyzer,
+    'transcription_jobs': transcription_jobs
+}
+
+def _service_metrics():
+    """
+    Cache, pre-grader and job stats for services that have been initialized
+    """
+    samples = []
+    if content_generator.initialized:
+        samples += stats_samples('cache', content_generator.get_cache_stats(), {'cache': 'content'})
+    if ai_analyzer.initialized:
+        samples += stats_samples('cache', ai_analyzer.get_cache_stats(), {'cache': 'analysis'})
+        samples += stats_samples('pre_grader', ai_analyzer.get_pre_grader_stats())
+    if transcription_jobs.initialized:
+        samples += stats_samples('transcription_jobs', transcription_jobs.get_stats())
+    return samples
+
+metrics.register_collector(collect_upstream_stats)
+metrics.register_collector(_service_metrics)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.trace = None
+    if request.headers.get('X-Trace') == '1' or request.args.get('trace') == '1':
+        g.trace = start_trace()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - started, {
+            'route': route,
+            'method': request.method,
+            'status': str(response.status_code)
+        })
+    if g.get('trace') is not None:
+        trace = end_trace()
+        response.headers['Server-Timing'] = trace.server_timing()
+        logger.info(f"🔎 Trace {request.method} {request.path}: {json.dumps(trace.to_dict())}")
+    return response
 
 @app.route('/')
 def index():
@@ -64,13 +143,70 @@ def generate_content():
             'content': content_data['content'],
             'references': content_data['references'],
             'key_points': content_data['key_points'],
+            'key_concepts': content_data.get('key_concepts', []),
             'session_id': session['session_id']
         })
         
+    except RateLimitExceeded as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
-        print(f"❌ Content generation error: {e}")
+        logger.error(f"❌ Content generation error: {e}")
         return jsonify({'error': f'Content generation failed: {str(e)}'}), 500
 
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/generate_content/stream', methods=['POST'])
+def generate_content_stream():
+    data = request.json or {}
+    academic_level = data.get('academic_level')
+    subject = data.get('subject')
+    topic = data.get('topic')
+    
+    if not all([academic_level, subject, topic]):
+        return jsonify({'error': 'Missing required fields'}), 400
+    
+    session['academic_level'] = academic_level
+    session['subject'] = subject
+    session['topic'] = topic
+    session['session_id'] = datetime.now().strftime("%Y%m%d_%H%M%S")
+    session.pop('generated_content', None)
+    session_id = session['session_id']
+    
+    def event_stream():
+        yield _sse('meta', {'session_id': session_id})
+        try:
+            for event in content_generator.stream_comprehensive_content(
+                academic_level=academic_level,
+                subject=subject,
+                topic=topic
+            ):
+                if event['event'] != 'done':
+                    yield _sse(event['event'], event['data'])
+                    continue
+                
+                content_data = event['data']
+                session['generated_content'] = content_data
+                app.session_interface.persist(session)
+                
+                yield _sse('done', {
+                    'success': True,
+                    'references': content_data['references'],
+                    'key_points': content_data['key_points'],
+                    'key_concepts': content_data.get('key_concepts', []),
+                    'word_count': content_data['word_count'],
+                    'session_id': session_id
+                })
+        except Exception as e:
+            logger.error(f"❌ Streaming content generation error: {e}")
+            yield _sse('error', {'error': f'Content generation failed: {str(e)}'})
+    
+    return Response(
+        stream_with_context(event_stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/transcribe_audio', methods=['POST'])
 def transcribe_audio():
     try:
@@ -78,18 +214,16 @@ def transcribe_audio():
         if not audio_file:
             return jsonify({'error': 'No audio file provided'}), 400
         
-        temp_path = f"temp/audio_{session.get('session_id', 'unknown')}.wav"
-        os.makedirs('temp', exist_ok=True)
-        audio_file.save(temp_path)
+        validation = voice_manager.validate_audio_stream(audio_file.stream, request.content_length)
+        if not validation['valid']:
+            return jsonify({'error': validation['error']}), 400
         
-        print(f"🔄 Starting transcription of {temp_path}")
+        logger.info(f"🔄 Starting transcription of {validation['file_size']} byte upload")
         
-        transcription = voice_manager.transcribe_audio(temp_path)
+        with validation['audio'] as audio:
+            transcription = voice_manager.transcribe_stream(audio)
         
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        
-        print(f"✅ Transcription result: {transcription[:100]}...")
+        logger.debug(f"✅ Transcription result: {transcription[:100]}...")
         
         return jsonify({
             'success': True,
@@ -97,9 +231,81 @@ def transcribe_audio():
         })
     
     except Exception as e:
-        print(f"❌ Transcription error: {e}")
+        logger.error(f"❌ Transcription error: {e}")
         return jsonify({'error': f'Transcription failed: {str(e)}'}), 500
 
+def stream_transcription(ws):
+    """
+    Live transcription over a WebSocket: the client sends a JSON
+    {"type": "start", "sample_rate": N} message, binary 16-bit mono PCM
+    while the student talks, then {"type": "stop"}. Partial transcripts are
+    pushed as segments finish and a final message closes the exchange.
+    """
+    from utils.streaming_transcription import StreamingTranscription, get_segment_executor
+    
+    transcription = None
+    sent_segments = 0
+    try:
+        while True:
+            message = ws.receive(timeout=STREAM_PARTIAL_INTERVAL)
+            if isinstance(message, (bytes, bytearray)):
+                if transcription is None:
+                    transcription = StreamingTranscription(voice_manager.transcribe_stream, get_segment_executor())
+                transcription.feed(bytes(message))
+            elif message is not None:
+                control = json.loads(message)
+                if control.get('type') == 'start' and transcription is None:
+                    transcription = StreamingTranscription(voice_manager.transcribe_stream, get_segment_executor(),
+                                                           sample_rate=int(control.get('sample_rate', 16000)))
+                elif control.get('type') == 'stop':
+                    break
+            
+            if transcription is not None:
+                partial = transcription.partial()
+                if partial['segments'] > sent_segments:
+                    sent_segments = partial['segments']
+                    ws.send(json.dumps({'type': 'partial', **partial}))
+        
+        if transcription is None:
+            ws.send(json.dumps({'type': 'final', 'text': '', 'segments': 0, 'failed_segments': 0}))
+        else:
+            ws.send(json.dumps({'type': 'final', **transcription.finish()}))
+    except ValueError as e:
+        ws.send(json.dumps({'type': 'error', 'error': str(e)}))
+
+if sock is not None:
+    sock.route('/transcribe_audio/stream')(stream_transcription)
+
+@app.route('/transcribe_audio/jobs', methods=['POST'])
+def submit_transcription_job():
+    try:
+        audio_file = request.files.get('audio')
+        if not audio_file:
+            return jsonify({'error': 'No audio file provided'}), 400
+        
+        validation = voice_manager.validate_audio_stream(audio_file.stream, request.content_length)
+        if not validation['valid']:
+            return jsonify({'error': validation['error']}), 400
+        
+        try:
+            job_id = transcription_jobs.submit_stream(validation['audio'])
+        except JobQueueFull as e:
+            return jsonify({'error': str(e)}), 503
+        
+        return jsonify({'success': True, 'job_id': job_id, 'status': 'queued'}), 202
+    
+    except Exception as e:
+        logger.error(f"❌ Transcription job error: {e}")
+        return jsonify({'error': f'Transcription failed: {str(e)}'}), 500
+
+@app.route('/transcribe_audio/jobs/<job_id>')
+def get_transcription_job(job_id):
+    wait = min(max(request.args.get('wait', 0, type=float), 0), 30)
+    job = transcription_jobs.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({'error': 'Unknown transcription job'}), 404
+    return jsonify({'success': job['status'] != 'error', **job})
+
 @app.route('/analyze_response', methods=['POST'])
 def analyze_response():
     try:
@@ -128,10 +334,120 @@ def analyze_response():
             'analysis': analysis
         })
         
+    except RateLimitExceeded as e:
+        return jsonify({'error': str(e)}), 503
+    except AnalysisFormatError as e:
+        return jsonify({'error': str(e)}), 502
+    except AnalysisUnavailableError as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
-        print(f"❌ Analysis error: {e}")
+        logger.error(f"❌ Analysis error: {e}")
         return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
 
+@app.route('/analyze_response/stream', methods=['POST'])
+def analyze_response_stream():
+    data = request.json or {}
+    user_response = data.get('response', '').strip()
+    
+    if not user_response:
+        return jsonify({'error': 'No response provided'}), 400
+    
+    original_content = session.get('generated_content')
+    if not original_content:
+        return jsonify({'error': 'No content session found'}), 400
+    
+    academic_level = session.get('academic_level')
+    subject = session.get('subject')
+    topic = session.get('topic')
+    
+    def event_stream():
+        try:
+            for event in ai_analyzer.stream_user_response(
+                user_response=user_response,
+                original_content=original_content,
+                academic_level=academic_level,
+                subject=subject,
+                topic=topic
+            ):
+                if event['event'] != 'done':
+                    yield _sse(event['event'], event['data'])
+                    continue
+                
+                session['last_analysis'] = event['data']
+                session['last_response'] = user_response
+                app.session_interface.persist(session)
+                
+                yield _sse('done', {'success': True, 'analysis': event['data']})
+        except (RateLimitExceeded, AnalysisFormatError, AnalysisUnavailableError) as e:
+            yield _sse('error', {'error': str(e)})
+        except Exception as e:
+            logger.error(f"❌ Streaming analysis error: {e}")
+            yield _sse('error', {'error': f'Analysis failed: {str(e)}'})
+    
+    return Response(
+        stream_with_context(event_stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/analyze_batch', methods=['POST'])
+def analyze_batch():
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    items = data.get('responses') or []
+    max_batch = int(os.getenv('ANALYZE_BATCH_MAX', '200'))
+    
+    if not items:
+        return jsonify({'error': 'No responses provided'}), 400
+    if not isinstance(items, list):
+        return jsonify({'error': 'responses must be a list'}), 400
+    if len(items) > max_batch:
+        return jsonify({'error': f'Too many responses (max {max_batch})'}), 400
+    
+    ids = [item.get('id', index) if isinstance(item, dict) else index for index, item in enumerate(items)]
+    responses = [item.get('response', '') if isinstance(item, dict) else item for item in items]
+    invalid = [ids[index] for index, response in enumerate(responses) if not isinstance(response, str)]
+    if invalid:
+        return jsonify({'error': f'Each response must be a string (invalid ids: {invalid[:10]})'}), 400
+    responses = [response.strip() for response in responses]
+    
+    original_content = data.get('content') or session.get('generated_content')
+    if not original_content:
+        return jsonify({'error': 'No content reference provided'}), 400
+    if not isinstance(original_content, dict):
+        return jsonify({'error': 'content must be a JSON object'}), 400
+    
+    academic_level = data.get('academic_level') or original_content.get('academic_level') or session.get('academic_level')
+    subject = data.get('subject') or original_content.get('subject') or session.get('subject')
+    topic = data.get('topic') or original_content.get('topic') or session.get('topic')
+    
+    def result_stream():
+        start = time.perf_counter()
+        errors = 0
+        for result in ai_analyzer.analyze_many(
+            responses,
+            original_content=original_content,
+            academic_level=academic_level,
+            subject=subject,
+            topic=topic,
+            max_workers=int(os.getenv('ANALYZE_BATCH_WORKERS', '8')),
+            max_per_minute=int(os.getenv('ANALYZE_BATCH_RPM', '0')) or None
+        ):
+            errors += 1 if result['error'] else 0
+            result['id'] = ids[result['index']]
+            yield json.dumps(result) + '\n'
+        
+        elapsed = time.perf_counter() - start
+        yield json.dumps({'summary': {
+            'count': len(responses),
+            'errors': errors,
+            'total_seconds': round(elapsed, 3),
+            'throughput_per_minute': round(len(responses) / elapsed * 60, 2) if elapsed else None
+        }}) + '\n'
+    
+    return Response(stream_with_context(result_stream()), mimetype='application/x-ndjson')
+
 @app.route('/get_session_data')
 def get_session_data():
     return jsonify({
@@ -152,6 +468,19 @@ def reset_session():
 def voice_status():
     return jsonify(voice_manager.get_voice_status())
 
+@app.route('/llm_metrics')
+def get_llm_metrics():
+    from utils.llm_metrics import llm_metrics
+    return jsonify(llm_metrics.snapshot())
+
+@app.route('/scheduler_stats')
+def scheduler_stats():
+    return jsonify(get_scheduler_stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 def create_self_signed_cert():
     try:
         from cryptography import x509
@@ -217,6 +546,10 @@ def create_self_signed_cert():
         return False
 
 if __name__ == '__main__':
+    if '--startup-report' in sys.argv:
+        from utils.startup_report import main as startup_report_main
+        sys.exit(startup_report_main(sys.argv[sys.argv.index('--startup-report') + 1:]))
+    
     os.makedirs('temp', exist_ok=True)
     os.makedirs('static/audio', exist_ok=True)
     
@@ -0,0 +1,578 @@
+"""
+Asynchronous serving mode: the same routes as app.py on Starlette, with
+Groq and AssemblyAI calls awaited on the event loop so one process can hold
+thousands of in-flight requests.
+
+Run with: uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import secrets
+import time
+from datetime import datetime
+from typing import Dict
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Mount, Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+from starlette.staticfiles import StaticFiles
+from starlette.templating import Jinja2Templates
+
+from utils.analysis_json import AnalysisFormatError, AnalysisUnavailableError
+from utils.api_keys import get_api_keys
+from utils.async_services import AsyncAIAnalyzer, AsyncContentGenerator, AsyncVoiceManager
+from utils.content_library import create_content_library
+from utils.llm_metrics import llm_metrics
+from utils.logging_setup import configure_logging
+from utils.metrics import collect_upstream_stats, end_trace, metrics, start_trace, stats_samples
+from utils.rate_limiter import RateLimitExceeded, get_scheduler_stats
+from utils.session_store import MemorySessionStore, create_session_store
+from utils.streaming_transcription import AsyncStreamingTranscription
+from utils.transcription_jobs import AsyncTranscriptionJobManager, JobQueueFull
+
+SESSION_COOKIE = 'session'
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+logger.info("🔄 Initializing AI Learning Platform (async mode)...")
+api_keys = get_api_keys()
+content_generator = AsyncContentGenerator(api_keys, content_library=create_content_library())
+voice_manager = AsyncVoiceManager(api_keys)
+ai_analyzer = AsyncAIAnalyzer(api_keys)
+transcription_jobs = AsyncTranscriptionJobManager(
+    voice_manager,
+    max_jobs=int(os.getenv('TRANSCRIPTION_MAX_JOBS', '5000'))
+)
+session_store = create_session_store()
+templates = Jinja2Templates(directory='templates')
+segment_semaphore = asyncio.Semaphore(int(os.getenv('STREAM_SEGMENT_WORKERS', '8')))
+
+STREAM_PARTIAL_INTERVAL = 0.25
+
+
+def _service_metrics():
+    return (
+        stats_samples('cache', content_generator.get_cache_stats(), {'cache': 'content'})
+        + stats_samples('cache', ai_analyzer.get_cache_stats(), {'cache': 'analysis'})
+        + stats_samples('pre_grader', ai_analyzer.get_pre_grader_stats())
+        + stats_samples('transcription_jobs', transcription_jobs.get_stats())
+    )
+
+
+metrics.register_collector(collect_upstream_stats)
+metrics.register_collector(_service_metrics)
+
+
+async def _store_call(fn, *args):
+    if isinstance(session_store, MemorySessionStore):
+        return fn(*args)
+    return await run_in_threadpool(fn, *args)
+
+
+class AsyncSession(dict):
+    """
+    Dict-backed session persisted in the shared SessionStore, keyed by the
+    same opaque cookie id the Flask app uses
+    """
+
+    def __init__(self, session_id: str, data: Dict, new: bool):
+        super().__init__(data)
+        self.session_id = session_id
+        self.new = new
+        self._saved = dict(data)
+
+    @property
+    def modified(self) -> bool:
+        return dict(self) != self._saved
+
+    async def save(self) -> None:
+        if self:
+            await _store_call(session_store.save, self.session_id, dict(self))
+        else:
+            await _store_call(session_store.delete, self.session_id)
+        self._saved = dict(self)
+
+
+def with_session(handler):
+    @functools.wraps(handler)
+    async def endpoint(request):
+        session_id = request.cookies.get(SESSION_COOKIE)
+        data = await _store_call(session_store.load, session_id) if session_id else None
+        if data is None:
+            session = AsyncSession(secrets.token_urlsafe(32), {}, new=True)
+        else:
+            session = AsyncSession(session_id, data, new=False)
+
+        response = await handler(request, session)
+
+        if session.modified:
+            await session.save()
+            if session:
+                response.set_cookie(SESSION_COOKIE, session.session_id, httponly=True, samesite='lax')
+            elif not session.new:
+                response.delete_cookie(SESSION_COOKIE)
+        return response
+    return endpoint
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def index(request):
+    return templates.TemplateResponse('index.html', {'request': request})
+
+
+@with_session
+async def generate_content(request, session):
+    try:
+        data = await request.json()
+        academic_level = data.get('academic_level')
+        subject = data.get('subject')
+        topic = data.get('topic')
+
+        if not all([academic_level, subject, topic]):
+            return JSONResponse({'error': 'Missing required fields'}, status_code=400)
+
+        session['academic_level'] = academic_level
+        session['subject'] = subject
+        session['topic'] = topic
+        session['session_id'] = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        content_data = await content_generator.generate_comprehensive_content(
+            academic_level=academic_level,
+            subject=subject,
+            topic=topic
+        )
+
+        session['generated_content'] = content_data
+
+        return JSONResponse({
+            'success': True,
+            'content': content_data['content'],
+            'references': content_data['references'],
+            'key_points': content_data['key_points'],
+            'key_concepts': content_data.get('key_concepts', []),
+            'session_id': session['session_id']
+        })
+
+    except RateLimitExceeded as e:
+        return JSONResponse({'error': str(e)}, status_code=503)
+    except Exception as e:
+        logger.error(f"❌ Content generation error: {e}")
+        return JSONResponse({'error': f'Content generation failed: {str(e)}'}, status_code=500)
+
+
+@with_session
+async def generate_content_stream(request, session):
+    data = await request.json()
+    academic_level = data.get('academic_level')
+    subject = data.get('subject')
+    topic = data.get('topic')
+
+    if not all([academic_level, subject, topic]):
+        return JSONResponse({'error': 'Missing required fields'}, status_code=400)
+
+    session['academic_level'] = academic_level
+    session['subject'] = subject
+    session['topic'] = topic
+    session['session_id'] = datetime.now().strftime("%Y%m%d_%H%M%S")
+    session.pop('generated_content', None)
+    session_id = session['session_id']
+
+    async def event_stream():
+        yield _sse('meta', {'session_id': session_id})
+        try:
+            async for event in content_generator.stream_comprehensive_content(
+                academic_level=academic_level,
+                subject=subject,
+                topic=topic
+            ):
+                if event['event'] != 'done':
+                    yield _sse(event['event'], event['data'])
+                    continue
+
+                content_data = event['data']
+                session['generated_content'] = content_data
+                await session.save()
+
+                yield _sse('done', {
+                    'success': True,
+                    'references': content_data['references'],
+                    'key_points': content_data['key_points'],
+                    'key_concepts': content_data.get('key_concepts', []),
+                    'word_count': content_data['word_count'],
+                    'session_id': session_id
+                })
+        except Exception as e:
+            logger.error(f"❌ Streaming content generation error: {e}")
+            yield _sse('error', {'error': f'Content generation failed: {str(e)}'})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+async def _read_audio_upload(request):
+    form = await request.form()
+    audio_file = form.get('audio')
+    if audio_file is None or isinstance(audio_file, str):
+        return None, JSONResponse({'error': 'No audio file provided'}, status_code=400)
+
+    # Size checks, format sniffing and WAV silence trimming read and scan up
+    # to MAX_AUDIO_SIZE bytes, so keep them off the event loop
+    validation = await run_in_threadpool(voice_manager.validate_audio_stream, audio_file.file)
+    await audio_file.close()
+    if not validation['valid']:
+        return None, JSONResponse({'error': validation['error']}, status_code=400)
+    return validation['audio'], None
+
+
+async def transcribe_audio(request):
+    try:
+        audio, error_response = await _read_audio_upload(request)
+        if error_response:
+            return error_response
+
+        with audio:
+            transcription = await voice_manager.transcribe_stream(audio)
+
+        return JSONResponse({
+            'success': True,
+            'transcription': transcription
+        })
+
+    except Exception as e:
+        logger.error(f"❌ Transcription error: {e}")
+        return JSONResponse({'error': f'Transcription failed: {str(e)}'}, status_code=500)
+
+
+async def transcribe_audio_stream(websocket):
+    """
+    WebSocket live transcription; same message protocol as app.py
+    """
+    await websocket.accept()
+    transcription = None
+    sent_segments = 0
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive(), STREAM_PARTIAL_INTERVAL)
+            except asyncio.TimeoutError:
+                message = None
+            
+            if message is not None:
+                if message['type'] == 'websocket.disconnect':
+                    raise WebSocketDisconnect(message.get('code', 1000))
+                if message.get('bytes') is not None:
+                    if transcription is None:
+                        transcription = AsyncStreamingTranscription(voice_manager.transcribe_stream, segment_semaphore)
+                    transcription.feed(message['bytes'])
+                elif message.get('text') is not None:
+                    control = json.loads(message['text'])
+                    if control.get('type') == 'start' and transcription is None:
+                        transcription = AsyncStreamingTranscription(
+                            voice_manager.transcribe_stream, segment_semaphore,
+                            sample_rate=int(control.get('sample_rate', 16000))
+                        )
+                    elif control.get('type') == 'stop':
+                        break
+            
+            if transcription is not None:
+                partial = transcription.partial()
+                if partial['segments'] > sent_segments:
+                    sent_segments = partial['segments']
+                    await websocket.send_json({'type': 'partial', **partial})
+        
+        if transcription is None:
+            await websocket.send_json({'type': 'final', 'text': '', 'segments': 0, 'failed_segments': 0})
+        else:
+            await websocket.send_json({'type': 'final', **(await transcription.finish())})
+        await websocket.close()
+    except ValueError as e:
+        await websocket.send_json({'type': 'error', 'error': str(e)})
+        await websocket.close()
+    except WebSocketDisconnect:
+        if transcription is not None:
+            transcription.cancel()
+
+
+async def submit_transcription_job(request):
+    try:
+        audio, error_response = await _read_audio_upload(request)
+        if error_response:
+            return error_response
+
+        try:
+            job_id = transcription_jobs.submit_stream(audio)
+        except JobQueueFull as e:
+            return JSONResponse({'error': str(e)}, status_code=503)
+
+        return JSONResponse({'success': True, 'job_id': job_id, 'status': 'queued'}, status_code=202)
+
+    except Exception as e:
+        logger.error(f"❌ Transcription job error: {e}")
+        return JSONResponse({'error': f'Transcription failed: {str(e)}'}, status_code=500)
+
+
+async def get_transcription_job(request):
+    try:
+        wait = min(max(float(request.query_params.get('wait', 0)), 0), 30)
+    except ValueError:
+        wait = 0
+    job = await transcription_jobs.get(request.path_params['job_id'], wait=wait)
+    if job is None:
+        return JSONResponse({'error': 'Unknown transcription job'}, status_code=404)
+    return JSONResponse({'success': job['status'] != 'error', **job})
+
+
+@with_session
+async def analyze_response(request, session):
+    try:
+        data = await request.json()
+        user_response = data.get('response', '').strip()
+
+        if not user_response:
+            return JSONResponse({'error': 'No response provided'}, status_code=400)
+
+        if not session.get('generated_content'):
+            return JSONResponse({'error': 'No content session found'}, status_code=400)
+
+        analysis = await ai_analyzer.analyze_user_response(
+            user_response=user_response,
+            original_content=session['generated_content'],
+            academic_level=session.get('academic_level'),
+            subject=session.get('subject'),
+            topic=session.get('topic')
+        )
+
+        session['last_analysis'] = analysis
+        session['last_response'] = user_response
+
+        return JSONResponse({
+            'success': True,
+            'analysis': analysis
+        })
+
+    except RateLimitExceeded as e:
+        return JSONResponse({'error': str(e)}, status_code=503)
+    except AnalysisFormatError as e:
+        return JSONResponse({'error': str(e)}, status_code=502)
+    except AnalysisUnavailableError as e:
+        return JSONResponse({'error': str(e)}, status_code=503)
+    except Exception as e:
+        logger.error(f"❌ Analysis error: {e}")
+        return JSONResponse({'error': f'Analysis failed: {str(e)}'}, status_code=500)
+
+
+@with_session
+async def analyze_response_stream(request, session):
+    data = await request.json()
+    user_response = data.get('response', '').strip()
+
+    if not user_response:
+        return JSONResponse({'error': 'No response provided'}, status_code=400)
+
+    original_content = session.get('generated_content')
+    if not original_content:
+        return JSONResponse({'error': 'No content session found'}, status_code=400)
+
+    async def event_stream():
+        try:
+            async for event in ai_analyzer.stream_user_response(
+                user_response=user_response,
+                original_content=original_content,
+                academic_level=session.get('academic_level'),
+                subject=session.get('subject'),
+                topic=session.get('topic')
+            ):
+                if event['event'] != 'done':
+                    yield _sse(event['event'], event['data'])
+                    continue
+
+                session['last_analysis'] = event['data']
+                session['last_response'] = user_response
+                await session.save()
+
+                yield _sse('done', {'success': True, 'analysis': event['data']})
+        except (RateLimitExceeded, AnalysisFormatError, AnalysisUnavailableError) as e:
+            yield _sse('error', {'error': str(e)})
+        except Exception as e:
+            logger.error(f"❌ Streaming analysis error: {e}")
+            yield _sse('error', {'error': f'Analysis failed: {str(e)}'})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@with_session
+async def analyze_batch(request, session):
+    try:
+        data = await request.json()
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        return JSONResponse({'error': 'Request body must be a JSON object'}, status_code=400)
+    items = data.get('responses') or []
+    max_batch = int(os.getenv('ANALYZE_BATCH_MAX', '200'))
+
+    if not items:
+        return JSONResponse({'error': 'No responses provided'}, status_code=400)
+    if not isinstance(items, list):
+        return JSONResponse({'error': 'responses must be a list'}, status_code=400)
+    if len(items) > max_batch:
+        return JSONResponse({'error': f'Too many responses (max {max_batch})'}, status_code=400)
+
+    ids = [item.get('id', index) if isinstance(item, dict) else index for index, item in enumerate(items)]
+    responses = [item.get('response', '') if isinstance(item, dict) else item for item in items]
+    invalid = [ids[index] for index, response in enumerate(responses) if not isinstance(response, str)]
+    if invalid:
+        return JSONResponse({'error': f'Each response must be a string (invalid ids: {invalid[:10]})'}, status_code=400)
+    responses = [response.strip() for response in responses]
+
+    original_content = data.get('content') or session.get('generated_content')
+    if not original_content:
+        return JSONResponse({'error': 'No content reference provided'}, status_code=400)
+    if not isinstance(original_content, dict):
+        return JSONResponse({'error': 'content must be a JSON object'}, status_code=400)
+
+    academic_level = data.get('academic_level') or original_content.get('academic_level') or session.get('academic_level')
+    subject = data.get('subject') or original_content.get('subject') or session.get('subject')
+    topic = data.get('topic') or original_content.get('topic') or session.get('topic')
+
+    async def result_stream():
+        start = time.perf_counter()
+        errors = 0
+        async for result in ai_analyzer.analyze_many(
+            responses,
+            original_content=original_content,
+            academic_level=academic_level,
+            subject=subject,
+            topic=topic,
+            max_workers=int(os.getenv('ANALYZE_BATCH_WORKERS', '8')),
+            max_per_minute=int(os.getenv('ANALYZE_BATCH_RPM', '0')) or None
+        ):
+            errors += 1 if result['error'] else 0
+            result['id'] = ids[result['index']]
+            yield json.dumps(result) + '\n'
+
+        elapsed = time.perf_counter() - start
+        yield json.dumps({'summary': {
+            'count': len(responses),
+            'errors': errors,
+            'total_seconds': round(elapsed, 3),
+            'throughput_per_minute': round(len(responses) / elapsed * 60, 2) if elapsed else None
+        }}) + '\n'
+
+    return StreamingResponse(result_stream(), media_type='application/x-ndjson')
+
+
+@with_session
+async def get_session_data(request, session):
+    return JSONResponse({
+        'academic_level': session.get('academic_level'),
+        'subject': session.get('subject'),
+        'topic': session.get('topic'),
+        'session_id': session.get('session_id'),
+        'has_content': bool(session.get('generated_content')),
+        'last_analysis': session.get('last_analysis')
+    })
+
+
+@with_session
+async def reset_session(request, session):
+    session.clear()
+    return JSONResponse({'success': True})
+
+
+async def voice_status(request):
+    return JSONResponse(voice_manager.get_voice_status())
+
+
+async def get_llm_metrics(request):
+    return JSONResponse(llm_metrics.snapshot())
+
+
+async def scheduler_stats(request):
+    return JSONResponse(get_scheduler_stats())
+
+
+async def prometheus_metrics(request):
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+class RequestMetricsMiddleware:
+    """
+    Record per-route latency and, for requests sent with X-Trace: 1 or
+    ?trace=1, return their spans in a Server-Timing header
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        headers = dict(scope.get('headers') or [])
+        traced = headers.get(b'x-trace') == b'1' or b'trace=1' in scope.get('query_string', b'').split(b'&')
+        trace = start_trace() if traced else None
+
+        async def send_with_metrics(message):
+            if message['type'] == 'http.response.start':
+                endpoint = scope.get('endpoint')
+                metrics.observe('http_request_duration_seconds', time.perf_counter() - started, {
+                    'route': _ROUTE_PATHS.get(endpoint, 'unmatched'),
+                    'method': scope['method'],
+                    'status': str(message['status'])
+                })
+                if trace is not None:
+                    message.setdefault('headers', [])
+                    message['headers'] = list(message['headers']) + [
+                        (b'server-timing', trace.server_timing().encode())
+                    ]
+                    logger.info(f"🔎 Trace {scope['method']} {scope['path']}: {json.dumps(trace.to_dict())}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            if trace is not None:
+                end_trace()
+
+
+app = Starlette(routes=[
+    Route('/', index),
+    Route('/generate_content', generate_content, methods=['POST']),
+    Route('/generate_content/stream', generate_content_stream, methods=['POST']),
+    Route('/transcribe_audio', transcribe_audio, methods=['POST']),
+    WebSocketRoute('/transcribe_audio/stream', transcribe_audio_stream),
+    Route('/transcribe_audio/jobs', submit_transcription_job, methods=['POST']),
+    Route('/transcribe_audio/jobs/{job_id}', get_transcription_job),
+    Route('/analyze_response', analyze_response, methods=['POST']),
+    Route('/analyze_response/stream', analyze_response_stream, methods=['POST']),
+    Route('/analyze_batch', analyze_batch, methods=['POST']),
+    Route('/get_session_data', get_session_data),
+    Route('/reset_session', reset_session, methods=['POST']),
+    Route('/voice_status', voice_status),
+    Route('/llm_metrics', get_llm_metrics),
+    Route('/scheduler_stats', scheduler_stats),
+    Route('/metrics', prometheus_metrics),
+    Mount('/static', StaticFiles(directory='static'), name='static')
+], middleware=[Middleware(RequestMetricsMiddleware)])
+
+_ROUTE_PATHS = {route.endpoint: route.path for route in app.routes if isinstance(route, Route)}
@@ -0,0 +1,116 @@
+"""
+Parse time and malformed-output rate of the markdown analysis format versus
+JSON mode, over recorded outputs of each: the markdown corpus in
+benchmarks/fixtures/analysis_outputs.json and the JSON corpus in
+benchmarks/fixtures/analysis_outputs_json.json. A markdown output counts as
+malformed when a section or the grade is missing and the parser silently
+fills in a default; a JSON output when it fails the schema and needs the
+repair call. Both corpora deliberately include each format's known failure
+modes, so the rates describe the fixture mix rather than production traffic;
+the analysis_json_total metric gives the live JSON rate. For JSON mode it
+also reports how far into the output the streaming parser has the strengths
+and the grade.
+
+Usage: python benchmarks/analysis_format.py [--iterations 2000] [--delta 8]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.ai_analyzer import ANALYSIS_SECTIONS, GRADE_PATTERN, AIAnalyzer
+from utils.analysis_json import AnalysisFormatError, StreamingAnalysisParser, parse_analysis_json
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+
+def markdown_malformed(text: str) -> bool:
+    sections = ANALYSIS_SECTIONS.split(text)
+    return any(not lines for lines in sections.values()) or not any(GRADE_PATTERN.search(line)
+                                                                     for line in sections['grade'])
+
+
+def json_malformed(text: str) -> bool:
+    try:
+        parse_analysis_json(text)
+    except AnalysisFormatError:
+        return True
+    return False
+
+
+def parse_json_or_none(text: str):
+    try:
+        return parse_analysis_json(text)
+    except AnalysisFormatError:
+        return None
+
+
+def per_parse_us(parse, texts: list, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            parse(text)
+    return round((time.perf_counter() - start) / (iterations * len(texts)) * 1e6, 2)
+
+
+def first_fields_at(text: str, delta: int) -> dict:
+    """
+    Share of the output streamed when the strengths and the grade were emitted
+    """
+    parser = StreamingAnalysisParser()
+    seen = {}
+    for offset in range(0, len(text), delta):
+        for name, _ in parser.feed(text[offset:offset + delta]):
+            seen.setdefault(name, min(offset + delta, len(text)) / len(text))
+    return seen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--delta', type=int, default=8, help='characters per streamed delta')
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES, 'analysis_outputs.json'), encoding='utf-8') as f:
+        markdown_fixtures = json.load(f)
+    markdown = [fixture['text'] for fixture in markdown_fixtures]
+    with open(os.path.join(FIXTURES, 'analysis_outputs_json.json'), encoding='utf-8') as f:
+        json_fixtures = json.load(f)
+    json_texts = [fixture['text'] for fixture in json_fixtures]
+
+    mismatches = [fixture['name'] for fixture in json_fixtures if json_malformed(fixture['text']) == fixture['valid']]
+    analyzer = AIAnalyzer({})
+    valid = [text for text in json_texts if not json_malformed(text)]
+    streamed = [first_fields_at(text, args.delta) for text in valid]
+
+    report = {
+        'markdown': {
+            'outputs': len(markdown),
+            'malformed_rate': round(sum(map(markdown_malformed, markdown)) / len(markdown), 3),
+            'silently_defaulted': [fixture['name'] for fixture in markdown_fixtures if markdown_malformed(fixture['text'])],
+            'us_per_parse': per_parse_us(analyzer._parse_analysis, markdown, args.iterations)
+        },
+        'json': {
+            'outputs': len(json_texts),
+            'malformed_rate': round(sum(map(json_malformed, json_texts)) / len(json_texts), 3),
+            'needs_repair': [fixture['name'] for fixture in json_fixtures if json_malformed(fixture['text'])],
+            'us_per_parse': per_parse_us(parse_json_or_none, json_texts, args.iterations),
+            'us_per_streamed_parse': per_parse_us(
+                lambda text: first_fields_at(text, args.delta), valid, max(1, args.iterations // 10)
+            ),
+            'strengths_at_share_of_output': round(statistics.mean(seen['strengths'] for seen in streamed), 3),
+            'grade_at_share_of_output': round(statistics.mean(seen['grade'] for seen in streamed), 3)
+        },
+        'fixture_validity_mismatches': mismatches
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Mean latency, cost and pass/fail agreement of grading every answer with the
+full analysis model versus a fast first pass that escalates borderline
+grades. A local fake Groq server answers per model: the full model returns
+each answer's reference grade, the fast one is off by a point --fast-noise
+of the time.
+
+Usage: python benchmarks/analysis_tiers.py [--answers 200] [--fast-latency 0.3]
+           [--full-latency 1.2] [--fast-noise 0.3]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeGroqServer
+
+PASS_GRADE = 9
+GRADE_WEIGHTS = {3: 1, 4: 2, 5: 3, 6: 4, 7: 5, 8: 5, 9: 4, 10: 2}
+
+
+def grader(reference: dict, fast_model: str, noise: float, seed: int):
+    rng = random.Random(seed)
+
+    def completion(payload: dict) -> str:
+        answer = int(re.search(r'answer-(\d+)', payload['messages'][0]['content']).group(1))
+        grade = reference[answer]
+        if payload.get('model') == fast_model and rng.random() < noise:
+            grade = max(1, min(10, grade + rng.choice((-1, 1))))
+        if payload.get('response_format'):
+            return json.dumps({
+                'strengths': ['Covers the main idea'], 'grade': grade, 'grade_explanation': '', 'false_points': [],
+                'missing_points': [], 'examples_quality': '', 'areas_lacking': [], 'improvements': [],
+                'detailed_feedback': '', 'next_steps': ''
+            })
+        return f"## STRENGTHS\n- Covers the main idea\n\n## GRADE\nGrade: {grade}/10\n"
+    return completion
+
+
+def run(analyzer, answers: int, reference: dict) -> dict:
+    latencies = []
+    agree = 0
+    for answer in range(answers):
+        start = time.perf_counter()
+        analysis = analyzer._get_groq_analysis(f"Grade answer-{answer}")
+        latencies.append(time.perf_counter() - start)
+        agree += analysis['can_proceed'] == (reference[answer] >= PASS_GRADE)
+    return {
+        'mean_seconds': round(statistics.mean(latencies), 3),
+        'p95_seconds': round(sorted(latencies)[int(len(latencies) * 0.95) - 1], 3),
+        'pass_decision_agreement': round(agree / answers, 3)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--answers', type=int, default=200)
+    parser.add_argument('--fast-latency', type=float, default=0.3)
+    parser.add_argument('--full-latency', type=float, default=1.2)
+    parser.add_argument('--fast-noise', type=float, default=0.3, help='share of fast grades off by one')
+    parser.add_argument('--fast-price', type=float, default=0.06, help='$ per 1M tokens, fast model')
+    parser.add_argument('--full-price', type=float, default=0.65, help='$ per 1M tokens, full model')
+    parser.add_argument('--tokens-per-call', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    reference = {answer: rng.choices(list(GRADE_WEIGHTS), list(GRADE_WEIGHTS.values()))[0]
+                 for answer in range(args.answers)}
+
+    fast_model, full_model = 'llama3-8b-8192', 'llama3-70b-8192'
+    server = FakeGroqServer(model_latency={fast_model: args.fast_latency, full_model: args.full_latency},
+                            completion_text=grader(reference, fast_model, args.fast_noise, args.seed)).start()
+    os.environ.update({
+        'GROQ_API_URL': server.chat_url, 'GROQ_RPM': '0', 'GROQ_TPM': '0', 'LLM_HEDGE': '0',
+        'ANALYSIS_FAST_MODEL': fast_model, 'ANALYSIS_MODEL': full_model, 'PRE_GRADER_ENABLED': '0'
+    })
+    from utils.ai_analyzer import AIAnalyzer
+
+    report = {}
+    try:
+        for mode, escalation in (('full_model_only', '0'), ('fast_with_escalation', '1')):
+            os.environ['ANALYSIS_ESCALATION'] = escalation
+            before = server.get_stats()['by_model']
+            result = run(AIAnalyzer({'GROQ_API_KEY': 'fake-key'}), args.answers, reference)
+            after = server.get_stats()['by_model']
+            calls = {model: after.get(model, 0) - before.get(model, 0) for model in (fast_model, full_model)}
+            cost = (calls[fast_model] * args.fast_price + calls[full_model] * args.full_price) \
+                * args.tokens_per_call / 1e6
+            result.update({'calls': calls, 'cost_per_1000_analyses': round(cost / args.answers * 1000, 2)})
+            report[mode] = result
+    finally:
+        server.stop()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Compare bytes uploaded to AssemblyAI and transcription turnaround for the
+same spoken answer recorded in different ways: the browser's default
+48 kHz stereo capture, the same capture with silence trimmed, the 16 kHz
+mono speech profile, and (when ffmpeg is on PATH) 16 kHz mono Opus at the
+client's 24 kbps. A silent clip shows the upload that is now skipped.
+
+The fake AssemblyAI server throttles uploads to --bandwidth bytes/s and
+charges --per-mb seconds of processing per MB, so turnaround tracks size.
+
+Usage: python benchmarks/audio_upload.py [--speech 20] [--lead 1.5] [--tail 3] [--bandwidth 250000]
+"""
+import argparse
+import io
+import json
+import math
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeAssemblyAIServer
+
+
+def speech_like_wav(speech: float, lead: float, tail: float, rate: int, channels: int) -> bytes:
+    """
+    Silence, then syllable-like bursts of a modulated tone, then silence
+    """
+    frames = bytearray()
+    total = int((lead + speech + tail) * rate)
+    start, end = int(lead * rate), int((lead + speech) * rate)
+    for i in range(total):
+        value = 0
+        if start <= i < end:
+            t = i / rate
+            envelope = max(0.0, math.sin(2 * math.pi * 3 * t))
+            value = int(9000 * envelope * math.sin(2 * math.pi * (180 + 40 * math.sin(t)) * t))
+        frames += struct.pack('<h', value) * channels
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+def opus_from_wav(data: bytes):
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        return None
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'speech.wav')
+        target = os.path.join(directory, 'speech.webm')
+        with open(source, 'wb') as f:
+            f.write(data)
+        subprocess.run([ffmpeg, '-loglevel', 'error', '-i', source, '-ac', '1', '-ar', '16000',
+                        '-c:a', 'libopus', '-b:a', '24k', '-application', 'voip', target], check=True)
+        with open(target, 'rb') as f:
+            return f.read()
+
+
+def run_variant(voice_manager, fake: FakeAssemblyAIServer, data: bytes, trim: bool) -> dict:
+    voice_manager.trim_silence = trim
+    uploaded_before = fake.uploaded_bytes
+
+    start = time.perf_counter()
+    validation = voice_manager.validate_audio_stream(io.BytesIO(data))
+    prepared = time.perf_counter()
+    if not validation['valid']:
+        return {
+            'recorded_bytes': len(data),
+            'uploaded_bytes': 0,
+            'prepare_ms': round((prepared - start) * 1000, 2),
+            'turnaround_seconds': round(prepared - start, 3),
+            'result': validation['error']
+        }
+
+    with validation['audio'] as audio:
+        text = voice_manager.transcribe_stream(audio)
+    return {
+        'recorded_bytes': len(data),
+        'uploaded_bytes': fake.uploaded_bytes - uploaded_before,
+        'format': validation.get('format'),
+        'prepare_ms': round((prepared - start) * 1000, 2),
+        'turnaround_seconds': round(time.perf_counter() - start, 3),
+        'result': 'ok' if not text.startswith('❌') else text
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--speech', type=float, default=20.0, help='seconds of speech')
+    parser.add_argument('--lead', type=float, default=1.5, help='seconds of silence before speaking')
+    parser.add_argument('--tail', type=float, default=3.0, help='seconds of silence before stopping')
+    parser.add_argument('--bandwidth', type=float, default=250000, help='upload bytes per second (~2 Mbit/s)')
+    parser.add_argument('--per-mb', type=float, default=1.0, help='fake processing seconds per MB')
+    args = parser.parse_args()
+
+    browser = speech_like_wav(args.speech, args.lead, args.tail, 48000, 2)
+    speech_16k = speech_like_wav(args.speech, args.lead, args.tail, 16000, 1)
+    variants = [
+        ('browser_48k_stereo_wav', browser, False),
+        ('browser_48k_stereo_wav_trimmed', browser, True),
+        ('speech_16k_mono_wav_trimmed', speech_16k, True)
+    ]
+    opus = opus_from_wav(speech_16k)
+    if opus is not None:
+        variants.append(('speech_16k_mono_opus_24k', opus, True))
+    variants.append(('silent_clip', speech_like_wav(0, 3, 0, 16000, 1), True))
+
+    report = {'speech_seconds': args.speech, 'silence_seconds': args.lead + args.tail,
+              'upload_bandwidth': args.bandwidth, 'variants': {}}
+    if opus is None:
+        report['note'] = 'ffmpeg not found - Opus variant skipped'
+
+    with FakeAssemblyAIServer(processing_time=0.2, processing_per_mb=args.per_mb,
+                              upload_bandwidth=args.bandwidth) as fake:
+        os.environ['ASSEMBLYAI_BASE_URL'] = fake.url
+        from utils.voice_manager import VoiceManager
+        voice_manager = VoiceManager({'ASSEMBLYAI_API_KEY': 'fake'})
+        for name, data, trim in variants:
+            report['variants'][name] = run_variant(voice_manager, fake, data, trim)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+Local stand-ins for the upstream APIs, used by the benchmark scripts.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MARKDOWN_COMPLETION = "## STRENGTHS\n- Clear explanation\n\n## GRADE\nGrade: 8/10\n"
+JSON_COMPLETION = json.dumps({
+    'strengths': ['Clear explanation'], 'grade': 8, 'grade_explanation': 'Accurate but missing an example.',
+    'false_points': [], 'missing_points': [], 'examples_quality': '', 'areas_lacking': [], 'improvements': [],
+    'detailed_feedback': '', 'next_steps': ''
+})
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; with Nagle on, a reused
+    # keep-alive connection stalls ~40 ms on each response waiting for the
+    # client's delayed ACK, which would make connection pooling look slower
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';', 1)[0].strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b''.join(chunks)
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _read_json(self) -> dict:
+        body = self._read_body()
+        return json.loads(body) if body else {}
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeServer:
+    """
+    Runs a handler class on a background ThreadingHTTPServer bound to localhost
+    """
+
+    def __init__(self, handler_class, port: int = 0):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeServer':
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'FakeServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class FakeGroqHandler(_QuietHandler):
+    def do_POST(self):
+        fake = self.server.fake
+        payload = self._read_json()
+        with fake.lock:
+            fake.requests += 1
+            fake.model_requests[payload.get('model')] = fake.model_requests.get(payload.get('model'), 0) + 1
+            limited = fake.rate_limit_rate and fake.random.random() < fake.rate_limit_rate
+            failed = not limited and fake.error_rate and fake.random.random() < fake.error_rate
+            slow = fake.tail_rate and fake.random.random() < fake.tail_rate
+            if limited:
+                fake.rate_limited += 1
+            if failed:
+                fake.errors += 1
+        if failed:
+            self._send_json(500, {'error': {'message': 'Internal server error', 'type': 'server_error'}})
+            return
+        if limited:
+            self._send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_exceeded'}},
+                            headers={'Retry-After': f'{fake.retry_after:g}'})
+            return
+
+        if slow:
+            time.sleep(fake.tail_latency)
+        else:
+            latency = fake.model_latency.get(payload.get('model'), fake.latency)
+            if latency:
+                time.sleep(max(0.0, latency + fake.random.uniform(-fake.jitter, fake.jitter)))
+        if callable(fake.completion_text):
+            text = fake.completion_text(payload)
+        else:
+            text = fake.completion_text or (JSON_COMPLETION if payload.get('response_format') else MARKDOWN_COMPLETION)
+        usage = {'prompt_tokens': 0, 'completion_tokens': len(text.split()), 'total_tokens': len(text.split())}
+        if payload.get('stream'):
+            self._stream(payload, text, usage)
+            return
+
+        self._send_json(200, {
+            'id': 'chatcmpl-fake',
+            'model': payload.get('model'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+            'usage': usage
+        })
+
+    def _stream(self, payload: dict, text: str, usage: dict) -> None:
+        """
+        Send the completion as server-sent events, one word per chunk, with
+        the usage block on the final chunk as Groq does
+        """
+        fake = self.server.fake
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def write(data: str) -> None:
+            event = f"data: {data}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+
+        words = text.split(' ')
+        for index, word in enumerate(words):
+            if fake.token_delay:
+                time.sleep(fake.token_delay)
+            chunk = {
+                'id': 'chatcmpl-fake',
+                'model': payload.get('model'),
+                'choices': [{'index': 0, 'delta': {'content': word if index == 0 else ' ' + word}}]
+            }
+            write(json.dumps(chunk))
+        write(json.dumps({
+            'id': 'chatcmpl-fake',
+            'model': payload.get('model'),
+            'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+            'x_groq': {'usage': usage}
+        }))
+        write('[DONE]')
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class FakeGroqServer(FakeServer):
+    """
+    Fake OpenAI-compatible /openai/v1/chat/completions endpoint. Completions
+    take `latency` seconds (+/- `jitter`); streamed ones additionally pause
+    `token_delay` between words. A `rate_limit_rate` share of requests is
+    answered with 429 and a Retry-After of `retry_after` seconds, an
+    `error_rate` share with 500, and a `tail_rate` share takes `tail_latency`
+    seconds instead of `latency`. `model_latency` overrides `latency` per
+    model id, and `completion_text` may be a callable taking the payload.
+    Without one, requests with a response_format get a JSON analysis.
+    """
+
+    def __init__(self, latency: float = 0.0, completion_text: str = None, port: int = 0, jitter: float = 0.0,
+                 token_delay: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 1.0, seed: int = None,
+                 error_rate: float = 0.0, tail_rate: float = 0.0, tail_latency: float = 0.0,
+                 model_latency: dict = None):
+        super().__init__(FakeGroqHandler, port)
+        self.latency = latency
+        self.completion_text = completion_text
+        self.jitter = jitter
+        self.token_delay = token_delay
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.model_latency = model_latency or {}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.model_requests = {}
+
+    @property
+    def chat_url(self) -> str:
+        return f"{self.url}/openai/v1/chat/completions"
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {'requests': self.requests, 'rate_limited': self.rate_limited, 'errors': self.errors,
+                    'by_model': dict(self.model_requests)}
+
+
+class FakeAssemblyAIHandler(_QuietHandler):
+    def do_POST(self):
+        fake = self.server.fake
+        if self.path == '/v2/upload':
+            body = self._read_body()
+            if fake.upload_bandwidth:
+                time.sleep(len(body) / fake.upload_bandwidth)
+            with fake.lock:
+                fake.uploaded_bytes += len(body)
+                upload_id = len(fake.uploads)
+                fake.uploads.append(len(body))
+            self._send_json(200, {'upload_url': f"{fake.url}/uploads/{upload_id}"})
+        elif self.path == '/v2/transcript':
+            request_body = self._read_json()
+            audio_url = request_body.get('audio_url') or ''
+            with fake.lock:
+                upload_id = audio_url.rsplit('/', 1)[-1]
+                audio_bytes = fake.uploads[int(upload_id)] if upload_id.isdigit() and int(upload_id) < len(fake.uploads) else 0
+                transcript_id = f"tr_{len(fake.transcripts)}"
+                fake.transcripts[transcript_id] = {
+                    'audio_url': audio_url,
+                    'ready_at': time.time() + fake.processing_time + audio_bytes / 1e6 * fake.processing_per_mb
+                }
+            self._send_json(200, {'id': transcript_id, 'status': 'queued'})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_GET(self):
+        fake = self.server.fake
+        prefix = '/v2/transcript/'
+        if not self.path.startswith(prefix):
+            self._send_json(404, {'error': 'not found'})
+            return
+        transcript_id = self.path[len(prefix):]
+        with fake.lock:
+            transcript = fake.transcripts.get(transcript_id)
+            fake.polls += 1
+        if transcript is None:
+            self._send_json(404, {'error': 'transcript not found'})
+        elif time.time() < transcript['ready_at']:
+            self._send_json(200, {'id': transcript_id, 'status': 'processing', 'text': None})
+        else:
+            self._send_json(200, {'id': transcript_id, 'status': 'completed', 'text': fake.transcript_text})
+
+
+class FakeAssemblyAIServer(FakeServer):
+    """
+    Fake AssemblyAI /v2/upload, /v2/transcript and transcript polling
+    endpoints. Uploads are throttled to `upload_bandwidth` bytes per second
+    when set; a transcript takes `processing_time` plus `processing_per_mb`
+    seconds per MB of uploaded audio.
+    """
+
+    def __init__(self, processing_time: float = 1.0,
+                 transcript_text: str = "photosynthesis turns light into chemical energy", port: int = 0,
+                 processing_per_mb: float = 0.0, upload_bandwidth: float = 0.0):
+        super().__init__(FakeAssemblyAIHandler, port)
+        self.processing_time = processing_time
+        self.processing_per_mb = processing_per_mb
+        self.upload_bandwidth = upload_bandwidth
+        self.transcript_text = transcript_text
+        self.lock = threading.Lock()
+        self.uploads = []
+        self.uploaded_bytes = 0
+        self.transcripts = {}
+        self.polls = 0
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {'uploads': len(self.uploads), 'uploaded_bytes': self.uploaded_bytes,
+                    'transcripts': len(self.transcripts), 'polls': self.polls}
@@ -0,0 +1,63 @@
+"""
+Measure the latency saved by the pooled LLMClient versus a bare requests.post
+per call, against a local fake Groq server. The fake is plain HTTP on
+loopback, so this only counts the TCP handshake a pooled connection skips;
+against the real API each new connection also pays DNS and a TLS handshake.
+
+Usage: python benchmarks/llm_client_reuse.py [--calls 500]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from benchmarks.fakes import FakeGroqServer
+from utils.llm_client import LLMClient
+
+PAYLOAD = {
+    "model": "llama3-8b-8192",
+    "messages": [{"role": "user", "content": "Explain photosynthesis"}],
+    "temperature": 0.8,
+    "max_tokens": 100
+}
+
+
+def time_calls(call, calls: int) -> list:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name: str, samples: list) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<14} mean={statistics.mean(samples):7.3f} ms  p50={statistics.median(samples):7.3f} ms  p95={p95:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=500)
+    args = parser.parse_args()
+
+    with FakeGroqServer() as server:
+        headers = {"Authorization": "Bearer fake", "Content-Type": "application/json"}
+        bare = time_calls(lambda: requests.post(server.chat_url, headers=headers, json=PAYLOAD), args.calls)
+
+        client = LLMClient('fake', api_url=server.chat_url)
+        pooled = time_calls(lambda: client.post(PAYLOAD), args.calls)
+
+    report('requests.post', bare)
+    report('LLMClient', pooled)
+    print(f"saved per call: {statistics.mean(bare) - statistics.mean(pooled):.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Tail latency of interactive analysis calls with one provider versus the
+provider router, with and without hedging, against local fake providers:
+a fast one with a slow tail, a steady slower one, and one that is down.
+
+Usage: python benchmarks/llm_router.py [--calls 200] [--concurrency 8]
+           [--tail-rate 0.1] [--tail-latency 3.0]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeGroqServer
+from utils.llm_client import LLMClient
+from utils.llm_router import LLMRouter, Provider
+from utils.metrics import metrics
+
+MESSAGES = [{"role": "user", "content": "Grade this answer about photosynthesis"}]
+
+
+def percentile(samples: list, fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def build_router(servers: dict, names: list, hedge_delay: float) -> LLMRouter:
+    providers = [
+        Provider(name, LLMClient('fake-key', api_url=servers[name].chat_url, name=name, max_retries=0))
+        for name in names
+    ]
+    return LLMRouter(providers, hedge_delay=hedge_delay)
+
+
+def run(router: LLMRouter, calls: int, concurrency: int, hedge: bool) -> dict:
+    def call(_):
+        start = time.perf_counter()
+        text = router.chat(MESSAGES, model='llama3-8b-8192', max_tokens=200, operation='analysis', hedge=hedge)
+        return time.perf_counter() - start, bool(text)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(calls)))
+    latencies = [latency for latency, _ in results]
+    return {
+        'p50': round(percentile(latencies, 0.5), 3),
+        'p95': round(percentile(latencies, 0.95), 3),
+        'p99': round(percentile(latencies, 0.99), 3),
+        'errors': sum(1 for _, ok in results if not ok),
+        'providers': router.get_status()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--tail-rate', type=float, default=0.1, help='share of slow calls on the fast provider')
+    parser.add_argument('--tail-latency', type=float, default=3.0)
+    parser.add_argument('--hedge-delay', type=float, default=0.5, help='hedge delay before p95 is known')
+    args = parser.parse_args()
+
+    servers = {
+        'fast': FakeGroqServer(latency=0.2, jitter=0.05, tail_rate=args.tail_rate,
+                               tail_latency=args.tail_latency, seed=1),
+        'steady': FakeGroqServer(latency=0.45, jitter=0.05, seed=2),
+        'down': FakeGroqServer(error_rate=1.0, seed=3)
+    }
+    for server in servers.values():
+        server.start()
+    try:
+        report = {
+            'single_provider': run(build_router(servers, ['fast'], args.hedge_delay),
+                                   args.calls, args.concurrency, hedge=False),
+            'routed': run(build_router(servers, ['down', 'fast', 'steady'], args.hedge_delay),
+                          args.calls, args.concurrency, hedge=False),
+            'routed_hedged': run(build_router(servers, ['down', 'fast', 'steady'], args.hedge_delay),
+                                 args.calls, args.concurrency, hedge=True),
+            'upstream_requests': {name: server.get_stats() for name, server in servers.items()},
+            'router_counters': [line for line in metrics.render().splitlines()
+                                if line.startswith(('llm_failover_total', 'llm_hedges_total'))]
+        }
+    finally:
+        for server in servers.values():
+            server.stop()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
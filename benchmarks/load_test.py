@@ -0,0 +1,320 @@
+"""
+Scripted load test for /generate_content, /analyze_response and
+/transcribe_audio. Starts the app (sync or async mode) against local fake
+Groq and AssemblyAI servers, drives each scenario at a fixed concurrency and
+prints latency percentiles, throughput and error rates as JSON, so a
+performance change can be compared against a saved baseline.
+
+Usage: python benchmarks/load_test.py [--scenarios generate_content,analyze_response,transcribe_audio]
+           [--mode sync] [--concurrency 20] [--requests 200] [--groq-latency 0.5]
+           [--rate-limit-rate 0.05] [--stream] [--output baseline.json]
+"""
+import argparse
+import io
+import itertools
+import json
+import math
+import os
+import platform
+import re
+import struct
+import sys
+import threading
+import time
+import wave
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+
+from benchmarks.fakes import FakeAssemblyAIServer, FakeGroqServer
+from benchmarks.serving_capacity import start_server
+
+SCENARIOS = ('generate_content', 'analyze_response', 'transcribe_audio')
+
+ANSWER = (
+    "Photosynthesis happens in the chloroplasts, where chlorophyll absorbs light energy. "
+    "The light reactions split water and release oxygen, and the Calvin cycle uses carbon dioxide "
+    "to build glucose. For example, a plant on a windowsill grows towards the light because it "
+    "needs that energy to make food. Answer number {index}."
+)
+
+METRIC_LINE = re.compile(r'^(\w+)(\{[^}]*\})?\s+(\S+)$')
+
+
+def make_wav(seconds: float = 2.0, rate: int = 16000) -> bytes:
+    """
+    A mono 16-bit 440 Hz tone, large enough to pass upload validation
+    """
+    frames = b''.join(
+        struct.pack('<h', int(8000 * math.sin(2 * math.pi * 440 * i / rate)))
+        for i in range(int(seconds * rate))
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(frames)
+    return buffer.getvalue()
+
+
+def percentile(ordered: list, fraction: float):
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 4)
+
+
+def scrape_counters(base_url: str) -> dict:
+    """
+    Read the app's /metrics counters that show upstream trouble hidden behind 200s
+    """
+    try:
+        text = requests.get(f'{base_url}/metrics', timeout=10).text
+    except requests.exceptions.RequestException:
+        return {}
+    counters = Counter()
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match and match.group(1) in ('fallback_to_mock_total', 'upstream_errors_total'):
+            counters[f"{match.group(1)}{match.group(2) or ''}"] += float(match.group(3))
+    return counters
+
+
+def stats_delta(after: dict, before: dict) -> dict:
+    """
+    Per-key difference of two get_stats() snapshots; nested dicts such as
+    the fake Groq server's by_model are diffed key by key
+    """
+    delta = {}
+    for key, value in after.items():
+        if isinstance(value, dict):
+            delta[key] = {name: count - before.get(key, {}).get(name, 0) for name, count in value.items()}
+        else:
+            delta[key] = value - before.get(key, 0)
+    return delta
+
+
+class Scenario:
+    """
+    One timed request type; `setup` runs once per worker session, untimed
+    """
+
+    name = ''
+
+    def __init__(self, base_url: str, args):
+        self.base_url = base_url
+        self.args = args
+
+    def setup(self, session: requests.Session, worker: int) -> None:
+        pass
+
+    def request(self, session: requests.Session, index: int) -> requests.Response:
+        raise NotImplementedError
+
+    def succeeded(self, response: requests.Response) -> bool:
+        return response.status_code == 200 and response.json().get('success') is True
+
+
+class GenerateContent(Scenario):
+    name = 'generate_content'
+
+    def request(self, session, index):
+        payload = {'academic_level': 'high_school', 'subject': 'Biology', 'topic': f'Load topic {index} {time.time()}'}
+        if not self.args.stream:
+            return session.post(f'{self.base_url}/generate_content', json=payload, timeout=self.args.timeout)
+        response = session.post(f'{self.base_url}/generate_content/stream', json=payload,
+                                timeout=self.args.timeout, stream=True)
+        response.events = [line for line in response.iter_lines(decode_unicode=True) if line.startswith('event:')]
+        return response
+
+    def succeeded(self, response):
+        if not self.args.stream:
+            return super().succeeded(response)
+        return response.status_code == 200 and 'event: done' in response.events and 'event: error' not in response.events
+
+
+class AnalyzeResponse(Scenario):
+    name = 'analyze_response'
+
+    def setup(self, session, worker):
+        session.post(f'{self.base_url}/generate_content', json={
+            'academic_level': 'high_school', 'subject': 'Biology', 'topic': f'Photosynthesis {worker}'
+        }, timeout=self.args.timeout).raise_for_status()
+
+    def request(self, session, index):
+        return session.post(f'{self.base_url}/analyze_response', json={'response': ANSWER.format(index=index)},
+                            timeout=self.args.timeout)
+
+
+class TranscribeAudio(Scenario):
+    name = 'transcribe_audio'
+
+    def __init__(self, base_url, args):
+        super().__init__(base_url, args)
+        self.audio = make_wav(args.audio_seconds)
+
+    def request(self, session, index):
+        return session.post(f'{self.base_url}/transcribe_audio', timeout=self.args.timeout,
+                            files={'audio': (f'recording_{index}.wav', self.audio, 'audio/wav')})
+
+    def succeeded(self, response):
+        if not super().succeeded(response):
+            return False
+        text = response.json().get('transcription') or ''
+        return not text.startswith('❌') and not text.startswith('Error')
+
+
+SCENARIO_CLASSES = {cls.name: cls for cls in (GenerateContent, AnalyzeResponse, TranscribeAudio)}
+
+
+def run_scenario(scenario: Scenario, concurrency: int, total: int) -> dict:
+    counter = itertools.count()
+    lock = threading.Lock()
+    results = []
+    statuses = Counter()
+
+    def worker(worker_id: int) -> None:
+        session = requests.Session()
+        try:
+            scenario.setup(session, worker_id)
+        except requests.exceptions.RequestException as e:
+            with lock:
+                statuses[f'setup_failed:{type(e).__name__}'] += 1
+            return
+        while True:
+            index = next(counter)
+            if index >= total:
+                return
+            start = time.perf_counter()
+            try:
+                response = scenario.request(session, index)
+                ok = scenario.succeeded(response)
+                status = str(response.status_code)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                ok, status = False, type(e).__name__
+            latency = time.perf_counter() - start
+            with lock:
+                results.append((latency, ok))
+                statuses[status] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    return {
+        'requests': len(results),
+        'errors': errors,
+        'error_rate': round(errors / len(results), 4) if results else None,
+        'status_codes': dict(statuses),
+        'wall_seconds': round(wall, 3),
+        'throughput_rps': round(len(results) / wall, 2) if wall else None,
+        'latency_seconds': {
+            'mean': round(sum(latencies) / len(latencies), 4) if latencies else None,
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': round(latencies[-1], 4) if latencies else None
+        }
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--mode', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--base-url', help='drive an already running app instead of starting one')
+    parser.add_argument('--port', type=int, default=5200)
+    parser.add_argument('--groq-port', type=int, default=0, help='fixed fake Groq port, for use with --base-url')
+    parser.add_argument('--assemblyai-port', type=int, default=0, help='fixed fake AssemblyAI port')
+    parser.add_argument('--threads', type=int, default=32, help='gunicorn threads in sync mode')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--stream', action='store_true', help='use /generate_content/stream')
+    parser.add_argument('--groq-latency', type=float, default=0.5)
+    parser.add_argument('--groq-jitter', type=float, default=0.1)
+    parser.add_argument('--token-delay', type=float, default=0.0, help='seconds between streamed words')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='share of Groq calls answered 429')
+    parser.add_argument('--retry-after', type=float, default=0.5)
+    parser.add_argument('--transcribe-seconds', type=float, default=0.5, help='fake AssemblyAI processing time')
+    parser.add_argument('--audio-seconds', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIO_CLASSES]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    report = {
+        'mode': 'external' if args.base_url else args.mode,
+        'concurrency': args.concurrency,
+        'requests_per_scenario': args.requests,
+        'upstream': {
+            'groq_latency': args.groq_latency,
+            'groq_jitter': args.groq_jitter,
+            'token_delay': args.token_delay,
+            'rate_limit_rate': args.rate_limit_rate,
+            'transcribe_seconds': args.transcribe_seconds
+        },
+        'python': platform.python_version(),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'scenarios': {}
+    }
+
+    groq = FakeGroqServer(latency=args.groq_latency, jitter=args.groq_jitter, token_delay=args.token_delay,
+                          rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, seed=args.seed,
+                          port=args.groq_port)
+    assemblyai = FakeAssemblyAIServer(processing_time=args.transcribe_seconds, port=args.assemblyai_port)
+    process = None
+    with groq, assemblyai:
+        base_url = args.base_url
+        if not base_url:
+            # The pre-grader would short-circuit some answers without an
+            # upstream call; disable it so every analysis reaches Groq.
+            process = start_server(args.mode, args.port, args.threads, groq.chat_url, {
+                'ASSEMBLYAI_API_KEY': 'fake',
+                'ASSEMBLYAI_BASE_URL': assemblyai.url,
+                'PRE_GRADER_ENABLED': '0'
+            })
+            base_url = f'http://127.0.0.1:{args.port}'
+        try:
+            for name in names:
+                groq_before, assemblyai_before = groq.get_stats(), assemblyai.get_stats()
+                counters_before = scrape_counters(base_url)
+
+                result = run_scenario(SCENARIO_CLASSES[name](base_url, args), args.concurrency, args.requests)
+
+                counters_after = scrape_counters(base_url)
+                result['upstream_calls'] = {
+                    'groq': stats_delta(groq.get_stats(), groq_before),
+                    'assemblyai': stats_delta(assemblyai.get_stats(), assemblyai_before)
+                }
+                result['app_counters'] = {
+                    key: value - counters_before.get(key, 0)
+                    for key, value in counters_after.items()
+                    if value - counters_before.get(key, 0)
+                }
+                report['scenarios'][name] = result
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
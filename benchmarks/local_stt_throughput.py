@@ -0,0 +1,101 @@
+"""
+CPU throughput of the local faster-whisper backend, in clips per second and
+clips per second per core, for several worker-process counts. Uses the
+audio files in --clips when given, otherwise synthetic speech-like WAVs
+(which measure compute cost, not accuracy).
+
+Requires: pip install faster-whisper
+
+Usage: python benchmarks/local_stt_throughput.py [--clips dir/] [--workers 1,2,4] [--threads 1]
+           [--model base] [--count 32] [--seconds 10]
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.audio_upload import speech_like_wav
+from utils.local_stt import LocalSTTBackend
+
+
+def load_clips(directory: str, count: int, seconds: float) -> list:
+    if not directory:
+        return [speech_like_wav(seconds, 0.3, 0.3, 16000, 1)] * count
+    names = sorted(name for name in os.listdir(directory)
+                   if name.lower().endswith(('.wav', '.webm', '.ogg', '.mp3', '.m4a', '.flac')))
+    if not names:
+        raise SystemExit(f"No audio files in {directory}")
+    clips = []
+    for name in names:
+        with open(os.path.join(directory, name), 'rb') as f:
+            clips.append(f.read())
+    return [clips[i % len(clips)] for i in range(count)]
+
+
+def run(clips: list, workers: int, threads: int, model: str) -> dict:
+    backend = LocalSTTBackend(model=model, workers=workers, cpu_threads=threads,
+                              max_bytes=max(len(clip) for clip in clips), timeout=600)
+
+    def transcribe(clip: bytes):
+        start = time.perf_counter()
+        text = backend.transcribe(io.BytesIO(clip))
+        return time.perf_counter() - start, not text.startswith('❌')
+
+    # Load the model in every worker before timing
+    backend.warm(wait=True)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers * 2) as pool:
+        results = list(pool.map(transcribe, clips))
+    wall = time.perf_counter() - start
+    backend._reset()
+
+    latencies = sorted(latency for latency, _ in results)
+    cores = workers * threads
+    return {
+        'workers': workers,
+        'threads_per_worker': threads,
+        'clips': len(clips),
+        'errors': sum(1 for _, ok in results if not ok),
+        'wall_seconds': round(wall, 2),
+        'clips_per_second': round(len(clips) / wall, 3),
+        'clips_per_second_per_core': round(len(clips) / wall / cores, 3),
+        'latency_p50': round(statistics.median(latencies), 3),
+        'latency_p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clips', help='directory of audio files to transcribe')
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--threads', type=int, default=1, help='CTranslate2 threads per worker')
+    parser.add_argument('--model', default=os.getenv('LOCAL_STT_MODEL', 'base'))
+    parser.add_argument('--count', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10.0, help='length of synthetic clips')
+    args = parser.parse_args()
+
+    probe = LocalSTTBackend(model=args.model)
+    if not probe.available:
+        raise SystemExit("faster-whisper is not installed: pip install faster-whisper")
+
+    clips = load_clips(args.clips, args.count, args.seconds)
+    report = {
+        'model': args.model,
+        'compute_type': probe.compute_type,
+        'cpu_count': os.cpu_count(),
+        'audio_seconds_per_clip': args.seconds if not args.clips else None,
+        'runs': [run(clips, int(workers), args.threads, args.model) for workers in args.workers.split(',')]
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Check that /metrics serves the service gauges in both serving modes. Starts
+the sync and async apps against local fake Groq and AssemblyAI servers,
+touches content generation, analysis and the transcription job queue so
+every service is built, then scrapes /metrics and reports missing gauge
+families and collector errors. Exits non-zero if either mode fails.
+
+Usage: python benchmarks/metrics_check.py [--modes sync,async] [--port 5300]
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+
+from benchmarks.fakes import FakeAssemblyAIServer, FakeGroqServer
+from benchmarks.load_test import ANSWER, METRIC_LINE, make_wav
+from benchmarks.serving_capacity import start_server
+
+# Gauge family -> label set each mode must expose once its services exist
+SERVICE_GAUGES = (
+    ('cache_size', '{cache="content"}'),
+    ('cache_size', '{cache="analysis"}'),
+    ('pre_grader_assessed', ''),
+    ('transcription_jobs_total', ''),
+    ('transcription_jobs_max_jobs', '')
+)
+
+
+def exercise(base_url: str) -> None:
+    session = requests.Session()
+    session.post(f'{base_url}/generate_content', json={
+        'academic_level': 'high_school', 'subject': 'Biology', 'topic': 'Photosynthesis'
+    }, timeout=60).raise_for_status()
+    session.post(f'{base_url}/analyze_response', json={'response': ANSWER.format(index=0)},
+                 timeout=60).raise_for_status()
+    session.post(f'{base_url}/transcribe_audio/jobs', timeout=60,
+                 files={'audio': ('recording.wav', make_wav(), 'audio/wav')}).raise_for_status()
+
+
+def check(base_url: str) -> dict:
+    exercise(base_url)
+    samples = {}
+    for line in requests.get(f'{base_url}/metrics', timeout=10).text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            samples[match.group(1) + (match.group(2) or '')] = float(match.group(3))
+    missing = [name + labels for name, labels in SERVICE_GAUGES if name + labels not in samples]
+    errors = {key: value for key, value in samples.items() if key.startswith('metrics_collector_errors')}
+    return {'ok': not missing and not errors, 'missing': missing, 'collector_errors': errors}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--port', type=int, default=5300)
+    args = parser.parse_args()
+
+    report = {}
+    with FakeGroqServer(latency=0.01) as groq, FakeAssemblyAIServer(processing_time=0.1) as assemblyai:
+        for offset, mode in enumerate(mode.strip() for mode in args.modes.split(',') if mode.strip()):
+            port = args.port + offset
+            process = start_server(mode, port, 8, groq.chat_url, {
+                'ASSEMBLYAI_API_KEY': 'fake',
+                'ASSEMBLYAI_BASE_URL': assemblyai.url
+            })
+            try:
+                report[mode] = check(f'http://127.0.0.1:{port}')
+            finally:
+                process.terminate()
+                process.wait()
+
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if all(result['ok'] for result in report.values()) else 1)
+
+
+if __name__ == '__main__':
+    main()
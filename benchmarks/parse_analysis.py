@@ -0,0 +1,95 @@
+"""
+Micro-benchmark for AIAnalyzer._parse_analysis over the recorded LLM outputs
+in benchmarks/fixtures/analysis_outputs.json, against the previous
+substring-matching parser. The new parser is first checked against the
+golden 'expected' structure pinned in each fixture.
+
+Usage: python benchmarks/parse_analysis.py [--iterations 2000]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.ai_analyzer import AIAnalyzer
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures', 'analysis_outputs.json')
+
+
+def legacy_parse_analysis(analysis_text: str) -> dict:
+    sections = {
+        'strengths': [], 'false_points': [], 'missing_points': [], 'examples_quality': '',
+        'areas_lacking': [], 'improvements': [], 'grade': 5, 'grade_explanation': '',
+        'detailed_feedback': '', 'next_steps': ''
+    }
+    headers = [
+        ('## STRENGTHS', 'strengths'), ('## FALSE POINTS', 'false_points'),
+        ('## MISSING POINTS', 'missing_points'), ('## EXAMPLES QUALITY', 'examples_quality'),
+        ('## AREAS LACKING', 'areas_lacking'), ('## IMPROVEMENTS', 'improvements'),
+        ('## GRADE', 'grade'), ('## GRADE EXPLANATION', 'grade_explanation'),
+        ('## DETAILED FEEDBACK', 'detailed_feedback'), ('## NEXT STEPS', 'next_steps')
+    ]
+    current_section = None
+    for line in analysis_text.split('\n'):
+        line = line.strip()
+        matched = next((key for marker, key in headers if marker in line), None)
+        if matched:
+            current_section = matched
+        elif line and current_section:
+            if current_section == 'grade':
+                grade_match = re.search(r'(\d+)/10', line)
+                if grade_match:
+                    sections['grade'] = int(grade_match.group(1))
+            elif isinstance(sections[current_section], list):
+                if line.startswith('•') or line.startswith('-') or line.startswith('*'):
+                    sections[current_section].append(line.lstrip('•-* '))
+                elif not line.startswith('#'):
+                    sections[current_section].append(line)
+            elif sections[current_section]:
+                sections[current_section] += ' ' + line
+            else:
+                sections[current_section] = line
+    return sections
+
+
+def bench(name: str, parse, texts: list, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            parse(text)
+    per_parse = (time.perf_counter() - start) / (iterations * len(texts)) * 1e6
+    print(f"{name:<8} {per_parse:8.2f} us/parse")
+    return per_parse
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(FIXTURES, encoding='utf-8') as f:
+        fixtures = json.load(f)
+
+    analyzer = AIAnalyzer({})
+    failures = 0
+    for fixture in fixtures:
+        if analyzer._parse_analysis(fixture['text']) != fixture['expected']:
+            failures += 1
+            print(f"❌ golden mismatch: {fixture['name']}")
+    print(f"golden fixtures: {len(fixtures) - failures}/{len(fixtures)} match")
+
+    texts = [fixture['text'] for fixture in fixtures]
+    legacy = bench('legacy', legacy_parse_analysis, texts, args.iterations)
+    current = bench('current', analyzer._parse_analysis, texts, args.iterations)
+    print(f"speedup  {legacy / current:8.2f}x")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Replay a sample of /analyze_response traffic through the local pre-grader and
+report how many Groq analysis calls it would have saved. Each sample in
+benchmarks/fixtures/analysis_traffic.json carries the verdict a human
+reviewer expects, so misclassifications are listed as well.
+
+Usage: python benchmarks/pre_grader_replay.py [--traffic path.json] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.content_generator import ContentGenerator
+from utils.pre_grader import PreGrader
+
+TRAFFIC = os.path.join(ROOT, 'benchmarks', 'fixtures', 'analysis_traffic.json')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--traffic', default=TRAFFIC)
+    parser.add_argument('--repeat', type=int, default=200, help='timing passes over the sample')
+    args = parser.parse_args()
+
+    with open(args.traffic) as f:
+        traffic = json.load(f)
+
+    generator = ContentGenerator({})
+    original_content = generator._assemble_content(traffic['content'], 'high school', 'Biology', traffic['topic'])
+    samples = traffic['responses']
+
+    grader = PreGrader()
+    verdicts = Counter()
+    mismatches = []
+    for sample in samples:
+        verdict = grader.assess(sample['response'], original_content)['verdict']
+        verdicts[verdict] += 1
+        if verdict != sample['expected']:
+            mismatches.append((sample['expected'], verdict, sample['response'][:60]))
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for sample in samples:
+            grader.assess(sample['response'], original_content)
+    per_call_ms = (time.perf_counter() - start) * 1000 / (args.repeat * len(samples))
+
+    saved = len(samples) - verdicts['borderline']
+    print(f"samples:          {len(samples)}")
+    for verdict, count in sorted(verdicts.items()):
+        print(f"  {verdict:<14}  {count}")
+    print(f"LLM calls saved:  {saved} ({saved / len(samples):.0%})")
+    print(f"pre-grade cost:   {per_call_ms:.3f} ms per answer")
+    if mismatches:
+        print("mismatches (expected -> got):")
+        for expected, got, preview in mismatches:
+            print(f"  {expected} -> {got}: {preview!r}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Cost of building a lesson's reference list: rendering the compiled templates
+for a new topic versus a memoized repeat of the same (level, subject, topic).
+
+Usage: python benchmarks/reference_catalog.py [--topics 200] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.reference_catalog import ReferenceCatalog, catalog_paths
+
+LEVELS = ['High School', 'Undergraduate', 'Graduate']
+SUBJECTS = ['Mathematics', 'Physics', 'Biology', 'Computer Science', 'Economics']
+
+
+def timed(calls) -> float:
+    start = time.perf_counter()
+    for call in calls:
+        call()
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--topics', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    load_start = time.perf_counter()
+    catalog = ReferenceCatalog(catalog_paths(), cache_size=args.topics * len(LEVELS))
+    load_ms = (time.perf_counter() - load_start) * 1000
+
+    requests = [(LEVELS[i % len(LEVELS)], SUBJECTS[i % len(SUBJECTS)], f"Topic number {i} & friends")
+                for i in range(args.topics)]
+    cold = timed([lambda r=r: catalog.references(*r) for r in requests])
+    warm = timed([lambda r=r: catalog.references(*r) for r in requests * args.repeat])
+
+    print(json.dumps({
+        'catalog_files': len(catalog.paths),
+        'load_ms': round(load_ms, 2),
+        'first_call_us': round(cold, 2),
+        'memoized_call_us': round(warm, 2),
+        'cache': catalog.get_status()
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Load test comparing concurrent-request capacity of the sync (gunicorn +
+app.py) and async (uvicorn + asgi_app.py) serving modes against a local fake
+Groq server with a fixed completion latency.
+
+Usage: python benchmarks/serving_capacity.py [--concurrency 200] [--latency 2] [--threads 8]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+
+from benchmarks.fakes import FakeGroqServer
+
+
+def start_server(mode: str, port: int, threads: int, groq_url: str, extra_env: dict = None) -> subprocess.Popen:
+    env = dict(os.environ, GROQ_API_KEY='fake', GROQ_API_URL=groq_url, GROQ_POOL_SIZE=str(threads),
+               GROQ_RPM='0', GROQ_TPM='0')
+    env.update(extra_env or {})
+    if mode == 'sync':
+        command = [sys.executable, '-m', 'gunicorn', '-w', '1', '--threads', str(threads),
+                   '-b', f'127.0.0.1:{port}', 'app:app']
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--host', '127.0.0.1',
+                   '--port', str(port), '--log-level', 'warning']
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            requests.get(f'http://127.0.0.1:{port}/voice_status', timeout=1)
+            return process
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{mode} server did not start on port {port}')
+
+
+def run_load(base_url: str, concurrency: int) -> dict:
+    def one(i: int):
+        start = time.perf_counter()
+        try:
+            response = requests.post(f'{base_url}/generate_content', json={
+                'academic_level': 'high_school',
+                'subject': 'Biology',
+                'topic': f'Topic {i} {time.time()}'
+            }, timeout=300)
+            ok = response.status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(concurrency)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    return {
+        'requests': concurrency,
+        'errors': errors,
+        'wall_seconds': round(wall, 3),
+        'throughput_rps': round(concurrency / wall, 2),
+        'p50_seconds': round(statistics.median(latencies), 3),
+        'p95_seconds': round(latencies[int(len(latencies) * 0.95) - 1], 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=2.0)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--modes', default='sync,async')
+    args = parser.parse_args()
+
+    report = {'concurrency': args.concurrency, 'upstream_latency': args.latency, 'modes': {}}
+    with FakeGroqServer(latency=args.latency) as groq:
+        for offset, mode in enumerate(args.modes.split(',')):
+            port = 5100 + offset
+            process = start_server(mode, port, args.threads, groq.chat_url)
+            try:
+                report['modes'][mode] = run_load(f'http://127.0.0.1:{port}', args.concurrency)
+            finally:
+                process.terminate()
+                process.wait()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare per-request session overhead of Flask's signed-cookie session against
+the server-side session backends in utils/session_store.py.
+
+Usage: python benchmarks/session_overhead.py [--requests 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify, session
+from flask.sessions import SecureCookieSessionInterface
+
+from utils.session_store import (
+    FakeRedis, MemorySessionStore, RedisSessionStore, SQLiteSessionStore,
+    ServerSideSessionInterface
+)
+
+
+def sample_content() -> dict:
+    paragraph = ' '.join(['photosynthesis converts light energy into chemical energy'] * 40)
+    content = '\n\n'.join([f'## {i}. Section\n{paragraph}' for i in range(1, 8)])
+    return {
+        'content': content,
+        'structure': [{'title': f'{i}. Section', 'subsections': []} for i in range(1, 8)],
+        'references': [{'title': 'Ref', 'url': 'https://example.com/?q=topic', 'type': 'Article'}] * 8,
+        'key_points': ['Key point about the topic'] * 10,
+        'word_count': len(content.split()),
+        'academic_level': 'high_school',
+        'subject': 'Biology',
+        'topic': 'Photosynthesis'
+    }
+
+
+def build_app(interface) -> Flask:
+    app = Flask(__name__)
+    app.secret_key = 'benchmark'
+    app.session_interface = interface
+
+    @app.route('/populate')
+    def populate():
+        session['generated_content'] = sample_content()
+        session['academic_level'] = 'high_school'
+        return jsonify({'success': True})
+
+    @app.route('/voice_status')
+    def voice_status():
+        return jsonify({'has_content': bool(session.get('generated_content'))})
+
+    return app
+
+
+def run(name: str, interface, requests_count: int) -> None:
+    client = build_app(interface).test_client()
+    response = client.get('/populate')
+    cookie_header = response.headers.get('Set-Cookie', '')
+    cookie_bytes = len(cookie_header.split(';', 1)[0])
+
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        client.get('/voice_status')
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:<10} cookie={cookie_bytes:>6} bytes  "
+          f"per_request={elapsed / requests_count * 1e6:>8.1f} us  "
+          f"over_4kb={'yes' if cookie_bytes > 4096 else 'no'}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [
+            ('cookie', SecureCookieSessionInterface()),
+            ('memory', ServerSideSessionInterface(MemorySessionStore())),
+            ('sqlite', ServerSideSessionInterface(SQLiteSessionStore(os.path.join(tmp, 'sessions.db')))),
+            ('redis', ServerSideSessionInterface(RedisSessionStore(FakeRedis())))
+        ]
+        for name, interface in backends:
+            run(name, interface, args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Time from "student stops talking" to final transcript, for whole-clip
+transcription versus live segmented streaming. A local fake recognizer
+stands in for AssemblyAI: each call costs --overhead seconds plus
+--per-second seconds per second of audio, like a queued batch API.
+
+Audio is fed in 250 ms chunks at --speed times real time.
+
+Usage: python benchmarks/streaming_transcription.py [--lengths 15,60,180] [--speed 20]
+"""
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+import wave
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.streaming_transcription import StreamingTranscription, get_segment_executor
+
+RATE = 16000
+CHUNK_SECONDS = 0.25
+
+
+def spoken_pcm(seconds: float) -> bytes:
+    """
+    Four-second phrases of modulated tone separated by half-second pauses
+    """
+    samples = []
+    for i in range(int(seconds * RATE)):
+        t = i / RATE
+        if t % 4.5 < 4.0:
+            value = int(9000 * math.sin(2 * math.pi * (180 + 40 * math.sin(t)) * t))
+        else:
+            value = 0
+        samples.append(value)
+    return struct.pack(f'<{len(samples)}h', *samples)
+
+
+class FakeRecognizer:
+    def __init__(self, overhead: float, per_second: float, time_scale: float):
+        self.overhead = overhead
+        self.per_second = per_second
+        self.time_scale = time_scale
+        self.calls = 0
+
+    def __call__(self, audio) -> str:
+        with wave.open(audio, 'rb') as reader:
+            duration = reader.getnframes() / reader.getframerate()
+        self.calls += 1
+        time.sleep((self.overhead + self.per_second * duration) / self.time_scale)
+        return f"Segment of {duration:.1f} seconds."
+
+
+def run(seconds: float, args) -> dict:
+    pcm = spoken_pcm(seconds)
+    chunk = int(CHUNK_SECONDS * RATE) * 2
+    scale = args.speed
+
+    batch = FakeRecognizer(args.overhead, args.per_second, scale)
+    from utils.audio_prep import pcm_to_wav
+    start = time.perf_counter()
+    batch(pcm_to_wav(pcm, RATE))
+    batch_after_stop = (time.perf_counter() - start) * scale
+
+    streamed = FakeRecognizer(args.overhead, args.per_second, scale)
+    transcription = StreamingTranscription(streamed, get_segment_executor(), sample_rate=RATE)
+    partial_at = None
+    recording_started = time.perf_counter()
+    for offset in range(0, len(pcm), chunk):
+        transcription.feed(pcm[offset:offset + chunk])
+        if partial_at is None and transcription.partial()['segments']:
+            partial_at = (time.perf_counter() - recording_started) * scale
+        time.sleep(CHUNK_SECONDS / scale)
+    final = transcription.finish()
+
+    return {
+        'audio_seconds': seconds,
+        'batch_seconds_after_stop': round(batch_after_stop, 2),
+        'streamed_seconds_after_stop': round(final['finalize_seconds'] * scale, 2),
+        'first_partial_seconds': round(partial_at, 2) if partial_at is not None else None,
+        'segments': final['segments'],
+        'recognizer_calls': streamed.calls
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lengths', default='15,60,180', help='answer lengths in seconds')
+    parser.add_argument('--speed', type=float, default=20.0, help='simulation speed-up over real time')
+    parser.add_argument('--overhead', type=float, default=2.0, help='fixed seconds per recognizer call')
+    parser.add_argument('--per-second', type=float, default=0.25, help='recognizer seconds per audio second')
+    args = parser.parse_args()
+
+    results = [run(float(length), args) for length in args.lengths.split(',')]
+    print(json.dumps({'recognizer': {'overhead': args.overhead, 'per_second': args.per_second},
+                      'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
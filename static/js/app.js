@@ -1,7 +1,21 @@
+// Speech-tuned recording profile: 16 kHz mono Opus at a low bitrate keeps
+// uploads small without hurting transcription accuracy
+const SPEECH_SAMPLE_RATE = 16000;
+const SPEECH_BITRATE = 24000;
+const SPEECH_MIME_TYPES = ['audio/webm;codecs=opus', 'audio/ogg;codecs=opus', 'audio/mp4'];
+const SILENCE_PEAK = 0.02;
+const LIVE_FINAL_TIMEOUT_MS = 15000;
+
 class AILearningPlatform {
     constructor() {
         this.mediaRecorder = null;
         this.audioChunks = [];
+        this.audioContext = null;
+        this.levelTimer = null;
+        this.peakLevel = 0;
+        this.speechSource = null;
+        this.pcmNode = null;
+        this.liveTranscription = null;
         this.isRecording = false;
         this.currentSession = null;
         
@@ -30,8 +44,8 @@ class AILearningPlatform {
             const response = await fetch('/voice_status');
             const status = await response.json();
             
-            if (!status.assemblyai_available) {
-                this.showNotification('Voice recording may not be available. Please ensure AssemblyAI API key is configured.', 'warning');
+            if (!status.transcription_available) {
+                this.showNotification('Voice recording may not be available. Please configure an AssemblyAI API key or local speech-to-text.', 'warning');
             }
         } catch (error) {
             console.error('Voice status check failed:', error);
@@ -59,29 +73,21 @@ class AILearningPlatform {
         
         this.setLoadingState('generateContent', true, 'Generating content...');
         
+        const payload = {
+            academic_level: academicLevel,
+            subject: subject,
+            topic: topic
+        };
+        
         try {
-            const response = await fetch('/generate_content', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    academic_level: academicLevel,
-                    subject: subject,
-                    topic: topic
-                })
-            });
-            
-            const data = await response.json();
+            const data = this.supportsStreaming()
+                ? await this.streamContent(payload)
+                : await this.fetchContent(payload);
             
-            if (data.success) {
-                this.displayContent(data);
-                this.showSection('contentSection');
-                this.currentSession = data.session_id;
-                this.showNotification('Content generated successfully!', 'success');
-            } else {
-                throw new Error(data.error || 'Content generation failed');
-            }
+            this.displayContent(data);
+            this.showSection('contentSection');
+            this.currentSession = data.session_id;
+            this.showNotification('Content generated successfully!', 'success');
         } catch (error) {
             console.error('Content generation error:', error);
             this.showNotification(`Error: ${error.message}`, 'error');
@@ -90,6 +96,108 @@ class AILearningPlatform {
         }
     }
     
+    supportsStreaming() {
+        return typeof ReadableStream !== 'undefined' && typeof TextDecoder !== 'undefined';
+    }
+    
+    async fetchContent(payload) {
+        const response = await fetch('/generate_content', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(payload)
+        });
+        
+        const data = await response.json();
+        
+        if (!data.success) {
+            throw new Error(data.error || 'Content generation failed');
+        }
+        return data;
+    }
+    
+    async streamContent(payload) {
+        const response = await fetch('/generate_content/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(payload)
+        });
+        
+        if (!response.ok || !response.body) {
+            const data = await response.json().catch(() => ({}));
+            throw new Error(data.error || 'Content generation failed');
+        }
+        
+        const contentDisplay = document.getElementById('contentDisplay');
+        document.getElementById('referencesDisplay').innerHTML = '';
+        contentDisplay.innerHTML = '';
+        this.showSection('contentSection');
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let content = '';
+        let result = null;
+        let renderScheduled = false;
+        
+        const render = () => {
+            renderScheduled = false;
+            contentDisplay.innerHTML = this.formatContent(content);
+        };
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            const rawEvents = buffer.split('\n\n');
+            buffer = rawEvents.pop();
+            
+            for (const rawEvent of rawEvents) {
+                const event = this.parseServerSentEvent(rawEvent);
+                if (!event) continue;
+                
+                if (event.type === 'token') {
+                    content += event.data.text;
+                    if (!renderScheduled) {
+                        renderScheduled = true;
+                        requestAnimationFrame(render);
+                    }
+                } else if (event.type === 'meta') {
+                    this.currentSession = event.data.session_id;
+                } else if (event.type === 'done') {
+                    result = { ...event.data, content };
+                } else if (event.type === 'error') {
+                    throw new Error(event.data.error);
+                }
+            }
+        }
+        
+        if (!result) {
+            throw new Error('Content stream ended unexpectedly');
+        }
+        return result;
+    }
+    
+    parseServerSentEvent(rawEvent) {
+        let type = 'message';
+        const dataLines = [];
+        
+        rawEvent.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                type = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trim());
+            }
+        });
+        
+        if (dataLines.length === 0) return null;
+        return { type, data: JSON.parse(dataLines.join('\n')) };
+    }
+    
     displayContent(data) {
         const contentDisplay = document.getElementById('contentDisplay');
         const referencesDisplay = document.getElementById('referencesDisplay');
@@ -132,12 +240,17 @@ class AILearningPlatform {
                 audio: {
                     echoCancellation: true,
                     noiseSuppression: true,
-                    sampleRate: 44100
+                    channelCount: 1,
+                    sampleRate: SPEECH_SAMPLE_RATE
                 } 
             });
             
-            this.mediaRecorder = new MediaRecorder(stream, {
-                mimeType: 'audio/webm;codecs=opus'
+            const recordStream = this.createSpeechStream(stream);
+            const mimeType = SPEECH_MIME_TYPES.find(type => MediaRecorder.isTypeSupported(type));
+            
+            this.mediaRecorder = new MediaRecorder(recordStream, {
+                ...(mimeType ? { mimeType } : {}),
+                audioBitsPerSecond: SPEECH_BITRATE
             });
             
             this.audioChunks = [];
@@ -149,6 +262,7 @@ class AILearningPlatform {
             };
             
             this.mediaRecorder.onstop = () => {
+                this.releaseSpeechStream();
                 this.processRecording();
                 stream.getTracks().forEach(track => track.stop());
             };
@@ -166,6 +280,133 @@ class AILearningPlatform {
         }
     }
     
+    createSpeechStream(stream) {
+        // Resample to 16 kHz mono in a Web Audio graph and track the peak
+        // level so silent recordings are never uploaded. Browsers that cannot
+        // resample a live stream record at the device rate instead.
+        this.peakLevel = 0;
+        try {
+            this.audioContext = new AudioContext({ sampleRate: SPEECH_SAMPLE_RATE });
+            const source = this.audioContext.createMediaStreamSource(stream);
+            const destination = this.audioContext.createMediaStreamDestination();
+            destination.channelCount = 1;
+            source.connect(destination);
+            
+            const analyser = this.audioContext.createAnalyser();
+            analyser.fftSize = 1024;
+            source.connect(analyser);
+            const samples = new Float32Array(analyser.fftSize);
+            this.levelTimer = setInterval(() => {
+                analyser.getFloatTimeDomainData(samples);
+                for (const sample of samples) {
+                    this.peakLevel = Math.max(this.peakLevel, Math.abs(sample));
+                }
+            }, 100);
+            
+            this.speechSource = source;
+            this.startLiveTranscription();
+            return destination.stream;
+        } catch (error) {
+            console.warn('Could not resample microphone input, recording at device rate:', error);
+            this.releaseSpeechStream();
+            this.peakLevel = 1;
+            return stream;
+        }
+    }
+    
+    releaseSpeechStream() {
+        clearInterval(this.levelTimer);
+        this.levelTimer = null;
+        if (this.pcmNode) {
+            this.pcmNode.port.onmessage = null;
+            this.pcmNode.disconnect();
+            this.pcmNode = null;
+        }
+        this.speechSource = null;
+        if (this.audioContext) {
+            this.audioContext.close();
+            this.audioContext = null;
+        }
+    }
+    
+    async startLiveTranscription() {
+        // Stream PCM to the server while the student talks so partial text
+        // appears live and the final transcript is ready almost at once.
+        // Any failure leaves the recording to the upload path.
+        if (!window.WebSocket || !window.AudioWorkletNode) {
+            return;
+        }
+        
+        const context = this.audioContext;
+        try {
+            await context.audioWorklet.addModule('/static/js/pcm-recorder-worklet.js');
+        } catch (error) {
+            console.warn('Live transcription unavailable:', error);
+            return;
+        }
+        if (context !== this.audioContext || !this.speechSource) {
+            return;
+        }
+        
+        const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const socket = new WebSocket(`${protocol}://${window.location.host}/transcribe_audio/stream`);
+        const live = { socket, onFinal: null };
+        this.liveTranscription = live;
+        
+        socket.onopen = () => {
+            if (!this.speechSource) {
+                return;
+            }
+            socket.send(JSON.stringify({ type: 'start', sample_rate: context.sampleRate }));
+            this.pcmNode = new AudioWorkletNode(context, 'pcm-recorder', { numberOfOutputs: 0 });
+            this.pcmNode.port.onmessage = (event) => {
+                if (socket.readyState === WebSocket.OPEN) {
+                    socket.send(event.data);
+                }
+            };
+            this.speechSource.connect(this.pcmNode);
+        };
+        
+        socket.onmessage = (event) => {
+            const message = JSON.parse(event.data);
+            if (message.type === 'partial' && message.text) {
+                document.getElementById('transcriptionText').textContent = message.text;
+                document.getElementById('transcriptionSection').classList.remove('hidden');
+            } else if (message.type !== 'partial' && live.onFinal) {
+                live.onFinal(message);
+            }
+        };
+        
+        socket.onclose = () => {
+            if (live.onFinal) {
+                live.onFinal({ type: 'error', error: 'connection closed' });
+            }
+        };
+    }
+    
+    finishLiveTranscription(live) {
+        // Resolves with the final live transcript, or null when the upload
+        // path should be used instead
+        if (!live || live.socket.readyState !== WebSocket.OPEN) {
+            if (live) {
+                live.socket.close();
+            }
+            return Promise.resolve(null);
+        }
+        
+        return new Promise(resolve => {
+            const timer = setTimeout(() => live.onFinal({ type: 'error', error: 'timeout' }), LIVE_FINAL_TIMEOUT_MS);
+            live.onFinal = (message) => {
+                live.onFinal = null;
+                clearTimeout(timer);
+                live.socket.close();
+                const complete = message.type === 'final' && !message.failed_segments && message.text;
+                resolve(complete ? message.text : null);
+            };
+            live.socket.send(JSON.stringify({ type: 'stop' }));
+        });
+    }
+    
     stopRecording() {
         if (this.mediaRecorder && this.isRecording) {
             this.mediaRecorder.stop();
@@ -178,25 +419,38 @@ class AILearningPlatform {
     }
     
     async processRecording() {
-        if (this.audioChunks.length === 0) {
-            this.showNotification('No audio recorded', 'error');
+        const live = this.liveTranscription;
+        this.liveTranscription = null;
+        
+        if (this.audioChunks.length === 0 || this.peakLevel < SILENCE_PEAK) {
+            if (live) {
+                live.socket.close();
+            }
+            this.showNotification(this.audioChunks.length === 0
+                ? 'No audio recorded'
+                : 'No speech detected - please check your microphone and try again', 'error');
             return;
         }
         
-        const audioBlob = new Blob(this.audioChunks, { type: 'audio/webm' });
+        const liveText = await this.finishLiveTranscription(live);
+        if (liveText) {
+            document.getElementById('transcriptionText').textContent = liveText;
+            document.getElementById('transcriptionSection').classList.remove('hidden');
+            this.showNotification('Audio transcribed successfully!', 'success');
+            return;
+        }
+        
+        const mimeType = this.mediaRecorder.mimeType || 'audio/webm';
+        const extension = mimeType.includes('ogg') ? 'ogg' : mimeType.includes('mp4') ? 'm4a' : 'webm';
+        const audioBlob = new Blob(this.audioChunks, { type: mimeType });
         
         const formData = new FormData();
-        formData.append('audio', audioBlob, 'recording.webm');
+        formData.append('audio', audioBlob, `recording.${extension}`);
         
         this.showNotification('Processing audio...', 'info');
         
         try {
-            const response = await fetch('/transcribe_audio', {
-                method: 'POST',
-                body: formData
-            });
-            
-            const data = await response.json();
+            const data = await this.transcribeWithJob(formData);
             
             if (data.success) {
                 document.getElementById('transcriptionText').textContent = data.transcription;
@@ -211,6 +465,30 @@ class AILearningPlatform {
         }
     }
     
+    async transcribeWithJob(formData) {
+        const response = await fetch('/transcribe_audio/jobs', {
+            method: 'POST',
+            body: formData
+        });
+        
+        const submitted = await response.json();
+        if (!submitted.success) {
+            throw new Error(submitted.error || 'Transcription failed');
+        }
+        
+        while (true) {
+            const poll = await fetch(`/transcribe_audio/jobs/${submitted.job_id}?wait=25`);
+            const job = await poll.json();
+            
+            if (job.status === 'completed') {
+                return job;
+            }
+            if (job.status === 'error' || !poll.ok) {
+                throw new Error(job.error || 'Transcription failed');
+            }
+        }
+    }
+    
     showTypeSection() {
         document.getElementById('typeSection').classList.remove('hidden');
         document.getElementById('typedResponse').focus();
@@ -239,28 +517,16 @@ class AILearningPlatform {
         this.setLoadingState('analyzeResponse', true, 'Analyzing...');
         
         try {
-            const response = await fetch('/analyze_response', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    response: userResponse
-                })
-            });
+            const analysis = this.supportsStreaming()
+                ? await this.streamAnalysis(userResponse)
+                : await this.fetchAnalysis(userResponse);
             
-            const data = await response.json();
+            this.displayAnalysis(analysis);
+            this.showSection('analysisSection');
+            document.getElementById('analysisSection').scrollIntoView({ behavior: 'smooth' });
             
-            if (data.success) {
-                this.displayAnalysis(data.analysis);
-                this.showSection('analysisSection');
-                document.getElementById('analysisSection').scrollIntoView({ behavior: 'smooth' });
-                
-                if (data.analysis.can_proceed) {
-                    this.showCelebration(data.analysis.grade);
-                }
-            } else {
-                throw new Error(data.error || 'Analysis failed');
+            if (analysis.can_proceed) {
+                this.showCelebration(analysis.grade);
             }
         } catch (error) {
             console.error('Analysis error:', error);
@@ -270,6 +536,115 @@ class AILearningPlatform {
         }
     }
     
+    async fetchAnalysis(userResponse) {
+        const response = await fetch('/analyze_response', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                response: userResponse
+            })
+        });
+        
+        const data = await response.json();
+        
+        if (!data.success) {
+            throw new Error(data.error || 'Analysis failed');
+        }
+        return data.analysis;
+    }
+    
+    async streamAnalysis(userResponse) {
+        const response = await fetch('/analyze_response/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                response: userResponse
+            })
+        });
+        
+        if (!response.ok || !response.body) {
+            const data = await response.json().catch(() => ({}));
+            throw new Error(data.error || 'Analysis failed');
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let result = null;
+        let shown = false;
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            const rawEvents = buffer.split('\n\n');
+            buffer = rawEvents.pop();
+            
+            for (const rawEvent of rawEvents) {
+                const event = this.parseServerSentEvent(rawEvent);
+                if (!event) continue;
+                
+                if (event.type === 'field') {
+                    if (!shown) {
+                        shown = true;
+                        this.resetAnalysisDisplay();
+                        this.showSection('analysisSection');
+                    }
+                    this.displayAnalysisField(event.data);
+                } else if (event.type === 'done') {
+                    result = event.data.analysis;
+                } else if (event.type === 'error') {
+                    throw new Error(event.data.error);
+                }
+            }
+        }
+        
+        if (!result) {
+            throw new Error('Analysis stream ended unexpectedly');
+        }
+        return result;
+    }
+    
+    resetAnalysisDisplay() {
+        document.getElementById('gradeNumber').textContent = '…';
+        document.getElementById('gradeCircle').className = 'grade-circle mb-4';
+        ['gradeExplanation', 'feedbackText', 'nextStepsText'].forEach(id => {
+            document.getElementById(id).textContent = '';
+        });
+        ['strengthsList', 'improvementsList', 'falsePointsList', 'missingPointsList'].forEach(id => {
+            document.getElementById(id).innerHTML = '';
+        });
+    }
+    
+    displayAnalysisField({ name, value, provisional }) {
+        const lists = {
+            strengths: 'strengthsList',
+            improvements: 'improvementsList',
+            false_points: 'falsePointsList',
+            missing_points: 'missingPointsList'
+        };
+        const texts = {
+            grade_explanation: 'gradeExplanation',
+            detailed_feedback: 'feedbackText',
+            next_steps: 'nextStepsText'
+        };
+        
+        if (name === 'grade') {
+            // A provisional grade is being re-checked by the full model
+            document.getElementById('gradeNumber').textContent = provisional ? `${value}/10 …` : `${value}/10`;
+            document.getElementById('gradeCircle').className = 'grade-circle mb-4 ' + this.getGradeClass(value);
+        } else if (lists[name]) {
+            this.populateList(lists[name], value);
+        } else if (texts[name]) {
+            document.getElementById(texts[name]).textContent = value;
+        }
+    }
+    
     displayAnalysis(analysis) {
         const gradeCircle = document.getElementById('gradeCircle');
         const gradeNumber = document.getElementById('gradeNumber');
@@ -0,0 +1,28 @@
+// Converts the microphone signal to 16-bit PCM and posts it to the page in
+// ~250 ms batches for the live transcription WebSocket
+class PcmRecorder extends AudioWorkletProcessor {
+    constructor() {
+        super();
+        this.batch = new Int16Array(Math.round(sampleRate / 4));
+        this.length = 0;
+    }
+
+    process(inputs) {
+        const channel = inputs[0] && inputs[0][0];
+        if (!channel) {
+            return true;
+        }
+
+        for (let i = 0; i < channel.length; i++) {
+            const sample = Math.max(-1, Math.min(1, channel[i]));
+            this.batch[this.length++] = sample < 0 ? sample * 0x8000 : sample * 0x7fff;
+            if (this.length === this.batch.length) {
+                this.port.postMessage(this.batch.buffer.slice(0));
+                this.length = 0;
+            }
+        }
+        return true;
+    }
+}
+
+registerProcessor('pcm-recorder', PcmRecorder);
@@ -1,27 +1,116 @@
-import requests
+import hashlib
 import json
-from typing import Dict, List, Optional
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Generator, Iterator, List, Optional, Tuple
 import re
 
+from utils.analysis_json import (
+    OUTPUT_FORMATS, AnalysisFormatError, AnalysisUnavailableError, StreamingAnalysisParser, format_instructions,
+    parse_analysis_json, repair_prompt, response_format, unrepairable
+)
+from utils.cache import TieredCache
+from utils.content_generator import _normalize_key_part
+from utils.key_points import rubric_lines
+from utils.llm_client import LLMStreamError, RequestPacer
+from utils.llm_router import get_llm_router
+from utils.metrics import metrics
+from utils.model_profiles import ModelProfile, get_model_profile
+from utils.pre_grader import PreGrader
+from utils.prompt_budget import (
+    CONTEXT_WINDOW, SAFETY_MARGIN, estimate_tokens, fit_lines, truncate_middle
+)
+from utils.rate_limiter import PRIORITY_BULK, PRIORITY_INTERACTIVE, RateLimitExceeded
+from utils.section_parser import SectionParser
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_SECTIONS = SectionParser({
+    'STRENGTHS': 'strengths',
+    'FALSE POINTS': 'false_points',
+    'MISSING POINTS': 'missing_points',
+    'EXAMPLES QUALITY': 'examples_quality',
+    'AREAS LACKING': 'areas_lacking',
+    'IMPROVEMENTS': 'improvements',
+    'GRADE': 'grade',
+    'GRADE EXPLANATION': 'grade_explanation',
+    'DETAILED FEEDBACK': 'detailed_feedback',
+    'NEXT STEPS': 'next_steps'
+})
+
+LIST_SECTIONS = ('strengths', 'false_points', 'missing_points', 'areas_lacking', 'improvements')
+TEXT_SECTIONS = ('examples_quality', 'grade_explanation', 'detailed_feedback', 'next_steps')
+GRADE_PATTERN = re.compile(r'(\d+)/10')
+
+ANALYSIS_KEY_POINTS_TOKENS = 600
+ANALYSIS_STRUCTURE_TOKENS = 300
+ANALYSIS_PROMPT_VERSION = 2
+
+metrics.describe('analysis_json_total', 'JSON-mode analyses by outcome: valid, repaired (fixed by one repair call) or failed')
+metrics.describe('analysis_tier_total', 'Analyses by model tier: fast (first pass accepted), escalated, full (no first pass), fast_unconfirmed (escalation failed)')
+
+def create_analysis_cache() -> TieredCache:
+    """
+    Build the analysis cache from ANALYSIS_CACHE_* environment variables
+    """
+    return TieredCache(
+        max_entries=int(os.getenv('ANALYSIS_CACHE_SIZE', '1024')),
+        ttl=int(os.getenv('ANALYSIS_CACHE_TTL', '3600')),
+        disk_path=os.getenv('ANALYSIS_CACHE_PATH') or None
+    )
+
+def normalize_answer(text: str) -> str:
+    """
+    Whitespace- and case-insensitive form of an answer that also ignores the
+    closing punctuation VoiceManager._clean_transcription adds, so a typed
+    answer and its spoken transcription hash the same
+    """
+    return _normalize_key_part(text).rstrip('.!? ')
+
+def content_fingerprint(original_content: Dict) -> str:
+    reference = original_content.get('content') or json.dumps(
+        [original_content.get('key_concepts') or original_content.get('key_points', []),
+         original_content.get('structure', [])], sort_keys=True
+    )
+    return hashlib.sha1(reference.encode('utf-8')).hexdigest()[:16]
+
 class AIAnalyzer:
-    def __init__(self, api_keys: Dict[str, str]):
+    def __init__(self, api_keys: Dict[str, str], analysis_cache: Optional[TieredCache] = None):
         self.api_keys = api_keys
-        self.groq_api_key = None
+        self.analysis_cache = analysis_cache if analysis_cache is not None else create_analysis_cache()
+        self.response_token_budget = int(os.getenv('ANALYSIS_RESPONSE_TOKENS', '3000'))
+        self.pre_grader = None
+        if os.getenv('PRE_GRADER_ENABLED', '1') != '0':
+            self.pre_grader = PreGrader(min_words=int(os.getenv('PRE_GRADER_MIN_WORDS', '15')))
         
-        if api_keys.get('GROQ_API_KEY'):
-            try:
-                self.groq_api_key = api_keys['GROQ_API_KEY']
-                self.groq_api_url = "https://api.groq.com/openai/v1/chat/completions"
-                self.groq_model = "llama3-8b-8192"
-                print("✅ Groq API configured successfully for analysis")
-            except Exception as e:
-                print(f"⚠️ Groq initialization failed: {e}")
-                self.groq_api_key = None
-        else:
-            print("⚠️ No Groq API key provided")
+        self.profile = get_model_profile('analysis')
+        self.fast_profile = None
+        if os.getenv('ANALYSIS_ESCALATION', '1') != '0':
+            self.fast_profile = get_model_profile('analysis_fast')
+        self.escalate_grades = {
+            int(grade) for grade in os.getenv('ANALYSIS_ESCALATE_GRADES', '8,9').split(',') if grade.strip()
+        }
+        self.hedge = os.getenv('LLM_HEDGE', '1') != '0'
+        self.output_format = os.getenv('ANALYSIS_FORMAT', 'json').lower()
+        if self.output_format not in OUTPUT_FORMATS:
+            logger.warning(f"⚠️ Unknown ANALYSIS_FORMAT {self.output_format!r} - using json")
+            self.output_format = 'json'
+        self.repair_profile = get_model_profile('analysis_repair')
+        self.llm_client = None
+        self.llm_available = False
         
-        if not self.groq_api_key:
-            print("⚠️ No AI analysis API available")
+        try:
+            self.llm_client = get_llm_router(api_keys)
+            self.llm_available = bool(self.llm_client.providers)
+        except Exception as e:
+            logger.warning(f"⚠️ LLM provider initialization failed: {e}")
+        
+        if self.llm_available:
+            logger.info(f"✅ LLM providers configured for analysis: {', '.join(self.llm_client.names)}")
+        else:
+            logger.warning("⚠️ No AI analysis API available")
 
     def analyze_user_response(self, user_response: str, original_content: Dict, 
                             academic_level: str, subject: str, topic: str) -> Dict:
@@ -29,41 +118,353 @@ class AIAnalyzer:
         Analyze user's response as a globally renowned educator
         """
         try:
+            pre_graded, notes = self._pre_grade(user_response, original_content, topic)
+            if pre_graded:
+                return pre_graded
+            
             analysis_prompt = self._create_analysis_prompt(
                 user_response, original_content, academic_level, subject, topic
-            )
-            
-            analysis_text = self._get_ai_response(analysis_prompt)
-            parsed_analysis = self._parse_analysis(analysis_text)
+            ) + notes
             
-            return {
-                'strengths': parsed_analysis['strengths'],
-                'false_points': parsed_analysis['false_points'],
-                'missing_points': parsed_analysis['missing_points'],
-                'examples_quality': parsed_analysis['examples_quality'],
-                'areas_lacking': parsed_analysis['areas_lacking'],
-                'improvements': parsed_analysis['improvements'],
-                'grade': parsed_analysis['grade'],
-                'grade_explanation': parsed_analysis['grade_explanation'],
-                'can_proceed': parsed_analysis['grade'] >= 9,
-                'celebration_worthy': parsed_analysis['grade'] >= 9,
-                'detailed_feedback': parsed_analysis['detailed_feedback'],
-                'next_steps': parsed_analysis['next_steps']
-            }
+            cache_key = self._analysis_cache_key(user_response, original_content, academic_level)
+            return self._get_cached_analysis(cache_key, analysis_prompt)
             
         except Exception as e:
-            print(f"❌ Analysis error: {e}")
+            logger.error(f"❌ Analysis error: {e}")
             raise
 
+    def stream_user_response(self, user_response: str, original_content: Dict,
+                             academic_level: str, subject: str, topic: str) -> Iterator[Dict]:
+        """
+        Analyze a response as a stream of events: 'field' for each analysis
+        field as soon as the JSON output completes it (strengths and the grade
+        come first) and a final 'done' carrying the same dict as
+        analyze_user_response. A first-pass grade that the full model will
+        re-check is marked provisional. In markdown mode only 'done' is sent.
+        """
+        pre_graded, notes = self._pre_grade(user_response, original_content, topic)
+        if pre_graded:
+            yield {'event': 'done', 'data': pre_graded}
+            return
+        
+        analysis_prompt = self._create_analysis_prompt(
+            user_response, original_content, academic_level, subject, topic
+        ) + notes
+        cache_key = self._analysis_cache_key(user_response, original_content, academic_level)
+        
+        cached = self.analysis_cache.get(cache_key) if self.llm_available else None
+        if cached is not None or not self.llm_available or self.output_format == 'markdown':
+            yield {'event': 'done', 'data': self._get_cached_analysis(cache_key, analysis_prompt)}
+            return
+        
+        analysis = None
+        first_pass = None
+        if self.fast_profile is not None:
+            try:
+                first_pass = self._first_pass(
+                    (yield from self._stream_analysis_text(analysis_prompt, self.fast_profile, self.escalate_grades))
+                )
+            except AnalysisFormatError:
+                pass
+            if first_pass is not None and not first_pass[1]:
+                metrics.inc('analysis_tier_total', {'tier': 'fast'})
+                analysis = first_pass[0]
+        if analysis is None:
+            try:
+                analysis_text = yield from self._stream_analysis_text(analysis_prompt, self.profile)
+            except AnalysisFormatError:
+                if first_pass is None:
+                    raise
+                analysis_text = None
+            analysis = self._full_pass(analysis_text, first_pass)
+        
+        self.analysis_cache.set(cache_key, analysis)
+        yield {'event': 'done', 'data': dict(analysis)}
+
+    def _stream_analysis_text(self, prompt: str, profile: ModelProfile,
+                              provisional_grades=frozenset()) -> Generator[Dict, None, Optional[str]]:
+        """
+        Stream one JSON-mode analysis call, yielding a 'field' event per
+        completed field, and return its text checked and repaired as
+        _get_analysis_text does. A stream that breaks off is not repaired:
+        the call is made again without streaming, so the router can fail over.
+        """
+        parser = StreamingAnalysisParser()
+        try:
+            for delta in self.llm_client.stream_chat(
+                [{"role": "user", "content": prompt}],
+                operation=profile.name,
+                priority=PRIORITY_INTERACTIVE,
+                response_format=response_format(self.output_format),
+                **profile.chat_options(prompt)
+            ):
+                for name, value in parser.feed(delta):
+                    field = {'name': name, 'value': value}
+                    if name == 'grade':
+                        field['provisional'] = value in provisional_grades
+                    yield {'event': 'field', 'data': field}
+        except LLMStreamError as e:
+            logger.warning(f"⚠️ LLM stream interrupted: {e} - retrying without streaming")
+            return self._get_analysis_text(prompt, PRIORITY_INTERACTIVE, profile)
+        
+        analysis_text = parser.text or None
+        error = self._format_error(analysis_text)
+        if error is None:
+            return analysis_text
+        return self._repair(analysis_text, error, PRIORITY_INTERACTIVE)
+
+    def analyze_many(self, user_responses: List[str], original_content: Dict, academic_level: str,
+                     subject: str, topic: str, max_workers: int = 8,
+                     max_per_minute: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Grade a batch of responses against one shared content reference,
+        yielding {'index', 'analysis', 'error', 'latency'} as each finishes
+        """
+        prefix, suffix = self._create_analysis_prompt_parts(original_content, academic_level, subject, topic)
+        pacer = RequestPacer(max_per_minute)
+        
+        def grade(index: int, user_response: str) -> Dict:
+            pacer.wait()
+            start = time.perf_counter()
+            try:
+                analysis, notes = self._pre_grade(user_response, original_content, topic)
+                if analysis is None:
+                    analysis = self._get_cached_analysis(
+                        self._analysis_cache_key(user_response, original_content, academic_level),
+                        prefix + self._fit_response(user_response, prefix, suffix) + suffix + notes,
+                        priority=PRIORITY_BULK
+                    )
+                error = None
+            except Exception as e:
+                logger.error(f"❌ Batch analysis error for item {index}: {e}")
+                analysis = None
+                error = str(e)
+            return {
+                'index': index,
+                'analysis': analysis,
+                'error': error,
+                'latency': round(time.perf_counter() - start, 3)
+            }
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analyze') as pool:
+            futures = [pool.submit(grade, index, response) for index, response in enumerate(user_responses)]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _pre_grade(self, user_response: str, original_content: Dict, topic: str) -> Tuple[Optional[Dict], str]:
+        """
+        Run the local pre-grader; returns (analysis, '') for a decisive verdict
+        or (None, prompt notes) when the LLM should grade the answer
+        """
+        if self.pre_grader is None:
+            return None, ''
+        
+        findings = self.pre_grader.assess(user_response, original_content)
+        if findings['verdict'] == 'borderline':
+            return None, self.pre_grader.prompt_notes(findings)
+        
+        logger.info(f"⚡ Pre-graded as {findings['verdict']} - skipping LLM analysis")
+        analysis = self._format_analysis(self.pre_grader.build_analysis(findings, topic))
+        analysis['pre_graded'] = findings['verdict']
+        return analysis, ''
+
+    def _analysis_cache_key(self, user_response: str, original_content: Dict, academic_level: str) -> str:
+        answer_hash = hashlib.sha1(normalize_answer(user_response).encode('utf-8')).hexdigest()
+        return '|'.join([
+            content_fingerprint(original_content),
+            answer_hash,
+            _normalize_key_part(academic_level),
+            self._model_key(),
+            self.output_format,
+            f"v{ANALYSIS_PROMPT_VERSION}"
+        ])
+
+    def _model_key(self) -> str:
+        if self.fast_profile is None:
+            return self.profile.model
+        grades = ','.join(str(grade) for grade in sorted(self.escalate_grades))
+        return f"{self.fast_profile.model}>{self.profile.model}@{grades}"
+
+    def _get_cached_analysis(self, cache_key: str, prompt: str, priority: int = PRIORITY_INTERACTIVE) -> Dict:
+        """
+        Serve an analysis from cache, collapsing concurrent identical
+        submissions into one LLM call. Without an API key the result is the
+        mock analysis, flagged as such and never cached.
+        """
+        if not self.llm_available:
+            return self._mock_analysis()
+        return dict(self.analysis_cache.get_or_compute(cache_key, lambda: self._get_groq_analysis(prompt, priority)))
+
+    def _mock_analysis(self) -> Dict:
+        analysis = self._format_analysis(self._parse_analysis(self._generate_mock_analysis()))
+        analysis['mock'] = True
+        return analysis
+
+    def _get_groq_analysis(self, prompt: str, priority: int = PRIORITY_INTERACTIVE) -> Dict:
+        """
+        Grade with the fast profile first and pay for the full analysis
+        profile only when that grade is borderline for the pass mark
+        """
+        first_pass = None
+        if self.fast_profile is not None:
+            try:
+                first_pass = self._first_pass(self._get_analysis_text(prompt, priority, self.fast_profile))
+            except AnalysisFormatError:
+                pass
+            if first_pass is not None and not first_pass[1]:
+                metrics.inc('analysis_tier_total', {'tier': 'fast'})
+                return first_pass[0]
+        try:
+            analysis_text = self._get_analysis_text(prompt, priority, self.profile)
+        except AnalysisFormatError:
+            if first_pass is None:
+                raise
+            analysis_text = None
+        return self._full_pass(analysis_text, first_pass)
+
+    def _get_analysis_text(self, prompt: str, priority: int, profile: ModelProfile) -> Optional[str]:
+        """
+        One analysis call in the configured format. A malformed JSON analysis
+        gets one repair call on the cheap repair profile; AnalysisFormatError
+        is raised if that does not fix it.
+        """
+        analysis_text = self._get_groq_response(prompt, priority, profile)
+        error = self._format_error(analysis_text)
+        if error is None:
+            return analysis_text
+        return self._repair(analysis_text, error, priority)
+
+    def _repair(self, analysis_text: str, error: str, priority: int) -> str:
+        """
+        Rewrite a malformed analysis as valid JSON with one repair call. Cut
+        off and ungraded analyses are not repaired: the AnalysisFormatError
+        sends a first pass to the full profile and fails a full pass.
+        """
+        reason = unrepairable(analysis_text)
+        if reason is None:
+            repaired_text = self._get_groq_response(repair_prompt(analysis_text, error), priority,
+                                                    self.repair_profile) or ''
+            try:
+                parse_analysis_json(repaired_text)
+            except AnalysisFormatError as e:
+                reason = unrepairable(repaired_text) or f"was malformed and could not be repaired: {e}"
+            else:
+                metrics.inc('analysis_json_total', {'outcome': 'repaired'})
+                return repaired_text
+        metrics.inc('analysis_json_total', {'outcome': 'failed'})
+        raise AnalysisFormatError(f"❌ The analysis {reason}")
+
+    def _format_error(self, analysis_text: Optional[str]) -> Optional[str]:
+        """
+        Why a JSON-mode analysis does not match the schema, or None when it
+        does (or there is no text, or the format is markdown)
+        """
+        if not analysis_text or self.output_format == 'markdown':
+            return None
+        try:
+            parse_analysis_json(analysis_text)
+        except AnalysisFormatError as e:
+            logger.warning(f"⚠️ Malformed JSON analysis: {e}")
+            return str(e)
+        metrics.inc('analysis_json_total', {'outcome': 'valid'})
+        return None
+
+    def _parse_response(self, analysis_text: str) -> Dict:
+        if self.output_format == 'markdown':
+            return self._parse_analysis(analysis_text)
+        return parse_analysis_json(analysis_text)
+
+    def _first_pass(self, analysis_text: Optional[str]) -> Optional[Tuple[Dict, bool]]:
+        """
+        Parse a first-pass analysis and decide whether it needs escalating:
+        its grade is in ANALYSIS_ESCALATE_GRADES, or it has no grade at all
+        """
+        if not analysis_text:
+            return None
+        analysis = self._format_analysis(self._parse_response(analysis_text))
+        borderline = analysis['grade'] in self.escalate_grades or (
+            self.output_format == 'markdown' and not GRADE_PATTERN.search(analysis_text)
+        )
+        return analysis, borderline
+
+    def _full_pass(self, analysis_text: Optional[str], first_pass: Optional[Tuple[Dict, bool]]) -> Dict:
+        if not analysis_text:
+            if first_pass is None:
+                raise AnalysisUnavailableError("❌ The analysis service did not respond - no grade was given")
+            metrics.inc('analysis_tier_total', {'tier': 'fast_unconfirmed'})
+            return first_pass[0]
+        metrics.inc('analysis_tier_total', {'tier': 'escalated' if first_pass else 'full'})
+        return self._format_analysis(self._parse_response(analysis_text))
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        return self.analysis_cache.get_stats()
+
+    def get_pre_grader_stats(self) -> Dict[str, int]:
+        return self.pre_grader.get_stats() if self.pre_grader else {}
+
+    def _format_analysis(self, parsed_analysis: Dict) -> Dict:
+        """
+        Shape parsed analysis sections into the response returned to the client
+        """
+        return {
+            'strengths': parsed_analysis['strengths'],
+            'false_points': parsed_analysis['false_points'],
+            'missing_points': parsed_analysis['missing_points'],
+            'examples_quality': parsed_analysis['examples_quality'],
+            'areas_lacking': parsed_analysis['areas_lacking'],
+            'improvements': parsed_analysis['improvements'],
+            'grade': parsed_analysis['grade'],
+            'grade_explanation': parsed_analysis['grade_explanation'],
+            'can_proceed': parsed_analysis['grade'] >= 9,
+            'celebration_worthy': parsed_analysis['grade'] >= 9,
+            'detailed_feedback': parsed_analysis['detailed_feedback'],
+            'next_steps': parsed_analysis['next_steps']
+        }
+
     def _create_analysis_prompt(self, user_response: str, original_content: Dict, 
                               academic_level: str, subject: str, topic: str) -> str:
         """
         Create detailed analysis prompt
         """
-        key_points = original_content.get('key_points', [])
+        prefix, suffix = self._create_analysis_prompt_parts(original_content, academic_level, subject, topic)
+        return prefix + self._fit_response(user_response, prefix, suffix) + suffix
+
+    def _completion_reserve(self) -> int:
+        profiles = [self.profile] + ([self.fast_profile] if self.fast_profile else [])
+        return max(profile.max_tokens for profile in profiles)
+
+    def _fit_response(self, user_response: str, prefix: str, suffix: str) -> str:
+        """
+        Trim the student's answer so the whole prompt plus the analysis
+        completion fits the model's context window
+        """
+        budget = min(
+            self.response_token_budget,
+            CONTEXT_WINDOW - self._completion_reserve() - SAFETY_MARGIN - estimate_tokens(prefix + suffix)
+        )
+        fitted = truncate_middle(user_response, budget)
+        if fitted != user_response:
+            logger.info(f"✂️ Response trimmed from ~{estimate_tokens(user_response)} to ~{estimate_tokens(fitted)} tokens")
+        return fitted
+
+    def _create_analysis_prompt_parts(self, original_content: Dict, academic_level: str,
+                                      subject: str, topic: str) -> Tuple[str, str]:
+        """
+        Build the response-independent text around the student's answer, so a
+        batch sharing one content reference only renders it once
+        """
+        key_concepts = original_content.get('key_concepts')
+        if key_concepts:
+            rubric = rubric_lines(key_concepts)
+        else:
+            rubric = [f"• {point}" for point in original_content.get('key_points', [])[:15]]
         content_structure = original_content.get('structure', [])
         
-        return f"""
+        prefix = f"""
 You are a globally renowned educator with decades of experience teaching diverse students across different fields and personalities. You have taught at prestigious institutions worldwide and are known for your insightful, constructive, detailed, actionable and encouraging feedback.
 
 STUDENT DETAILS:
@@ -71,16 +472,34 @@ STUDENT DETAILS:
 - Subject: {subject}
 - Topic: {topic}
 
-ORIGINAL LEARNING CONTENT KEY POINTS:
-{chr(10).join([f"• {point}" for point in key_points[:15]])}
+KEY CONCEPTS FROM THE LESSON (most important first):
+{chr(10).join(fit_lines(rubric, ANALYSIS_KEY_POINTS_TOKENS))}
 
 CONTENT STRUCTURE COVERED:
-{chr(10).join([f"• {section.get('title', '')}" for section in content_structure])}
+{chr(10).join(fit_lines([f"• {section.get('title', '')}" for section in content_structure], ANALYSIS_STRUCTURE_TOKENS))}
 
 STUDENT'S RESPONSE:
-"{user_response}"
+\""""
+        
+        suffix = f"""\"
+
+{self._format_instructions()}
+
+Remember to:
+- Be encouraging and supportive while maintaining academic rigor
+- Adapt your language to the {academic_level} level
+- Consider diverse learning styles and personalities
+- Provide specific, actionable feedback
+- Balance criticism with encouragement
+- Recognize effort and improvement potential
+"""
+        
+        return prefix, suffix
 
-As a world-class educator, provide a comprehensive analysis following this EXACT format:
+    def _format_instructions(self) -> str:
+        if self.output_format != 'markdown':
+            return format_instructions()
+        return """As a world-class educator, provide a comprehensive analysis following this EXACT format:
 
 ## STRENGTHS
 [List 3-5 specific strengths in the student's response, being encouraging but brutally honest]
@@ -116,56 +535,26 @@ Grade: X/10]
 [Provide encouraging, constructive feedback that acknowledges the student's effort while guiding improvement]
 
 ## NEXT STEPS
-[Suggest specific next steps - if grade is 9-10, encourage moving to next topic; if lower, suggest focused study areas]
-
-Remember to:
-- Be encouraging and supportive while maintaining academic rigor
-- Adapt your language to the {academic_level} level
-- Consider diverse learning styles and personalities
-- Provide specific, actionable feedback
-- Balance criticism with encouragement
-- Recognize effort and improvement potential
-"""
+[Suggest specific next steps - if grade is 9-10, encourage moving to next topic; if lower, suggest focused study areas]"""
 
-    def _get_groq_response(self, prompt: str) -> str:
+    def _get_groq_response(self, prompt: str, priority: int = PRIORITY_INTERACTIVE,
+                           profile: Optional[ModelProfile] = None) -> str:
+        profile = profile or self.profile
         try:
-            headers = {
-                "Authorization": f"Bearer {self.groq_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": self.groq_model,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.8,
-                "max_tokens": 2000
-            }
-            
-            response = requests.post(self.groq_api_url, headers=headers, json=payload)
-            
-            if response.status_code == 200:
-                return response.json()["choices"][0]["message"]["content"]
-            else:
-                print(f"⚠️ Groq API error: {response.status_code} - {response.text}")
-                return None
-                
+            return self.llm_client.chat(
+                [{"role": "user", "content": prompt}],
+                operation=profile.name,
+                priority=priority,
+                hedge=self.hedge and priority == PRIORITY_INTERACTIVE,
+                response_format=response_format(self.output_format),
+                **profile.chat_options(prompt)
+            )
+        except RateLimitExceeded:
+            raise
         except Exception as e:
-            print(f"⚠️ Groq API error: {e}")
+            logger.warning(f"⚠️ LLM API error: {e}")
             return None
-    
-    def _get_ai_response(self, prompt: str) -> str:
-        try:
-            if self.groq_api_key:
-                groq_response = self._get_groq_response(prompt)
-                if groq_response:
-                    return groq_response
-            
-            return self._generate_mock_analysis()
-                
-        except Exception as e:
-            print(f"⚠️ AI API Error: {e}")
-            return self._generate_mock_analysis()
-    
+
     def _generate_mock_analysis(self) -> str:
         return """
 ## STRENGTHS
@@ -225,47 +614,22 @@ Configure your API keys and try again to receive detailed analysis and guidance
             'next_steps': ''
         }
         
-        current_section = None
-        lines = analysis_text.split('\n')
+        raw_sections = ANALYSIS_SECTIONS.split(analysis_text)
         
-        for line in lines:
-            line = line.strip()
-            
-            if '## STRENGTHS' in line:
-                current_section = 'strengths'
-            elif '## FALSE POINTS' in line:
-                current_section = 'false_points'
-            elif '## MISSING POINTS' in line:
-                current_section = 'missing_points'
-            elif '## EXAMPLES QUALITY' in line:
-                current_section = 'examples_quality'
-            elif '## AREAS LACKING' in line:
-                current_section = 'areas_lacking'
-            elif '## IMPROVEMENTS' in line:
-                current_section = 'improvements'
-            elif '## GRADE' in line:
-                current_section = 'grade'
-            elif '## GRADE EXPLANATION' in line:
-                current_section = 'grade_explanation'
-            elif '## DETAILED FEEDBACK' in line:
-                current_section = 'detailed_feedback'
-            elif '## NEXT STEPS' in line:
-                current_section = 'next_steps'
-            elif line and current_section:
-                if current_section == 'grade':
-                    grade_match = re.search(r'(\d+)/10', line)
-                    if grade_match:
-                        sections['grade'] = int(grade_match.group(1))
-                elif current_section in ['strengths', 'false_points', 'missing_points', 'areas_lacking', 'improvements']:
-                    if line.startswith('•') or line.startswith('-') or line.startswith('*'):
-                        sections[current_section].append(line.lstrip('•-* '))
-                    elif line and not line.startswith('#'):
-                        sections[current_section].append(line)
-                else:
-                    if sections[current_section]:
-                        sections[current_section] += ' ' + line
-                    else:
-                        sections[current_section] = line
+        for key in LIST_SECTIONS:
+            sections[key] = [
+                line.lstrip('•-* ') if line[0] in '•-*' else line
+                for line in raw_sections[key]
+                if line[0] in '•-*' or not line.startswith('#')
+            ]
+        
+        for key in TEXT_SECTIONS:
+            sections[key] = ' '.join(raw_sections[key])
+        
+        for line in raw_sections['grade']:
+            grade_match = GRADE_PATTERN.search(line)
+            if grade_match:
+                sections['grade'] = int(grade_match.group(1))
         
         # Ensure we have fallback values
         if not sections['strengths']:
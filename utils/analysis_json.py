@@ -0,0 +1,228 @@
+import json
+from typing import Dict, List, Optional, Tuple
+
+# Fields of a JSON-mode analysis in the order the model is asked to write
+# them: strengths and the grade come first so a streaming client can show
+# them while the longer feedback is still being generated.
+ANALYSIS_FIELDS = (
+    ('strengths', 'list', "3-5 specific strengths in the student's response, encouraging but brutally honest"),
+    ('grade', 'grade', "integer from 1 to 10 weighting accuracy of information 30%, completeness of coverage 25%, "
+                       "understanding depth 20%, use of examples 15% and clarity of explanation 10%"),
+    ('grade_explanation', 'text', "2-3 sentences on why you gave this specific grade"),
+    ('false_points', 'list', "incorrect information or misconceptions, each with why it is wrong and the correct information"),
+    ('missing_points', 'list', "important concepts from the lesson the student did not mention or address adequately"),
+    ('examples_quality', 'text', "the quality, relevance and accuracy of any examples the student gave"),
+    ('areas_lacking', 'list', "areas where the student's understanding seems shallow or incomplete"),
+    ('improvements', 'list', "specific, actionable suggestions for improvement"),
+    ('detailed_feedback', 'text', "encouraging, constructive feedback that acknowledges the effort while guiding improvement"),
+    ('next_steps', 'text', "specific next steps; if the grade is 9-10 encourage moving to the next topic, otherwise "
+                           "suggest focused study areas")
+)
+
+_FIELD_KINDS = {name: kind for name, kind, _ in ANALYSIS_FIELDS}
+
+_SCHEMA_TYPES = {
+    'list': {'type': 'array', 'items': {'type': 'string'}},
+    'text': {'type': 'string'},
+    'grade': {'type': 'integer', 'minimum': 1, 'maximum': 10}
+}
+
+ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'properties': {name: dict(_SCHEMA_TYPES[kind], description=description)
+                   for name, kind, description in ANALYSIS_FIELDS},
+    'required': [name for name, _, _ in ANALYSIS_FIELDS],
+    'additionalProperties': False
+}
+
+OUTPUT_FORMATS = ('markdown', 'json', 'json_schema')
+
+
+class AnalysisFormatError(ValueError):
+    """
+    A JSON-mode analysis that is not valid JSON or does not match the schema
+    """
+
+
+class AnalysisUnavailableError(RuntimeError):
+    """
+    No model produced an analysis, so there is no grade to return
+    """
+
+
+def response_format(output_format: str) -> Optional[Dict]:
+    """
+    The OpenAI-style response_format for an ANALYSIS_FORMAT value
+    """
+    if output_format == 'json':
+        return {'type': 'json_object'}
+    if output_format == 'json_schema':
+        return {'type': 'json_schema', 'json_schema': {'name': 'analysis', 'strict': True, 'schema': ANALYSIS_SCHEMA}}
+    return None
+
+
+def field_error(name: str, value) -> Optional[str]:
+    kind = _FIELD_KINDS[name]
+    if kind == 'list':
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            return f"{name} must be a list of strings"
+    elif kind == 'text':
+        if not isinstance(value, str):
+            return f"{name} must be a string"
+    elif not isinstance(value, int) or isinstance(value, bool) or not 1 <= value <= 10:
+        return f"{name} must be an integer from 1 to 10"
+    return None
+
+
+def _clean(name: str, value):
+    if _FIELD_KINDS[name] == 'list':
+        return [item.strip() for item in value if item.strip()]
+    if _FIELD_KINDS[name] == 'text':
+        return value.strip()
+    return value
+
+
+def validate_analysis(data) -> Dict:
+    """
+    Check a decoded analysis against the schema and return its fields in
+    the shape AIAnalyzer._parse_analysis produces; unknown keys are dropped
+    """
+    if not isinstance(data, dict):
+        raise AnalysisFormatError("analysis must be a JSON object")
+    problems = [f"{name} is missing" for name, _, _ in ANALYSIS_FIELDS if name not in data]
+    problems += [error for error in (field_error(name, data[name]) for name, _, _ in ANALYSIS_FIELDS if name in data)
+                 if error]
+    if problems:
+        raise AnalysisFormatError('; '.join(problems))
+    return {name: _clean(name, data[name]) for name, _, _ in ANALYSIS_FIELDS}
+
+
+def parse_analysis_json(text: str) -> Dict:
+    """
+    Decode and validate a JSON-mode analysis; text around the outermost
+    braces (such as a code fence) is ignored
+    """
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end < start:
+        raise AnalysisFormatError("no JSON object in the output")
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise AnalysisFormatError(f"invalid JSON: {e}") from e
+    return validate_analysis(data)
+
+
+def unrepairable(text: str) -> Optional[str]:
+    """
+    Why a malformed analysis is not worth a repair call, or None when it
+    may be: an output cut off before its object closed has lost feedback a
+    repair would replace with empty lists, and one without a grade has
+    nothing the repair may keep
+    """
+    start = text.find('{')
+    if start < 0:
+        return None
+    parser = StreamingAnalysisParser()
+    parser.feed(text[start:])
+    if not parser.closed:
+        return "was cut off before it finished"
+    try:
+        data = json.loads(text[start:text.rfind('}') + 1])
+    except ValueError:
+        return None
+    if isinstance(data, dict) and data.get('grade') is None:
+        return "has no grade"
+    return None
+
+
+def format_instructions() -> str:
+    """
+    The part of the analysis prompt that asks for the JSON object
+    """
+    placeholders = {'list': '["<{}>"]', 'text': '"<{}>"', 'grade': '<{}>'}
+    lines = ',\n'.join(f'  "{name}": ' + placeholders[kind].format(description)
+                       for name, kind, description in ANALYSIS_FIELDS)
+    return f"""As a world-class educator, analyze the response and reply with ONLY a JSON object with exactly these keys, in this order:
+{{
+{lines}
+}}
+Lists are arrays of strings (use [] when there is nothing to list), "grade" is a bare integer and every other value is a string."""
+
+
+def repair_prompt(analysis_text: str, error: str) -> str:
+    """
+    Ask for a malformed analysis to be rewritten as valid JSON without
+    changing its content
+    """
+    fields = ', '.join(f'"{name}" ({"integer 1-10" if kind == "grade" else "array of strings" if kind == "list" else "string"})'
+                       for name, kind, _ in ANALYSIS_FIELDS)
+    return f"""The text below was meant to be a JSON object with exactly these keys: {fields}.
+It is not valid: {error}.
+Rewrite it as that JSON object. Keep the wording, judgments and grade of the original and do not add new feedback. If a list is missing use [] and if a text is missing use "", but never invent a grade: if the text has none, set "grade" to null. Reply with ONLY the JSON object.
+
+TEXT:
+{analysis_text}"""
+
+
+class StreamingAnalysisParser:
+    """
+    Incremental parser for a streamed JSON-mode analysis. feed() takes text
+    deltas and returns the top-level fields that became complete, so a
+    client can show the strengths and grade before the rest arrives. Only
+    fields that already match the schema are returned; the full text is
+    validated once the stream ends. closed is set once the top-level object
+    has ended.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.fields: Dict = {}
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = 0
+        self.closed = False
+
+    def feed(self, delta: str) -> List[Tuple[str, object]]:
+        self.text += delta
+        completed = []
+        for index in range(self._pos, len(self.text)):
+            char = self.text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = index + 1
+            elif char in '}]':
+                if self._depth == 1:
+                    completed += self._member(index)
+                    self.closed = True
+                self._depth -= 1
+            elif char == ',' and self._depth == 1:
+                completed += self._member(index)
+                self._member_start = index + 1
+        self._pos = len(self.text)
+        return completed
+
+    def _member(self, end: int) -> List[Tuple[str, object]]:
+        raw = self.text[self._member_start:end].strip()
+        if not raw:
+            return []
+        try:
+            member = json.loads('{' + raw + '}')
+        except ValueError:
+            return []
+        name, value = next(iter(member.items()))
+        if name not in _FIELD_KINDS or name in self.fields or field_error(name, value):
+            return []
+        self.fields[name] = _clean(name, value)
+        return [(name, self.fields[name])]
@@ -1,5 +1,8 @@
+import logging
 import os
-from typing import Dict
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
 
 def get_api_keys() -> Dict[str, str]:
     """
@@ -7,12 +10,16 @@ def get_api_keys() -> Dict[str, str]:
     
     GROQ_API_KEY = "gsk_your_groq_api_key_here"
     ASSEMBLYAI_API_KEY = "your_assemblyai_api_key_here"
+    
+    Additional Groq keys for round-robin scheduling can be given as a
+    comma-separated GROQ_API_KEYS environment variable or config value.
     """
     
     api_keys = {}
     
     api_keys['GROQ_API_KEY'] = os.getenv('GROQ_API_KEY')
     api_keys['ASSEMBLYAI_API_KEY'] = os.getenv('ASSEMBLYAI_API_KEY')
+    api_keys['GROQ_API_KEYS'] = os.getenv('GROQ_API_KEYS')
     
     try:
         from utils.api_keys_config import GROQ_API_KEY, ASSEMBLYAI_API_KEY
@@ -21,13 +28,23 @@ def get_api_keys() -> Dict[str, str]:
             api_keys['GROQ_API_KEY'] = GROQ_API_KEY
         if not api_keys['ASSEMBLYAI_API_KEY']:
             api_keys['ASSEMBLYAI_API_KEY'] = ASSEMBLYAI_API_KEY
+        if not api_keys['GROQ_API_KEYS']:
+            from utils import api_keys_config
+            api_keys['GROQ_API_KEYS'] = getattr(api_keys_config, 'GROQ_API_KEYS', None)
             
     except ImportError:
-        print("⚠️  Local API keys config file not found. Using environment variables only.")
-        print("📝 For local development, create utils/api_keys_config.py")
+        logger.info("📝 Local API keys config file not found - using environment variables only "
+                    "(for local development, create utils/api_keys_config.py)")
     
     return {k: v for k, v in api_keys.items() if v}
 
+def get_groq_keys(api_keys: Dict[str, str]) -> List[str]:
+    """
+    All configured Groq keys, primary first, without duplicates
+    """
+    keys = [api_keys.get('GROQ_API_KEY')] + (api_keys.get('GROQ_API_KEYS') or '').split(',')
+    return list(dict.fromkeys(key.strip() for key in keys if key and key.strip()))
+
 def validate_api_keys(api_keys: Dict[str, str]) -> Dict[str, bool]:
     """
     Validate that required API keys are present
@@ -4,4 +4,6 @@ Copy this file to 'api_keys_config.py' and add your actual API keys
 """
 
 GROQ_API_KEY = "gsk_your-groq-api-key-here"
-ASSEMBLYAI_API_KEY = "your-assemblyai-api-key-here"
\ No newline at end of file
+ASSEMBLYAI_API_KEY = "your-assemblyai-api-key-here"
+# Optional extra Groq keys, comma-separated, scheduled round-robin
+# GROQ_API_KEYS = "gsk_second-key,gsk_third-key"
@@ -0,0 +1,232 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from utils.llm_client import (
+    GROQ_API_URL, RETRYABLE_STATUS_CODES, CircuitBreaker, LLMStreamError, backoff_delay,
+    record_usage, reserved_tokens, stream_chunk_usage
+)
+from utils.metrics import record_upstream_error, track_upstream
+from utils.rate_limiter import PRIORITY_STANDARD, RequestScheduler, get_groq_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLLMClient:
+    """
+    Non-blocking counterpart of LLMClient built on a pooled httpx.AsyncClient,
+    with the same retry, Retry-After and circuit breaker behaviour
+    """
+
+    def __init__(self, api_key: str, api_url: str = GROQ_API_URL, pool_size: int = 100,
+                 connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 retry_budget: float = 20.0, breaker: Optional[CircuitBreaker] = None,
+                 scheduler: Optional[RequestScheduler] = None, name: str = 'groq'):
+        self.api_key = api_key
+        self.name = name
+        self.api_url = api_url
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget
+        self.breaker = breaker or CircuitBreaker()
+        self.scheduler = scheduler
+
+        self.client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        return backoff_delay(attempt, retry_after, self.backoff_base, self.backoff_max)
+
+    async def _acquire(self, reserved: int, priority: int) -> str:
+        if self.scheduler is None:
+            return self.api_key
+        return await self.scheduler.acquire_async(reserved, priority)
+
+    def _settle(self, api_key: str, reserved: int, actual: int) -> None:
+        if self.scheduler is not None:
+            self.scheduler.settle(api_key, reserved, actual)
+
+    async def _send(self, payload: Dict, stream: bool = False, priority: int = PRIORITY_STANDARD,
+                    read_timeout: Optional[float] = None) -> Tuple[Optional[httpx.Response], str, int]:
+        timeout = httpx.USE_CLIENT_DEFAULT
+        if read_timeout is not None:
+            timeout = httpx.Timeout(read_timeout, connect=self.client.timeout.connect)
+        reserved = reserved_tokens(payload)
+        api_key = await self._acquire(reserved, priority)
+
+        if not self.breaker.allow_request():
+            logger.warning(f"⚠️ {self.name} circuit open - skipping upstream call")
+            self._settle(api_key, reserved, 0)
+            return None, api_key, reserved
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.retry_budget
+        response = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                try:
+                    api_key = await self._acquire(reserved, priority)
+                except Exception:
+                    # Local scheduler back-pressure says nothing about the upstream's health
+                    self.breaker.release_trial()
+                    raise
+            call = 'stream' if stream else 'chat'
+            try:
+                request = self.client.build_request("POST", self.api_url, json=payload, timeout=timeout,
+                                                    headers={"Authorization": f"Bearer {api_key}"})
+                with track_upstream(self.name, call):
+                    response = await self.client.send(request, stream=stream)
+            except httpx.HTTPError as e:
+                logger.warning(f"⚠️ {self.name} request error: {e}")
+                response = None
+            else:
+                if response.status_code != 200:
+                    record_upstream_error(self.name, call, response.status_code)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    break
+
+            if attempt == self.max_retries:
+                break
+            delay = self._retry_delay(attempt, response)
+            if response is not None and response.status_code == 429 and self.scheduler is not None:
+                self.scheduler.penalize(api_key, delay)
+            if loop.time() + delay > deadline:
+                break
+            if response is not None:
+                await response.aclose()
+            self._settle(api_key, reserved, 0)
+            await asyncio.sleep(delay)
+
+        if response is None or response.status_code in RETRYABLE_STATUS_CODES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response, api_key, reserved
+
+    async def chat(self, messages: List[Dict], model: str, temperature: float = 0.8,
+                   max_tokens: int = 2000, operation: str = 'chat',
+                   priority: int = PRIORITY_STANDARD, timeout: Optional[float] = None,
+                   response_format: Optional[Dict] = None) -> Optional[str]:
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if response_format:
+            payload["response_format"] = response_format
+
+        started = time.monotonic()
+        response, api_key, reserved = await self._send(payload, priority=priority, read_timeout=timeout)
+        used = 0
+        try:
+            if response is None:
+                record_usage(operation, messages, None, '', started, ok=False)
+                return None
+
+            if response.status_code == 200:
+                data = response.json()
+                content = data["choices"][0]["message"]["content"]
+                used = record_usage(operation, messages, data.get("usage"), content, started, ok=True)
+                return content
+
+            record_usage(operation, messages, None, '', started, ok=False)
+            logger.warning(f"⚠️ {self.name} API error: {response.status_code} - {response.text}")
+            return None
+        finally:
+            self._settle(api_key, reserved, used)
+
+    async def stream_chat(self, messages: List[Dict], model: str, temperature: float = 0.8,
+                          max_tokens: int = 2000, operation: str = 'chat',
+                          priority: int = PRIORITY_STANDARD, timeout: Optional[float] = None,
+                          response_format: Optional[Dict] = None) -> AsyncIterator[str]:
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        if response_format:
+            payload["response_format"] = response_format
+
+        started = time.monotonic()
+        response, api_key, reserved = await self._send(payload, stream=True, priority=priority,
+                                                        read_timeout=timeout)
+        completion = []
+        usage = None
+        finished = False
+        try:
+            if response is None:
+                return
+            if response.status_code != 200:
+                await response.aread()
+                logger.warning(f"⚠️ {self.name} API error: {response.status_code} - {response.text}")
+                return
+
+            async for line in response.aiter_lines():
+                line = line.strip()
+                if not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    finished = True
+                    return
+                chunk = json.loads(data)
+                usage = stream_chunk_usage(chunk) or usage
+                choices = chunk.get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    completion.append(delta)
+                    yield delta
+            raise LLMStreamError("stream ended without [DONE]")
+        except (httpx.HTTPError, ValueError) as e:
+            raise LLMStreamError(str(e)) from e
+        finally:
+            if response is not None:
+                await response.aclose()
+            used = record_usage(operation, messages, usage, ''.join(completion), started, ok=finished)
+            self._settle(api_key, reserved, used)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+_shared_clients = {}
+
+
+def get_async_llm_client(api_key: str, api_url: str = GROQ_API_URL,
+                         keys: Optional[Sequence[str]] = None) -> AsyncLLMClient:
+    """
+    Return the event-loop-wide client for this key, configured from GROQ_* env
+    vars and sharing the sync client's scheduler for `keys`
+    """
+    keys = tuple(keys or [api_key])
+    client = _shared_clients.get((keys, api_url))
+    if client is None:
+        client = AsyncLLMClient(
+            api_key,
+            api_url=api_url,
+            pool_size=int(os.getenv('GROQ_ASYNC_POOL_SIZE', '100')),
+            connect_timeout=float(os.getenv('GROQ_CONNECT_TIMEOUT', '5')),
+            read_timeout=float(os.getenv('GROQ_READ_TIMEOUT', '60')),
+            max_retries=int(os.getenv('GROQ_MAX_RETRIES', '3')),
+            scheduler=get_groq_scheduler(keys)
+        )
+        _shared_clients[(keys, api_url)] = client
+    return client
@@ -0,0 +1,525 @@
+import asyncio
+import logging
+import os
+import time
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional
+
+import httpx
+
+from utils.ai_analyzer import AIAnalyzer
+from utils.analysis_json import (
+    AnalysisFormatError, StreamingAnalysisParser, parse_analysis_json, repair_prompt, response_format, unrepairable
+)
+from utils.content_generator import ContentGenerator
+from utils.key_points import concept_names
+from utils.llm_client import LLMStreamError, RequestPacer
+from utils.llm_router import get_async_llm_router
+from utils.metrics import metrics, record_upstream_error, span, track_upstream
+from utils.model_profiles import ModelProfile
+from utils.rate_limiter import PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_STANDARD, RateLimitExceeded
+from utils.voice_manager import AUDIO_CHUNK_SIZE, VoiceManager
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncContentGenerator(ContentGenerator):
+    """
+    ContentGenerator whose upstream calls are awaited on the event loop
+    instead of blocking a worker thread. Prompting, parsing, references and
+    caching are inherited unchanged.
+    """
+
+    def __init__(self, api_keys: Dict[str, str], content_cache=None, content_library=None):
+        super().__init__(api_keys, content_cache, content_library)
+        self._in_flight = {}
+
+    def _async_client(self):
+        return get_async_llm_router(self.api_keys)
+
+    async def generate_comprehensive_content(self, academic_level: str, subject: str, topic: str) -> Dict:
+        try:
+            content_data = self._get_library_content(academic_level, subject, topic)
+            if content_data:
+                return content_data
+
+            content_prompt = self._create_content_prompt(academic_level, subject, topic)
+
+            content = await self._get_cached_content_response(content_prompt, academic_level, subject, topic)
+            key_concepts = await self._extract_key_concepts(content, topic)
+
+            return self._assemble_content(content, academic_level, subject, topic, key_concepts)
+
+        except Exception as e:
+            logger.error(f"❌ Content generation error: {e}")
+            raise
+
+    async def _get_cached_content_response(self, prompt: str, academic_level: str, subject: str, topic: str) -> str:
+        """
+        Async variant of the cached content lookup; concurrent misses for the
+        same key await one shared upstream call
+        """
+        if not self.llm_available:
+            return self._generate_mock_response(prompt)
+
+        key = self._content_cache_key(academic_level, subject, topic)
+        content = self.content_cache.get(key)
+        if content:
+            return content
+
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(self._get_groq_response(prompt))
+            self._in_flight[key] = flight
+            flight.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        content = await asyncio.shield(flight)
+        if content:
+            self.content_cache.set(key, content)
+            return content
+
+        metrics.inc('fallback_to_mock_total', {'service': 'content'})
+        return self._generate_mock_response(prompt)
+
+    async def _extract_key_concepts(self, content: str, topic: str) -> List[Dict]:
+        return await self.key_points.extract_async(content, topic,
+                                                   self._async_client() if self.llm_available else None)
+
+    async def _get_groq_response(self, prompt: str, priority: int = PRIORITY_STANDARD) -> Optional[str]:
+        try:
+            return await self._async_client().chat(
+                [{"role": "user", "content": prompt}],
+                operation='content',
+                priority=priority,
+                **self.profile.chat_options(prompt)
+            )
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ LLM API error: {e}")
+            return None
+
+    async def stream_comprehensive_content(self, academic_level: str, subject: str, topic: str) -> AsyncIterator[Dict]:
+        content_prompt = self._create_content_prompt(academic_level, subject, topic)
+        cache_key = self._content_cache_key(academic_level, subject, topic) if self.llm_available else None
+
+        chunks = []
+        structure = []
+        key_points = []
+        cacheable = False
+
+        library_content = self._get_library_content(academic_level, subject, topic)
+        cached = self.content_cache.get(cache_key) if cache_key and not library_content else None
+        if library_content:
+            source = self._single(library_content['content'])
+        elif cached:
+            source = self._single(cached)
+        elif self.llm_available:
+            source = self._async_client().stream_chat(
+                [{"role": "user", "content": content_prompt}],
+                operation='content',
+                **self.profile.chat_options(content_prompt)
+            )
+            cacheable = True
+        else:
+            source = self._single(self._generate_mock_response(content_prompt))
+
+        try:
+            async for event in self._astream_parse(source, chunks, structure, key_points):
+                yield event
+        except LLMStreamError as e:
+            logger.warning(f"⚠️ LLM stream interrupted: {e}")
+            cacheable = False
+
+        if not ''.join(chunks).strip():
+            cacheable = False
+            if self.llm_available:
+                metrics.inc('fallback_to_mock_total', {'service': 'content'})
+            async for event in self._astream_parse(self._single(self._generate_mock_response(content_prompt)),
+                                                   chunks, structure, key_points):
+                yield event
+
+        content = ''.join(chunks)
+        if cacheable:
+            self.content_cache.set(cache_key, content)
+
+        if library_content and library_content.get('key_concepts') is not None:
+            key_concepts = library_content['key_concepts']
+        else:
+            key_concepts = await self._extract_key_concepts(content, topic)
+
+        yield {
+            'event': 'done',
+            'data': {
+                'content': content,
+                'structure': structure,
+                'references': self._generate_references(academic_level, subject, topic),
+                'key_points': concept_names(key_concepts),
+                'key_concepts': key_concepts,
+                'word_count': len(content.split()),
+                'academic_level': academic_level,
+                'subject': subject,
+                'topic': topic
+            }
+        }
+
+    async def _single(self, text: str) -> AsyncIterator[str]:
+        yield text
+
+    async def _astream_parse(self, source: AsyncIterator[str], chunks: List[str], structure: List[Dict],
+                             key_points: List[str]) -> AsyncIterator[Dict]:
+        pending = ''
+        async for text in source:
+            chunks.append(text)
+            yield {'event': 'token', 'data': {'text': text}}
+
+            pending += text
+            *lines, pending = pending.split('\n')
+            for line in lines:
+                for event in self._parse_streamed_line(line, structure, key_points):
+                    yield event
+
+        if pending:
+            for event in self._parse_streamed_line(pending, structure, key_points):
+                yield event
+
+
+class AsyncAIAnalyzer(AIAnalyzer):
+    """
+    AIAnalyzer whose LLM call is awaited instead of blocking a worker thread
+    """
+
+    async def analyze_user_response(self, user_response: str, original_content: Dict,
+                                    academic_level: str, subject: str, topic: str) -> Dict:
+        try:
+            pre_graded, notes = self._pre_grade(user_response, original_content, topic)
+            if pre_graded:
+                return pre_graded
+
+            analysis_prompt = self._create_analysis_prompt(
+                user_response, original_content, academic_level, subject, topic
+            ) + notes
+
+            cache_key = self._analysis_cache_key(user_response, original_content, academic_level)
+            return await self._get_cached_analysis(cache_key, analysis_prompt)
+
+        except Exception as e:
+            logger.error(f"❌ Analysis error: {e}")
+            raise
+
+    def __init__(self, api_keys: Dict[str, str], analysis_cache=None):
+        super().__init__(api_keys, analysis_cache)
+        self._in_flight = {}
+
+    async def analyze_many(self, user_responses: List[str], original_content: Dict, academic_level: str,
+                           subject: str, topic: str, max_workers: int = 8,
+                           max_per_minute: Optional[int] = None) -> AsyncIterator[Dict]:
+        """
+        Async variant of the batch grader: at most max_workers analyses run at
+        once and {'index', 'analysis', 'error', 'latency'} is yielded as each finishes
+        """
+        prefix, suffix = self._create_analysis_prompt_parts(original_content, academic_level, subject, topic)
+        pacer = RequestPacer(max_per_minute)
+        slots = asyncio.Semaphore(max_workers)
+
+        async def grade(index: int, user_response: str) -> Dict:
+            async with slots:
+                await pacer.wait_async()
+                start = time.perf_counter()
+                try:
+                    analysis, notes = self._pre_grade(user_response, original_content, topic)
+                    if analysis is None:
+                        analysis = await self._get_cached_analysis(
+                            self._analysis_cache_key(user_response, original_content, academic_level),
+                            prefix + self._fit_response(user_response, prefix, suffix) + suffix + notes,
+                            priority=PRIORITY_BULK
+                        )
+                    error = None
+                except Exception as e:
+                    logger.error(f"❌ Batch analysis error for item {index}: {e}")
+                    analysis = None
+                    error = str(e)
+                return {
+                    'index': index,
+                    'analysis': analysis,
+                    'error': error,
+                    'latency': round(time.perf_counter() - start, 3)
+                }
+
+        tasks = [asyncio.ensure_future(grade(index, response)) for index, response in enumerate(user_responses)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _get_cached_analysis(self, cache_key: str, prompt: str, priority: int = PRIORITY_INTERACTIVE) -> Dict:
+        """
+        Async variant of the cached analysis lookup; a double-submit awaits
+        the first submission's upstream call
+        """
+        if not self.llm_available:
+            return self._mock_analysis()
+        analysis = self.analysis_cache.get(cache_key)
+        if analysis is None:
+            flight = self._in_flight.get(cache_key)
+            if flight is None:
+                flight = asyncio.ensure_future(self._get_groq_analysis(prompt, priority))
+                self._in_flight[cache_key] = flight
+                flight.add_done_callback(lambda _: self._in_flight.pop(cache_key, None))
+
+            analysis = await asyncio.shield(flight)
+            self.analysis_cache.set(cache_key, analysis)
+        return dict(analysis)
+
+    async def stream_user_response(self, user_response: str, original_content: Dict,
+                                   academic_level: str, subject: str, topic: str) -> AsyncIterator[Dict]:
+        pre_graded, notes = self._pre_grade(user_response, original_content, topic)
+        if pre_graded:
+            yield {'event': 'done', 'data': pre_graded}
+            return
+
+        analysis_prompt = self._create_analysis_prompt(
+            user_response, original_content, academic_level, subject, topic
+        ) + notes
+        cache_key = self._analysis_cache_key(user_response, original_content, academic_level)
+
+        cached = self.analysis_cache.get(cache_key) if self.llm_available else None
+        if cached is not None or not self.llm_available or self.output_format == 'markdown':
+            yield {'event': 'done', 'data': await self._get_cached_analysis(cache_key, analysis_prompt)}
+            return
+
+        analysis = None
+        first_pass = None
+        if self.fast_profile is not None:
+            result = {}
+            try:
+                async for event in self._astream_analysis_text(analysis_prompt, self.fast_profile,
+                                                               self.escalate_grades, result):
+                    yield event
+                first_pass = self._first_pass(result['text'])
+            except AnalysisFormatError:
+                pass
+            if first_pass is not None and not first_pass[1]:
+                metrics.inc('analysis_tier_total', {'tier': 'fast'})
+                analysis = first_pass[0]
+        if analysis is None:
+            result = {}
+            try:
+                async for event in self._astream_analysis_text(analysis_prompt, self.profile, frozenset(), result):
+                    yield event
+                analysis_text = result['text']
+            except AnalysisFormatError:
+                if first_pass is None:
+                    raise
+                analysis_text = None
+            analysis = self._full_pass(analysis_text, first_pass)
+
+        self.analysis_cache.set(cache_key, analysis)
+        yield {'event': 'done', 'data': dict(analysis)}
+
+    async def _astream_analysis_text(self, prompt: str, profile: ModelProfile, provisional_grades,
+                                     result: Dict) -> AsyncIterator[Dict]:
+        """
+        Async _stream_analysis_text; an async generator cannot return a
+        value, so the checked text is stored in result['text']
+        """
+        parser = StreamingAnalysisParser()
+        try:
+            async for delta in get_async_llm_router(self.api_keys).stream_chat(
+                [{"role": "user", "content": prompt}],
+                operation=profile.name,
+                priority=PRIORITY_INTERACTIVE,
+                response_format=response_format(self.output_format),
+                **profile.chat_options(prompt)
+            ):
+                for name, value in parser.feed(delta):
+                    field = {'name': name, 'value': value}
+                    if name == 'grade':
+                        field['provisional'] = value in provisional_grades
+                    yield {'event': 'field', 'data': field}
+        except LLMStreamError as e:
+            logger.warning(f"⚠️ LLM stream interrupted: {e} - retrying without streaming")
+            result['text'] = await self._get_analysis_text(prompt, PRIORITY_INTERACTIVE, profile)
+            return
+
+        analysis_text = parser.text or None
+        error = self._format_error(analysis_text)
+        if error is not None:
+            analysis_text = await self._repair(analysis_text, error, PRIORITY_INTERACTIVE)
+        result['text'] = analysis_text
+
+    async def _get_groq_analysis(self, prompt: str, priority: int = PRIORITY_INTERACTIVE) -> Dict:
+        first_pass = None
+        if self.fast_profile is not None:
+            try:
+                first_pass = self._first_pass(await self._get_analysis_text(prompt, priority, self.fast_profile))
+            except AnalysisFormatError:
+                pass
+            if first_pass is not None and not first_pass[1]:
+                metrics.inc('analysis_tier_total', {'tier': 'fast'})
+                return first_pass[0]
+        try:
+            analysis_text = await self._get_analysis_text(prompt, priority, self.profile)
+        except AnalysisFormatError:
+            if first_pass is None:
+                raise
+            analysis_text = None
+        return self._full_pass(analysis_text, first_pass)
+
+    async def _get_analysis_text(self, prompt: str, priority: int, profile: ModelProfile) -> Optional[str]:
+        analysis_text = await self._get_groq_response(prompt, priority, profile)
+        error = self._format_error(analysis_text)
+        if error is None:
+            return analysis_text
+        return await self._repair(analysis_text, error, priority)
+
+    async def _repair(self, analysis_text: str, error: str, priority: int) -> str:
+        reason = unrepairable(analysis_text)
+        if reason is None:
+            repaired_text = await self._get_groq_response(repair_prompt(analysis_text, error), priority,
+                                                          self.repair_profile) or ''
+            try:
+                parse_analysis_json(repaired_text)
+            except AnalysisFormatError as e:
+                reason = unrepairable(repaired_text) or f"was malformed and could not be repaired: {e}"
+            else:
+                metrics.inc('analysis_json_total', {'outcome': 'repaired'})
+                return repaired_text
+        metrics.inc('analysis_json_total', {'outcome': 'failed'})
+        raise AnalysisFormatError(f"❌ The analysis {reason}")
+
+    async def _get_groq_response(self, prompt: str, priority: int = PRIORITY_INTERACTIVE,
+                                 profile: Optional[ModelProfile] = None) -> Optional[str]:
+        profile = profile or self.profile
+        try:
+            return await get_async_llm_router(self.api_keys).chat(
+                [{"role": "user", "content": prompt}],
+                operation=profile.name,
+                priority=priority,
+                hedge=self.hedge and priority == PRIORITY_INTERACTIVE,
+                response_format=response_format(self.output_format),
+                **profile.chat_options(prompt)
+            )
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ LLM API error: {e}")
+            return None
+
+
+class AsyncVoiceManager(VoiceManager):
+    """
+    VoiceManager that talks to the AssemblyAI REST API with httpx and waits
+    with asyncio.sleep, so polling never holds an OS thread
+    """
+
+    def __init__(self, api_keys: Dict[str, str]):
+        super().__init__(api_keys)
+        self.client = httpx.AsyncClient(
+            base_url=self.assemblyai_base_url,
+            headers={'authorization': self.api_keys.get('ASSEMBLYAI_API_KEY', '')},
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_connections=int(os.getenv('ASSEMBLYAI_ASYNC_POOL_SIZE', '100')))
+        )
+
+    async def transcribe_stream(self, audio: BinaryIO) -> str:
+        result = "❌ No speech-to-text backend accepted this recording. Please type your response instead."
+        for name in self.stt_backends:
+            audio.seek(0)
+            if name == 'local':
+                if not self.local_stt_available or not self.local_stt.accepts(audio):
+                    continue
+                result = await self.local_stt.transcribe_async(audio)
+                if not result.startswith("❌"):
+                    result = self._clean_transcription(result)
+            else:
+                with metrics.timed('stt_seconds', {'backend': name}):
+                    result = await self._transcribe_assemblyai(audio)
+
+            metrics.inc('stt_requests_total', {'backend': name, 'result': 'failed' if result.startswith("❌") else 'ok'})
+            if not result.startswith("❌"):
+                return result
+            logger.warning(f"⚠️ {name} transcription failed, trying next backend: {result}")
+        return result
+
+    async def _transcribe_assemblyai(self, audio: BinaryIO) -> str:
+        if not self.api_keys.get('ASSEMBLYAI_API_KEY'):
+            return "❌ Transcription failed. AssemblyAI API key may be missing or invalid. Please type your response instead."
+
+        audio.seek(0)
+        try:
+            result = await self._transcribe_with_api(audio)
+        except Exception as e:
+            logger.error(f"❌ AssemblyAI API error: {e}")
+            return f"❌ API transcription error: {str(e)}"
+
+        if result and not result.startswith("❌"):
+            return self._clean_transcription(result)
+        logger.error(f"❌ AssemblyAI API failed: {result}")
+        return result
+
+    async def _aiter_chunks(self, audio: BinaryIO) -> AsyncIterator[bytes]:
+        for chunk in self._iter_chunks(audio):
+            yield chunk
+
+    async def _transcribe_with_api(self, audio: BinaryIO) -> str:
+        try:
+            if self.scheduler:
+                with span('assemblyai_rate_limit'):
+                    await self.scheduler.acquire_async()
+            with track_upstream('assemblyai', 'upload'):
+                response = await self.client.post(
+                    '/v2/upload',
+                    headers={'Content-Type': 'application/octet-stream'},
+                    content=self._aiter_chunks(audio)
+                )
+            if response.status_code != 200:
+                record_upstream_error('assemblyai', 'upload', response.status_code)
+                return f"❌ Upload failed: {response.status_code} - {response.text}"
+
+            with track_upstream('assemblyai', 'submit'):
+                response = await self.client.post('/v2/transcript', json={
+                    'audio_url': response.json()['upload_url'],
+                    'language_detection': True,
+                    'punctuate': True,
+                    'format_text': True,
+                    'speaker_labels': False,
+                    'auto_highlights': False
+                })
+            if response.status_code != 200:
+                record_upstream_error('assemblyai', 'submit', response.status_code)
+                return f"❌ Transcription request failed: {response.status_code} - {response.text}"
+
+            transcript_id = response.json()['id']
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.max_poll_wait
+            poll_interval = 0.5
+
+            while loop.time() < deadline:
+                with track_upstream('assemblyai', 'poll'):
+                    response = await self.client.get(f'/v2/transcript/{transcript_id}')
+                if response.status_code != 200:
+                    record_upstream_error('assemblyai', 'poll', response.status_code)
+                    return f"❌ Status check failed: {response.status_code}"
+
+                result = response.json()
+                status = result['status']
+                if status == 'completed':
+                    return result['text'] or "❌ No text in transcription result"
+                elif status == 'error':
+                    record_upstream_error('assemblyai', 'transcribe', 'error')
+                    return f"❌ Transcription error: {result.get('error', 'Unknown error')}"
+                elif status in ['queued', 'processing']:
+                    with span('assemblyai_poll_wait'):
+                        await asyncio.sleep(poll_interval)
+                    poll_interval = min(poll_interval * 1.5, 5.0)
+                else:
+                    return f"❌ Unknown status: {status}"
+
+            return "❌ Transcription timeout - took too long to process"
+
+        except httpx.TimeoutException:
+            return "❌ Request timeout - please try again"
+        except httpx.HTTPError as e:
+            return f"❌ Network error: {str(e)}"
@@ -0,0 +1,155 @@
+import io
+import math
+import os
+import sys
+import tempfile
+import wave
+from array import array
+from typing import BinaryIO, Dict, Optional, Tuple
+
+SNIFF_BYTES = 16
+
+FRAME_MS = 20
+PADDING_MS = 200
+
+
+def sniff_format(header: bytes) -> str:
+    """
+    Identify the audio container from its magic bytes, ignoring whatever
+    filename or content type the client sent
+    """
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return 'wav'
+    if header[:4] == b'\x1a\x45\xdf\xa3':
+        return 'webm'
+    if header[:4] == b'OggS':
+        return 'ogg'
+    if header[:4] == b'fLaC':
+        return 'flac'
+    if header[4:8] == b'ftyp':
+        return 'mp4'
+    if header[:4] == b'FORM' and header[8:12] in (b'AIFF', b'AIFC'):
+        return 'aiff'
+    if header[:3] == b'ID3' or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    return 'unknown'
+
+
+def silence_threshold() -> float:
+    """
+    RMS level below which a 20 ms frame counts as silence, from
+    AUDIO_SILENCE_DBFS (default -45 dBFS)
+    """
+    return 32768 * 10 ** (float(os.getenv('AUDIO_SILENCE_DBFS', '-45')) / 20)
+
+
+def _frame_rms(samples: array) -> float:
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+
+def pcm_rms(pcm: bytes) -> float:
+    """
+    RMS level of a buffer of 16-bit little-endian PCM samples
+    """
+    samples = array('h', pcm[:len(pcm) - len(pcm) % 2])
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return _frame_rms(samples)
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int, channels: int = 1) -> io.BytesIO:
+    """
+    Wrap raw 16-bit PCM in a WAV header
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(pcm)
+    buffer.seek(0)
+    return buffer
+
+
+def _read_samples(reader: wave.Wave_read, frames: int) -> array:
+    samples = array('h', reader.readframes(frames))
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples
+
+
+def trim_wav_silence(audio: BinaryIO, threshold: Optional[float] = None,
+                     spool_threshold: int = 5 * 1024 * 1024) -> Tuple[Optional[BinaryIO], Dict]:
+    """
+    Cut leading and trailing silence from 16-bit PCM WAV, keeping
+    PADDING_MS either side of the speech. Returns (trimmed file, stats);
+    the file is None when no frame rises above the threshold. Audio that
+    is not 16-bit PCM is returned unchanged.
+    """
+    threshold = silence_threshold() if threshold is None else threshold
+    audio.seek(0)
+    try:
+        reader = wave.open(audio, 'rb')
+    except (wave.Error, EOFError):
+        audio.seek(0)
+        return audio, {'trimmed': False, 'reason': 'unreadable'}
+
+    params = reader.getparams()
+    if params.sampwidth != 2 or params.comptype != 'NONE':
+        audio.seek(0)
+        return audio, {'trimmed': False, 'reason': f'{params.sampwidth * 8}-bit {params.comptype}'}
+
+    frame_size = max(1, params.framerate * FRAME_MS // 1000)
+
+    def voiced(position: int) -> bool:
+        reader.setpos(position)
+        return _frame_rms(_read_samples(reader, min(frame_size, params.nframes - position))) >= threshold
+
+    # Scan inwards from both ends so the cost scales with the silence, not
+    # with the length of the speech in between.
+    starts = range(0, params.nframes, frame_size)
+    first_voiced = next((position for position in starts if voiced(position)), None)
+    last_voiced = None
+    if first_voiced is not None:
+        last_start = next((position for position in reversed(starts) if position > first_voiced and voiced(position)),
+                          first_voiced)
+        last_voiced = min(params.nframes, last_start + frame_size)
+
+    duration = params.nframes / params.framerate if params.framerate else 0.0
+    if first_voiced is None:
+        reader.close()
+        return None, {'trimmed': False, 'silent': True, 'duration': round(duration, 3)}
+
+    padding = params.framerate * PADDING_MS // 1000
+    start = max(0, first_voiced - padding)
+    end = min(params.nframes, last_voiced + padding)
+    if start == 0 and end == params.nframes:
+        reader.close()
+        audio.seek(0)
+        return audio, {'trimmed': False, 'silent': False, 'duration': round(duration, 3)}
+
+    trimmed = tempfile.SpooledTemporaryFile(max_size=spool_threshold, prefix='audio_')
+    writer = wave.open(trimmed, 'wb')
+    writer.setnchannels(params.nchannels)
+    writer.setsampwidth(params.sampwidth)
+    writer.setframerate(params.framerate)
+    reader.setpos(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = reader.readframes(min(remaining, params.framerate))
+        if not chunk:
+            break
+        writer.writeframes(chunk)
+        remaining -= len(chunk) // (params.sampwidth * params.nchannels)
+    writer.close()
+    reader.close()
+
+    trimmed.seek(0)
+    return trimmed, {
+        'trimmed': True,
+        'silent': False,
+        'duration': round(duration, 3),
+        'trimmed_duration': round((end - start) / params.framerate, 3)
+    }
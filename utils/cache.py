@@ -0,0 +1,169 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TieredCache:
+    """
+    Bounded in-memory LRU cache with TTL, an optional SQLite disk tier and
+    single-flight collapsing of concurrent misses for the same key
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: int = 3600, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {
+            'hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'coalesced': 0
+        }
+
+        if disk_path:
+            directory = os.path.dirname(disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = self._disk()
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            conn.commit()
+
+    def _disk(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.disk_path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _get_memory(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_memory(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _get_disk(self, key: str) -> Optional[tuple]:
+        if not self.disk_path:
+            return None
+        row = self._disk().execute(
+            'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _put_disk(self, key: str, value: Any, expires_at: float) -> None:
+        if not self.disk_path:
+            return
+        conn = self._disk()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, json.dumps(value), expires_at)
+        )
+        conn.commit()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            value = self._get_memory(key)
+            if value is not None:
+                self.stats['hits'] += 1
+                return value
+
+        disk_entry = self._get_disk(key)
+        with self._lock:
+            if disk_entry is not None:
+                value, expires_at = disk_entry
+                self._put_memory(key, value, expires_at)
+                self.stats['disk_hits'] += 1
+                return value
+            self.stats['misses'] += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._put_memory(key, value, expires_at)
+        self._put_disk(key, value, expires_at)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, computing it at most once across
+        concurrent callers. A None result is returned but never cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _InFlight()
+                self._in_flight[key] = flight
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            if flight.value is not None:
+                self.set(key, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.event.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.disk_path:
+            conn = self._disk()
+            conn.execute('DELETE FROM cache')
+            conn.commit()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['size'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+        return stats
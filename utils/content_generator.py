@@ -1,55 +1,227 @@
-import requests
 import json
-from typing import Dict, List, Optional
+import logging
+import os
+from typing import Dict, Iterator, List, Optional
 import re
 
+from utils.cache import TieredCache
+from utils.key_points import KeyPointExtractor, concept_names
+from utils.llm_client import LLMStreamError
+from utils.llm_router import get_llm_router
+from utils.metrics import metrics
+from utils.model_profiles import get_model_profile
+from utils.rate_limiter import PRIORITY_BULK, PRIORITY_STANDARD, RateLimitExceeded
+from utils.reference_catalog import get_reference_catalog
+from utils.section_parser import parse_heading
+
+logger = logging.getLogger(__name__)
+
+CONTENT_PROMPT_VERSION = 1
+
+def create_content_cache() -> TieredCache:
+    """
+    Build the generated-content cache from CONTENT_CACHE_* environment variables
+    """
+    return TieredCache(
+        max_entries=int(os.getenv('CONTENT_CACHE_SIZE', '256')),
+        ttl=int(os.getenv('CONTENT_CACHE_TTL', '86400')),
+        disk_path=os.getenv('CONTENT_CACHE_PATH') or None
+    )
+
+def _normalize_key_part(value: str) -> str:
+    return re.sub(r'\s+', ' ', (value or '').strip()).casefold()
+
 class ContentGenerator:
-    def __init__(self, api_keys: Dict[str, str]):
+    def __init__(self, api_keys: Dict[str, str], content_cache: Optional[TieredCache] = None,
+                 content_library=None):
         self.api_keys = api_keys
-        self.groq_api_key = None
+        self.content_cache = content_cache if content_cache is not None else create_content_cache()
+        self.content_library = content_library
+        self.reference_catalog = get_reference_catalog()
+        
+        self.profile = get_model_profile('generation')
+        self.llm_client = None
+        self.llm_available = False
         
-        if api_keys.get('GROQ_API_KEY'):
-            try:
-                self.groq_api_key = api_keys['GROQ_API_KEY']
-                self.groq_api_url = "https://api.groq.com/openai/v1/chat/completions"
-                self.groq_model = "llama3-8b-8192"
-                print("✅ Groq API configured successfully")
-            except Exception as e:
-                print(f"⚠️ Groq initialization failed: {e}")
-                self.groq_api_key = None
+        try:
+            self.llm_client = get_llm_router(api_keys)
+            self.llm_available = bool(self.llm_client.providers)
+        except Exception as e:
+            logger.warning(f"⚠️ LLM provider initialization failed: {e}")
+        
+        if self.llm_available:
+            logger.info(f"✅ LLM providers configured: {', '.join(self.llm_client.names)}")
         else:
-            print("⚠️ No Groq API key provided")
+            logger.warning("⚠️ No AI APIs available - using mock responses")
         
-        if not self.groq_api_key:
-            print("⚠️ No AI APIs available - using mock responses")
+        self.key_points = KeyPointExtractor(
+            self.llm_client if self.llm_available else None, get_model_profile('key_points'),
+            self.content_cache, mode=os.getenv('KEY_POINTS_MODE', 'llm').lower()
+        )
 
     def generate_comprehensive_content(self, academic_level: str, subject: str, topic: str) -> Dict:
         """
         Generate comprehensive educational content with structure and references
         """
         try:
+            content_data = self._get_library_content(academic_level, subject, topic)
+            if content_data:
+                return content_data
+            
             content_prompt = self._create_content_prompt(academic_level, subject, topic)
             
-            content = self._get_ai_response(content_prompt)
+            content = self._get_cached_content_response(content_prompt, academic_level, subject, topic)
             
-            parsed_content = self._parse_generated_content(content)
-            references = self._generate_references(academic_level, subject, topic)
-            key_points = self._extract_key_points(parsed_content['content'])
+            return self._assemble_content(content, academic_level, subject, topic)
             
-            return {
-                'content': parsed_content['content'],
-                'structure': parsed_content['structure'],
-                'references': references,
-                'key_points': key_points,
-                'word_count': len(parsed_content['content'].split()),
+        except Exception as e:
+            logger.error(f"❌ Content generation error: {e}")
+            raise
+
+    def generate_for_library(self, academic_level: str, subject: str, topic: str) -> Optional[Dict]:
+        """
+        Generate content for the precomputed library straight from the LLM providers,
+        returning None instead of a mock response when the call fails
+        """
+        if not self.llm_available:
+            return None
+        
+        content = self._get_groq_response(self._create_content_prompt(academic_level, subject, topic),
+                                          priority=PRIORITY_BULK)
+        if not content:
+            return None
+        
+        key_concepts = self.key_points.extract(content, topic, priority=PRIORITY_BULK)
+        return self._assemble_content(content, academic_level, subject, topic, key_concepts)
+
+    def _get_library_content(self, academic_level: str, subject: str, topic: str) -> Optional[Dict]:
+        if self.content_library is None:
+            return None
+        try:
+            return self.content_library.get(academic_level, subject, topic)
+        except Exception as e:
+            logger.warning(f"⚠️ Content library lookup failed: {e}")
+            return None
+
+    def _assemble_content(self, content: str, academic_level: str, subject: str, topic: str,
+                          key_concepts: Optional[List[Dict]] = None) -> Dict:
+        parsed_content = self._parse_generated_content(content)
+        references = self._generate_references(academic_level, subject, topic)
+        if key_concepts is None:
+            key_concepts = self.key_points.extract(parsed_content['content'], topic)
+        
+        return {
+            'content': parsed_content['content'],
+            'structure': parsed_content['structure'],
+            'references': references,
+            'key_points': concept_names(key_concepts),
+            'key_concepts': key_concepts,
+            'word_count': len(parsed_content['content'].split()),
+            'academic_level': academic_level,
+            'subject': subject,
+            'topic': topic
+        }
+
+    def stream_comprehensive_content(self, academic_level: str, subject: str, topic: str) -> Iterator[Dict]:
+        """
+        Generate content as a stream of events: 'token' for each text delta,
+        'section'/'subsection'/'key_point' as complete lines are parsed, and a
+        final 'done' event carrying the same dict as generate_comprehensive_content.
+        The live 'key_point' events are a quick preview; the 'done' event has
+        the ranked key concepts extracted from the finished text.
+        """
+        content_prompt = self._create_content_prompt(academic_level, subject, topic)
+        cache_key = self._content_cache_key(academic_level, subject, topic) if self.llm_available else None
+        
+        chunks = []
+        structure = []
+        key_points = []
+        cacheable = False
+        
+        library_content = self._get_library_content(academic_level, subject, topic)
+        cached = self.content_cache.get(cache_key) if cache_key and not library_content else None
+        if library_content:
+            source = iter([library_content['content']])
+        elif cached:
+            source = iter([cached])
+        elif self.llm_available:
+            source = self._stream_groq_response(content_prompt)
+            cacheable = True
+        else:
+            source = iter([self._generate_mock_response(content_prompt)])
+        
+        try:
+            yield from self._stream_parse(source, chunks, structure, key_points)
+        except LLMStreamError as e:
+            logger.warning(f"⚠️ LLM stream interrupted: {e}")
+            cacheable = False
+        
+        if not ''.join(chunks).strip():
+            cacheable = False
+            if self.llm_available:
+                metrics.inc('fallback_to_mock_total', {'service': 'content'})
+            yield from self._stream_parse(iter([self._generate_mock_response(content_prompt)]), chunks, structure, key_points)
+        
+        content = ''.join(chunks)
+        if cacheable:
+            self.content_cache.set(cache_key, content)
+        
+        if library_content and library_content.get('key_concepts') is not None:
+            key_concepts = library_content['key_concepts']
+        else:
+            key_concepts = self.key_points.extract(content, topic)
+        
+        yield {
+            'event': 'done',
+            'data': {
+                'content': content,
+                'structure': structure,
+                'references': self._generate_references(academic_level, subject, topic),
+                'key_points': concept_names(key_concepts),
+                'key_concepts': key_concepts,
+                'word_count': len(content.split()),
                 'academic_level': academic_level,
                 'subject': subject,
                 'topic': topic
             }
+        }
+
+    def _stream_parse(self, source: Iterator[str], chunks: List[str], structure: List[Dict],
+                      key_points: List[str]) -> Iterator[Dict]:
+        """
+        Relay text deltas and run the structure and key point parsers on each
+        line as soon as it is complete
+        """
+        pending = ''
+        for text in source:
+            chunks.append(text)
+            yield {'event': 'token', 'data': {'text': text}}
             
-        except Exception as e:
-            print(f"❌ Content generation error: {e}")
-            raise
+            pending += text
+            *lines, pending = pending.split('\n')
+            for line in lines:
+                yield from self._parse_streamed_line(line, structure, key_points)
+        
+        if pending:
+            yield from self._parse_streamed_line(pending, structure, key_points)
+
+    def _parse_streamed_line(self, line: str, structure: List[Dict], key_points: List[str]) -> Iterator[Dict]:
+        parsed = self._parse_structure_line(line, structure)
+        if parsed:
+            yield {'event': parsed[0], 'data': {'title': parsed[1], 'section_index': len(structure) - 1}}
+        
+        if len(key_points) < 10:
+            key_point = self._key_point_from_line(line)
+            if key_point is not None:
+                key_points.append(key_point)
+                yield {'event': 'key_point', 'data': {'text': key_point}}
+
+    def _stream_groq_response(self, prompt: str) -> Iterator[str]:
+        return self.llm_client.stream_chat(
+            [{"role": "user", "content": prompt}],
+            operation='content',
+            **self.profile.chat_options(prompt)
+        )
 
     def _create_content_prompt(self, academic_level: str, subject: str, topic: str) -> str:
         """
@@ -104,44 +276,48 @@ Make sure the content is:
 - Properly structured and numbered
 """
 
-    def _get_groq_response(self, prompt: str) -> str:
+    def _get_groq_response(self, prompt: str, priority: int = PRIORITY_STANDARD) -> str:
         try:
-            headers = {
-                "Authorization": f"Bearer {self.groq_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": self.groq_model,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.8,
-                "max_tokens": 4000
-            }
-            
-            response = requests.post(self.groq_api_url, headers=headers, json=payload)
-            
-            if response.status_code == 200:
-                return response.json()["choices"][0]["message"]["content"]
-            else:
-                print(f"⚠️ Groq API error: {response.status_code} - {response.text}")
-                return None
-                
+            return self.llm_client.chat(
+                [{"role": "user", "content": prompt}],
+                operation='content',
+                priority=priority,
+                **self.profile.chat_options(prompt)
+            )
+        except RateLimitExceeded:
+            raise
         except Exception as e:
-            print(f"⚠️ Groq API error: {e}")
+            logger.warning(f"⚠️ LLM API error: {e}")
             return None
-    
-    def _get_ai_response(self, prompt: str) -> str:
-        try:
-            if self.groq_api_key:
-                groq_response = self._get_groq_response(prompt)
-                if groq_response:
-                    return groq_response
-            
-            return self._generate_mock_response(prompt)
-                
-        except Exception as e:
-            print(f"⚠️ AI API Error: {e}")
+
+    def _content_cache_key(self, academic_level: str, subject: str, topic: str) -> str:
+        level = _normalize_key_part(academic_level).replace(' ', '_')
+        return '|'.join([
+            level,
+            _normalize_key_part(subject),
+            _normalize_key_part(topic),
+            self.profile.model,
+            f"v{CONTENT_PROMPT_VERSION}"
+        ])
+
+    def _get_cached_content_response(self, prompt: str, academic_level: str, subject: str, topic: str) -> str:
+        """
+        Serve the content prompt from cache, collapsing identical concurrent requests
+        into a single upstream call. Mock fallbacks are never cached.
+        """
+        if not self.llm_available:
             return self._generate_mock_response(prompt)
+        
+        key = self._content_cache_key(academic_level, subject, topic)
+        content = self.content_cache.get_or_compute(key, lambda: self._get_groq_response(prompt))
+        if content:
+            return content
+        
+        metrics.inc('fallback_to_mock_total', {'service': 'content'})
+        return self._generate_mock_response(prompt)
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        return self.content_cache.get_stats()
     
     def _generate_mock_response(self, prompt: str) -> str:
         return f"""
@@ -182,175 +358,47 @@ Summary of main points and their significance for the student's learning journey
         """
         Parse the generated content to extract structure
         """
-        lines = content.split('\n')
         structure = []
-        current_section = None
         
-        for line in lines:
-            line = line.strip()
-            if line.startswith('## '):
-                current_section = {
-                    'title': line.replace('## ', ''),
-                    'subsections': []
-                }
-                structure.append(current_section)
-            elif line.startswith('### ') and current_section:
-                current_section['subsections'].append(line.replace('### ', ''))
+        for line in content.split('\n'):
+            self._parse_structure_line(line, structure)
         
         return {
             'content': content,
             'structure': structure
         }
 
-    def _generate_references(self, academic_level: str, subject: str, topic: str) -> List[Dict]:
+    def _parse_structure_line(self, line: str, structure: List[Dict]) -> Optional[tuple]:
         """
-        Generate realistic reference links based on the topic
+        Apply one content line to the structure, returning ('section', title)
+        or ('subsection', title) when it added a heading
         """
-        references = []
-        
-        base_references = {
-            'high_school': [
-                {
-                    'title': f'{topic} - Khan Academy',
-                    'url': f'https://www.khanacademy.org/search?search_again=1&page_search_query={topic.replace(" ", "%20")}',
-                    'type': 'Educational Resource'
-                },
-                {
-                    'title': f'{topic} - Britannica',
-                    'url': f'https://www.britannica.com/search?query={topic.replace(" ", "+")}',
-                    'type': 'Encyclopedia'
-                },
-                {
-                    'title': f'{subject}: {topic} - National Geographic Education',
-                    'url': f'https://education.nationalgeographic.org/resource/{topic.lower().replace(" ", "-")}',
-                    'type': 'Educational Article'
-                }
-            ],
-            'undergraduate': [
-                {
-                    'title': f'{topic} - MIT OpenCourseWare',
-                    'url': f'https://ocw.mit.edu/search/?q={topic.replace(" ", "+")}',
-                    'type': 'Academic Course'
-                },
-                {
-                    'title': f'{topic} - Stanford Encyclopedia of Philosophy',
-                    'url': f'https://plato.stanford.edu/search/searcher.py?query={topic.replace(" ", "+")}',
-                    'type': 'Academic Reference'
-                },
-                {
-                    'title': f'{subject} and {topic} - Coursera',
-                    'url': f'https://www.coursera.org/search?query={topic.replace(" ", "%20")}',
-                    'type': 'Online Course'
-                },
-                {
-                    'title': f'{topic} Research - Google Scholar',
-                    'url': f'https://scholar.google.com/scholar?q={topic.replace(" ", "+")}',
-                    'type': 'Academic Papers'
-                }
-            ],
-            'graduate': [
-                {
-                    'title': f'{topic} - Nature Journal',
-                    'url': f'https://www.nature.com/search?q={topic.replace(" ", "+")}',
-                    'type': 'Scientific Journal'
-                },
-                {
-                    'title': f'{topic} Research - PubMed',
-                    'url': f'https://pubmed.ncbi.nlm.nih.gov/?term={topic.replace(" ", "+")}',
-                    'type': 'Medical Research'
-                },
-                {
-                    'title': f'{topic} - IEEE Xplore',
-                    'url': f'https://ieeexplore.ieee.org/search/searchresult.jsp?queryText={topic.replace(" ", "+")}',
-                    'type': 'Technical Papers'
-                },
-                {
-                    'title': f'{topic} - ResearchGate',
-                    'url': f'https://www.researchgate.net/search?q={topic.replace(" ", "+")}',
-                    'type': 'Research Network'
-                },
-                {
-                    'title': f'{subject}: {topic} - arXiv',
-                    'url': f'https://arxiv.org/search/?query={topic.replace(" ", "+")}&searchtype=all',
-                    'type': 'Preprint Repository'
-                }
-            ]
-        }
-        
-        level_key = academic_level.lower().replace(' ', '_')
-        if level_key in base_references:
-            references.extend(base_references[level_key])
-        else:
-            references.extend(base_references['undergraduate'])
-        
-        subject_specific = self._get_subject_specific_references(subject, topic)
-        references.extend(subject_specific)
+        heading = parse_heading(line.strip())
+        if heading is None:
+            return None
         
-        return references
+        level, title = heading
+        if level == 2:
+            structure.append({
+                'title': title,
+                'subsections': []
+            })
+            return ('section', title)
+        elif level == 3 and structure:
+            structure[-1]['subsections'].append(title)
+            return ('subsection', title)
+        return None
 
-    def _get_subject_specific_references(self, subject: str, topic: str) -> List[Dict]:
+    def _generate_references(self, academic_level: str, subject: str, topic: str) -> List[Dict]:
         """
-        Get subject-specific reference sources
+        Reference links for the topic from the precompiled reference catalog
         """
-        subject_refs = {
-            'Mathematics': [
-                {
-                    'title': f'{topic} - Wolfram MathWorld',
-                    'url': f'https://mathworld.wolfram.com/search/?query={topic.replace(" ", "+")}',
-                    'type': 'Mathematical Reference'
-                }
-            ],
-            'Physics': [
-                {
-                    'title': f'{topic} - Physics World',
-                    'url': f'https://physicsworld.com/search/{topic.replace(" ", "-")}/',
-                    'type': 'Physics Journal'
-                }
-            ],
-            'Chemistry': [
-                {
-                    'title': f'{topic} - Chemical & Engineering News',
-                    'url': f'https://cen.acs.org/search.html?q={topic.replace(" ", "+")}',
-                    'type': 'Chemistry News'
-                }
-            ],
-            'Biology': [
-                {
-                    'title': f'{topic} - Biology Online',
-                    'url': f'https://www.biologyonline.com/search?q={topic.replace(" ", "+")}',
-                    'type': 'Biology Resource'
-                }
-            ],
-            'Computer Science': [
-                {
-                    'title': f'{topic} - ACM Digital Library',
-                    'url': f'https://dl.acm.org/action/doSearch?AllField={topic.replace(" ", "+")}',
-                    'type': 'Computer Science Papers'
-                }
-            ],
-            'History': [
-                {
-                    'title': f'{topic} - History.com',
-                    'url': f'https://www.history.com/search?q={topic.replace(" ", "+")}',
-                    'type': 'Historical Resource'
-                }
-            ]
-        }
-        
-        return subject_refs.get(subject, [])
+        return self.reference_catalog.references(academic_level, subject, topic)
 
-    def _extract_key_points(self, content: str) -> List[str]:
-        """
-        Extract key learning points from the content
-        """
-        key_points = []
-        lines = content.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('## ') and not line.startswith('## 1. Introduction'):
-                key_points.append(line.replace('## ', '').replace('#', ''))
-            elif line.startswith('- ') or line.startswith('* '):
-                key_points.append(line.replace('- ', '').replace('* ', ''))
-        
-        return key_points[:10]
+    def _key_point_from_line(self, line: str) -> Optional[str]:
+        line = line.strip()
+        if line.startswith('## ') and not line.startswith('## 1. Introduction'):
+            return line[3:].strip(' #')
+        elif line.startswith('- ') or line.startswith('* '):
+            return line[2:].strip()
+        return None
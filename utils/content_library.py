@@ -0,0 +1,222 @@
+"""
+Precomputed content library: generated lessons for popular topics stored in
+SQLite and served before any live LLM call.
+
+Build or top up the library from a manifest of topics with:
+
+    python -m utils.content_library topics.csv --db temp/content_library.db --workers 4 --rpm 30
+
+The manifest is a CSV with academic_level, subject and topic columns, or a
+JSONL file with the same keys. Topics already in the library are skipped, so
+an interrupted run can simply be restarted.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.content_generator import CONTENT_PROMPT_VERSION, _normalize_key_part
+from utils.llm_client import RequestPacer
+
+logger = logging.getLogger(__name__)
+
+LIBRARY_FIELDS = ('content', 'structure', 'references', 'key_points', 'key_concepts', 'word_count')
+
+
+def library_key(academic_level: str, subject: str, topic: str) -> str:
+    return '|'.join([
+        _normalize_key_part(academic_level).replace(' ', '_'),
+        _normalize_key_part(subject),
+        _normalize_key_part(topic)
+    ])
+
+
+class ContentLibrary:
+    """
+    Read-mostly SQLite store of parsed content keyed by (level, subject, topic).
+    Entries written under an older prompt version are ignored.
+    """
+
+    def __init__(self, path: str = 'temp/content_library.db'):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS content ('
+            'key TEXT PRIMARY KEY, academic_level TEXT NOT NULL, subject TEXT NOT NULL, '
+            'topic TEXT NOT NULL, model TEXT NOT NULL, prompt_version INTEGER NOT NULL, '
+            'data TEXT NOT NULL, created_at REAL NOT NULL)'
+        )
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, academic_level: str, subject: str, topic: str) -> Optional[Dict]:
+        """
+        Return the stored content dict in the shape of
+        ContentGenerator.generate_comprehensive_content, or None
+        """
+        row = self._connection().execute(
+            'SELECT data FROM content WHERE key = ? AND prompt_version = ?',
+            (library_key(academic_level, subject, topic), CONTENT_PROMPT_VERSION)
+        ).fetchone()
+        if row is None:
+            return None
+
+        content_data = json.loads(row[0])
+        content_data.update({'academic_level': academic_level, 'subject': subject, 'topic': topic})
+        return content_data
+
+    def put(self, content_data: Dict, model: str) -> None:
+        academic_level = content_data['academic_level']
+        subject = content_data['subject']
+        topic = content_data['topic']
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO content '
+            '(key, academic_level, subject, topic, model, prompt_version, data, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                library_key(academic_level, subject, topic), academic_level, subject, topic, model,
+                CONTENT_PROMPT_VERSION, json.dumps({field: content_data[field] for field in LIBRARY_FIELDS}),
+                time.time()
+            )
+        )
+        conn.commit()
+
+    def existing_keys(self) -> set:
+        rows = self._connection().execute(
+            'SELECT key FROM content WHERE prompt_version = ?', (CONTENT_PROMPT_VERSION,)
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def count(self) -> int:
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM content WHERE prompt_version = ?', (CONTENT_PROMPT_VERSION,)
+        ).fetchone()[0]
+
+
+def create_content_library() -> Optional[ContentLibrary]:
+    """
+    Open the library named by CONTENT_LIBRARY_PATH, if it has been built
+    """
+    path = os.getenv('CONTENT_LIBRARY_PATH')
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        library = ContentLibrary(path)
+        logger.info(f"📚 Content library loaded: {library.count()} topics")
+        return library
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Content library unavailable: {e}")
+        return None
+
+
+def read_manifest(path: str) -> List[Tuple[str, str, str]]:
+    """
+    Read (academic_level, subject, topic) rows from a CSV or JSONL manifest,
+    dropping incomplete rows and duplicates
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    topics = {}
+    for row in rows:
+        entry = tuple((row.get(field) or '').strip() for field in ('academic_level', 'subject', 'topic'))
+        if all(entry):
+            topics.setdefault(library_key(*entry), entry)
+    return list(topics.values())
+
+
+def build_library(generator, library: ContentLibrary, topics: List[Tuple[str, str, str]],
+                  max_workers: int = 4, max_per_minute: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Generate every topic missing from the library and store it as soon as it
+    completes, yielding one {'topic', 'stored', 'error', 'latency'} result per topic
+    """
+    existing = library.existing_keys()
+    pending = [entry for entry in topics if library_key(*entry) not in existing]
+    pacer = RequestPacer(max_per_minute)
+
+    def generate(entry: Tuple[str, str, str]) -> Dict:
+        pacer.wait()
+        start = time.perf_counter()
+        error = None
+        try:
+            content_data = generator.generate_for_library(*entry)
+            if content_data is None:
+                error = 'no content returned'
+            else:
+                library.put(content_data, generator.profile.model)
+        except Exception as e:
+            error = str(e)
+        return {
+            'topic': entry,
+            'stored': error is None,
+            'error': error,
+            'latency': round(time.perf_counter() - start, 3)
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(generate, entry) for entry in pending]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Pre-generate content for a manifest of topics')
+    parser.add_argument('manifest', help='CSV or JSONL file with academic_level, subject and topic')
+    parser.add_argument('--db', default=os.getenv('CONTENT_LIBRARY_PATH', 'temp/content_library.db'),
+                        help='library database to create or top up')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent generations')
+    parser.add_argument('--rpm', type=int, default=30, help='maximum Groq requests per minute')
+    args = parser.parse_args(argv)
+
+    from utils.api_keys import get_api_keys
+    from utils.content_generator import ContentGenerator
+
+    generator = ContentGenerator(get_api_keys())
+    if not generator.llm_available:
+        print("❌ An LLM provider (e.g. a Groq API key) is required to build the content library")
+        return 1
+
+    library = ContentLibrary(args.db)
+    topics = read_manifest(args.manifest)
+    print(f"📚 {len(topics)} topics in manifest, {library.count()} already in {args.db}")
+
+    stored = failed = 0
+    for result in build_library(generator, library, topics, args.workers, args.rpm):
+        level, subject, topic = result['topic']
+        if result['stored']:
+            stored += 1
+            print(f"✅ {level} / {subject} / {topic} ({result['latency']}s)")
+        else:
+            failed += 1
+            print(f"❌ {level} / {subject} / {topic}: {result['error']}")
+
+    print(f"📚 Stored {stored}, failed {failed}, library now holds {library.count()} topics")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
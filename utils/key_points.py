@@ -0,0 +1,309 @@
+import hashlib
+import json
+import logging
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+from utils.metrics import metrics
+from utils.pre_grader import STOPWORDS, _terms
+from utils.prompt_budget import CONTEXT_WINDOW, SAFETY_MARGIN, estimate_tokens, truncate_middle
+from utils.rate_limiter import PRIORITY_STANDARD
+
+logger = logging.getLogger(__name__)
+
+KEY_POINTS_VERSION = 1
+MAX_KEY_CONCEPTS = 10
+DEFINITION_WORDS = 30
+
+metrics.describe('key_concepts_total', 'Key concept extractions, by source: llm, local, or fallback (local after a failed LLM call)')
+
+_HEADING = re.compile(r'^(#{2,4})\s+(?:\d+(?:\.\d+)*\.?\s+)?(.+?)\s*#*$')
+_BULLET = re.compile(r'^(?:[-*+•]|\d+[.)])\s+(.+)$')
+_BOLD = re.compile(r'\*\*(.+?)\*\*|__(.+?)__')
+_TERM_DEFINITION = re.compile(r'^(.{2,80}?)(?::|\s[-–—]\s)\s*(.+)$')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Words that make a heading a section label rather than a concept
+_GENERIC_WORDS = STOPWORDS | frozenset({'first', 'second', 'third', 'point', 'points', 'summary', 'section', 'part', 'main'})
+
+# Where a candidate came from; explicit "Term: definition" bullets and bold terms are the author's own emphasis
+SOURCE_BOOST = {'definition': 1.6, 'bold': 1.4, 'heading': 1.2, 'bullet': 1.0}
+
+
+def _plain(text: str) -> str:
+    return ' '.join(text.replace('**', '').replace('__', '').replace('`', '').split())
+
+
+def _shorten(text: str, max_words: int = DEFINITION_WORDS) -> str:
+    words = _plain(text).split()
+    if len(words) > max_words:
+        return ' '.join(words[:max_words]).rstrip(',;:') + '…'
+    return ' '.join(words)
+
+
+def _capitalize(text: str) -> str:
+    return text[:1].upper() + text[1:]
+
+
+def _is_generic(title: str) -> bool:
+    return all(word in _GENERIC_WORDS or word.isdigit() for word in re.findall(r'[a-z0-9]+', title.lower()))
+
+
+def _overlaps(terms: frozenset, other: frozenset, threshold: float = 0.5) -> bool:
+    if terms <= other or other <= terms:
+        return True
+    return len(terms & other) / len(terms | other) >= threshold
+
+
+def deduplicate(concepts: List[Dict], limit: int = MAX_KEY_CONCEPTS) -> List[Dict]:
+    """
+    Keep concepts in order, dropping any whose terms overlap an earlier one;
+    a kept concept without a definition takes the dropped one's
+    """
+    kept: List[Tuple[frozenset, Dict]] = []
+    for concept in concepts:
+        terms = frozenset(_terms(concept['concept']))
+        if not terms:
+            continue
+        duplicate = next((entry for entry in kept if _overlaps(terms, entry[0])), None)
+        if duplicate is None:
+            kept.append((terms, dict(concept)))
+        elif not duplicate[1]['definition']:
+            duplicate[1]['definition'] = concept['definition']
+    return [concept for _, concept in kept[:limit]]
+
+
+class _Candidate:
+    __slots__ = ('concept', 'definition', 'source', 'count', 'terms')
+
+    def __init__(self, concept: str, definition: str, source: str, terms: List[str]):
+        self.concept = concept
+        self.definition = definition
+        self.source = source
+        self.count = 1
+        self.terms = terms
+
+
+def rank_key_concepts(content: str, topic: str = '', limit: int = MAX_KEY_CONCEPTS) -> List[Dict]:
+    """
+    Local extractive ranker. Candidates are section headings, bullets
+    (split into term and definition where written as "Term: definition")
+    and bold terms; each is scored by the TF-IDF weight of its words across
+    the lesson's sentences, boosted by how it was emphasised, then
+    deduplicated. Concepts without a definition take the first sentence of
+    their section or the first sentence that mentions them.
+    """
+    topic_terms = set(_terms(topic))
+    candidates: Dict[Tuple[str, ...], _Candidate] = {}
+    sentences: List[str] = []
+    section_openers: Dict[Tuple[str, ...], str] = {}
+    open_heading: Optional[Tuple[str, ...]] = None
+
+    def add(concept: str, definition: str, source: str) -> Optional[Tuple[str, ...]]:
+        concept = _plain(concept).strip(' .:;-–—')
+        terms = _terms(concept)
+        if not terms or len(concept.split()) > 12 or set(terms) <= topic_terms:
+            return None
+        key = tuple(sorted(set(terms)))
+        existing = candidates.get(key)
+        if existing is None:
+            candidates[key] = _Candidate(concept, _shorten(definition), source, terms)
+        else:
+            existing.count += 1
+            if SOURCE_BOOST[source] > SOURCE_BOOST[existing.source]:
+                existing.source = source
+            existing.definition = existing.definition or _shorten(definition)
+        return key
+
+    for raw_line in content.split('\n'):
+        line = raw_line.strip()
+        if not line:
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            title = _plain(heading.group(2))
+            open_heading = None if _is_generic(title) else add(title, '', 'heading')
+            continue
+        if line.startswith('#'):
+            open_heading = None
+            continue
+
+        bullet = _BULLET.match(line)
+        body = bullet.group(1) if bullet else line
+        plain = _plain(body)
+        sentences.extend(sentence for sentence in _SENTENCE_END.split(plain) if sentence)
+        if open_heading is not None and open_heading not in section_openers:
+            section_openers[open_heading] = _SENTENCE_END.split(plain)[0]
+
+        for match in _BOLD.finditer(body):
+            term = match.group(1) or match.group(2)
+            rest = body[match.end():].lstrip(' *_')
+            if bullet and match.start() == 0 and rest[:1] in (':', '-', '–', '—'):
+                add(term, rest[1:], 'definition')
+            else:
+                add(term, '', 'bold')
+        if bullet and not _BOLD.match(body):
+            term_definition = _TERM_DEFINITION.match(plain)
+            if term_definition and len(term_definition.group(1).split()) <= 6:
+                add(term_definition.group(1), term_definition.group(2), 'definition')
+            elif len(plain.split()) <= 12:
+                add(plain, '', 'bullet')
+
+    if not candidates:
+        return []
+
+    sentence_terms = [set(_terms(sentence)) for sentence in sentences]
+    frequency: Dict[str, int] = {}
+    for terms in sentence_terms:
+        for term in terms:
+            frequency[term] = frequency.get(term, 0) + 1
+    total = max(len(sentences), 1)
+
+    def weight(term: str) -> float:
+        count = frequency.get(term, 0)
+        return (1 + count) * math.log(1 + total / (1 + count))
+
+    def score(candidate: _Candidate) -> float:
+        terms = set(candidate.terms) - topic_terms or set(candidate.terms)
+        relevance = sum(weight(term) for term in terms) / math.sqrt(len(terms))
+        return relevance * SOURCE_BOOST[candidate.source] * (1 + 0.25 * (candidate.count - 1))
+
+    ranked = sorted(candidates.items(), key=lambda item: score(item[1]), reverse=True)
+    concepts = []
+    for key, candidate in ranked:
+        definition = candidate.definition or section_openers.get(key, '')
+        if not definition:
+            needed = set(key)
+            definition = next((sentence for sentence, terms in zip(sentences, sentence_terms)
+                               if needed <= terms and _plain(sentence).lower() != candidate.concept.lower()), '')
+        concepts.append({'concept': candidate.concept, 'definition': _capitalize(_shorten(definition))})
+    return deduplicate(concepts, limit)
+
+
+def parse_key_concepts(text: Optional[str], limit: int = MAX_KEY_CONCEPTS) -> Optional[List[Dict]]:
+    """
+    Validate a JSON-mode reply of the form {"key_concepts": [{"concept", "definition"}]};
+    None when it is not usable
+    """
+    if not text:
+        return None
+    try:
+        data = json.loads(text[text.find('{'):text.rfind('}') + 1])
+    except ValueError:
+        return None
+    items = data.get('key_concepts') if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return None
+
+    concepts = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('concept'), str):
+            continue
+        concept = _plain(item['concept'])
+        definition = item.get('definition')
+        if concept and len(concept.split()) <= 12:
+            concepts.append({
+                'concept': concept,
+                'definition': _capitalize(_shorten(definition)) if isinstance(definition, str) else ''
+            })
+    return deduplicate(concepts, limit) or None
+
+
+def concept_names(concepts: List[Dict]) -> List[str]:
+    return [concept['concept'] for concept in concepts]
+
+
+def rubric_lines(concepts: List[Dict]) -> List[str]:
+    return [f"• {concept['concept']}: {concept['definition']}" if concept.get('definition')
+            else f"• {concept['concept']}" for concept in concepts]
+
+
+class KeyPointExtractor:
+    """
+    Ranked, deduplicated key concepts with short definitions, extracted once
+    per generated lesson and cached next to it in the content cache.
+
+    In 'llm' mode the key_points model profile is asked for JSON and the
+    local ranker is the fallback when the call fails or the reply is not
+    usable; 'local' mode only runs the ranker.
+    """
+
+    def __init__(self, llm_client=None, profile=None, cache=None, mode: str = 'llm',
+                 limit: int = MAX_KEY_CONCEPTS):
+        self.llm_client = llm_client
+        self.profile = profile
+        self.cache = cache
+        self.mode = 'llm' if mode == 'llm' and llm_client is not None and profile is not None else 'local'
+        self.limit = limit
+
+    def _cache_key(self, content: str) -> str:
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:32]
+        model = self.profile.model if self.mode == 'llm' else 'ranker'
+        return f"key_concepts|{digest}|{self.mode}|{model}|{self.limit}|v{KEY_POINTS_VERSION}"
+
+    def _cached(self, content: str) -> Tuple[str, Optional[List[Dict]]]:
+        key = self._cache_key(content)
+        return key, self.cache.get(key) if self.cache is not None else None
+
+    def _prompt(self, content: str, topic: str) -> str:
+        instructions = f"""List the {self.limit} most important concepts a student must understand from this lesson about {topic}, most important first.
+Return only JSON of the form {{"key_concepts": [{{"concept": "2-6 word name", "definition": "one short sentence"}}]}}.
+Do not repeat a concept under a different name and do not list section titles such as Introduction or Conclusion.
+
+LESSON:
+"""
+        budget = CONTEXT_WINDOW - self.profile.max_tokens - SAFETY_MARGIN - estimate_tokens(instructions)
+        return instructions + truncate_middle(content, budget)
+
+    def _finish(self, key: str, content: str, topic: str, concepts: Optional[List[Dict]],
+                replied: bool) -> List[Dict]:
+        if self.mode == 'local':
+            source = 'local'
+        elif concepts:
+            source = 'llm'
+        else:
+            source = 'fallback'
+            logger.warning("⚠️ Key concept extraction by LLM failed - using the local ranker")
+        if not concepts:
+            concepts = rank_key_concepts(content, topic, self.limit)
+        metrics.inc('key_concepts_total', {'source': source})
+        # When the call itself failed the fallback is not cached, so the next request tries the LLM again
+        if self.cache is not None and (replied or source != 'fallback'):
+            self.cache.set(key, concepts)
+        return concepts
+
+    def extract(self, content: str, topic: str, priority: int = PRIORITY_STANDARD) -> List[Dict]:
+        key, cached = self._cached(content)
+        if cached is not None:
+            return cached
+        concepts = reply = None
+        if self.mode == 'llm':
+            prompt = self._prompt(content, topic)
+            try:
+                reply = self.llm_client.chat([{"role": "user", "content": prompt}], operation='key_points',
+                                             priority=priority, response_format={"type": "json_object"},
+                                             **self.profile.chat_options(prompt))
+                concepts = parse_key_concepts(reply, self.limit)
+            except Exception as e:
+                logger.warning(f"⚠️ Key concept extraction error: {e}")
+        return self._finish(key, content, topic, concepts, reply is not None)
+
+    async def extract_async(self, content: str, topic: str, async_client) -> List[Dict]:
+        """
+        extract() for the async app, calling the LLM through the async router
+        """
+        key, cached = self._cached(content)
+        if cached is not None:
+            return cached
+        concepts = reply = None
+        if self.mode == 'llm':
+            prompt = self._prompt(content, topic)
+            try:
+                reply = await async_client.chat([{"role": "user", "content": prompt}], operation='key_points',
+                                                priority=PRIORITY_STANDARD, response_format={"type": "json_object"},
+                                                **self.profile.chat_options(prompt))
+                concepts = parse_key_concepts(reply, self.limit)
+            except Exception as e:
+                logger.warning(f"⚠️ Key concept extraction error: {e}")
+        return self._finish(key, content, topic, concepts, reply is not None)
@@ -0,0 +1,49 @@
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+class LazyService:
+    """
+    Thread-safe proxy that builds its target on first use, so importing the
+    app stays cheap and services are only constructed when a request needs them
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self._name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+        self.build_seconds = None
+
+    def get(self) -> Any:
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                start = time.perf_counter()
+                self._instance = self._factory()
+                self.build_seconds = time.perf_counter() - start
+            return self._instance
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        state = 'initialized' if self.initialized else 'pending'
+        return f"<LazyService {self._name} ({state})>"
+
+
+def describe_services(services: Dict[str, LazyService]) -> Dict[str, Dict]:
+    return {
+        name: {
+            'initialized': service.initialized,
+            'build_ms': round(service.build_seconds * 1000, 2) if service.build_seconds is not None else None
+        }
+        for name, service in services.items()
+    }
@@ -0,0 +1,386 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.llm_metrics import llm_metrics
+from utils.metrics import record_upstream_error, track_upstream
+from utils.prompt_budget import estimate_message_tokens, estimate_tokens
+from utils.rate_limiter import PRIORITY_STANDARD, RequestScheduler, get_groq_scheduler
+
+logger = logging.getLogger(__name__)
+
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LLMStreamError(Exception):
+    """Raised when a streamed completion breaks off before it finished"""
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str], base: float, ceiling: float) -> float:
+    """
+    Seconds to wait before the next attempt: the server's Retry-After when
+    given, otherwise full-jitter exponential backoff
+    """
+    if retry_after:
+        try:
+            return min(float(retry_after), ceiling)
+        except ValueError:
+            pass
+    return random.uniform(0, min(ceiling, base * (2 ** attempt)))
+
+
+def record_usage(operation: str, messages: List[Dict], usage: Optional[Dict], completion: str,
+                 started: float, ok: bool) -> int:
+    """
+    Record one call in llm_metrics, preferring the provider's usage block
+    over offline estimates; returns the total tokens counted
+    """
+    if usage:
+        prompt_tokens = usage.get('prompt_tokens', 0)
+        completion_tokens = usage.get('completion_tokens', 0)
+    else:
+        prompt_tokens = estimate_message_tokens(messages)
+        completion_tokens = estimate_tokens(completion)
+    llm_metrics.record(operation, prompt_tokens, completion_tokens, time.monotonic() - started,
+                       ok=ok, estimated=not usage)
+    return prompt_tokens + completion_tokens if ok else 0
+
+
+def reserved_tokens(payload: Dict) -> int:
+    """
+    Tokens to reserve against a TPM budget before the real usage is known
+    """
+    return estimate_message_tokens(payload.get('messages', [])) + payload.get('max_tokens', 0)
+
+
+def stream_chunk_usage(chunk: Dict) -> Optional[Dict]:
+    return chunk.get('usage') or (chunk.get('x_groq') or {}).get('usage')
+
+
+class RequestPacer:
+    """
+    Spaces out calls so a batch job stays under a requests-per-minute budget
+    """
+
+    def __init__(self, per_minute: Optional[int]):
+        self.interval = 60.0 / per_minute if per_minute else 0
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Claim the next start slot and return how long to wait for it
+        """
+        if not self.interval:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            start_at = max(now, self.next_at)
+            self.next_at = start_at + self.interval
+        return start_at - now
+
+    def wait(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Opens after a run of consecutive failures and fails fast until the
+    cooldown elapses, then lets a single trial request through
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                return 'half_open'
+            return 'open'
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            if self._trial_in_progress:
+                return False
+            self._trial_in_progress = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_progress = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """
+        Give back a half-open trial that never reached the upstream, without
+        counting it as a success or failure
+        """
+        with self._lock:
+            self._trial_in_progress = False
+
+
+class LLMClient:
+    """
+    Shared OpenAI-compatible chat completions client with a pooled session,
+    timeouts, jittered retries and a circuit breaker
+    """
+
+    def __init__(self, api_key: str, api_url: str = GROQ_API_URL, pool_size: int = 10,
+                 connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 retry_budget: float = 20.0, breaker: Optional[CircuitBreaker] = None,
+                 scheduler: Optional[RequestScheduler] = None, name: str = 'groq'):
+        self.api_key = api_key
+        self.name = name
+        self.api_url = api_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget
+        self.breaker = breaker or CircuitBreaker()
+        self.scheduler = scheduler
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        return backoff_delay(attempt, retry_after, self.backoff_base, self.backoff_max)
+
+    def _acquire(self, reserved: int, priority: int) -> str:
+        if self.scheduler is None:
+            return self.api_key
+        return self.scheduler.acquire(reserved, priority)
+
+    def _settle(self, api_key: str, reserved: int, actual: int) -> None:
+        if self.scheduler is not None:
+            self.scheduler.settle(api_key, reserved, actual)
+
+    def post(self, payload: Dict, stream: bool = False,
+             priority: int = PRIORITY_STANDARD) -> Optional[requests.Response]:
+        """
+        POST a payload with retries; returns the final response or None when
+        the circuit is open or the network kept failing. A successful call
+        stays charged at its reservation, a failed one is refunded.
+        """
+        response, api_key, reserved = self._post(payload, stream, priority)
+        if response is None or response.status_code != 200:
+            self._settle(api_key, reserved, 0)
+        return response
+
+    def _post(self, payload: Dict, stream: bool, priority: int,
+              read_timeout: Optional[float] = None) -> Tuple[Optional[requests.Response], str, int]:
+        """
+        Send a payload through the scheduler and retry loop, returning the
+        response together with the key it was sent with and the tokens reserved
+        """
+        timeout = self.timeout if read_timeout is None else (self.timeout[0], read_timeout)
+        reserved = reserved_tokens(payload)
+        api_key = self._acquire(reserved, priority)
+
+        if not self.breaker.allow_request():
+            logger.warning(f"⚠️ {self.name} circuit open - skipping upstream call")
+            self._settle(api_key, reserved, 0)
+            return None, api_key, reserved
+
+        deadline = time.monotonic() + self.retry_budget
+        response = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                try:
+                    api_key = self._acquire(reserved, priority)
+                except Exception:
+                    # Local scheduler back-pressure says nothing about the upstream's health
+                    self.breaker.release_trial()
+                    raise
+            call = 'stream' if stream else 'chat'
+            try:
+                with track_upstream(self.name, call):
+                    response = self.session.post(self.api_url, json=payload, timeout=timeout, stream=stream,
+                                                 headers={"Authorization": f"Bearer {api_key}"})
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"⚠️ {self.name} request error: {e}")
+                response = None
+            else:
+                if response.status_code != 200:
+                    record_upstream_error(self.name, call, response.status_code)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    break
+
+            if attempt == self.max_retries:
+                break
+            delay = self._retry_delay(attempt, response)
+            if response is not None and response.status_code == 429 and self.scheduler is not None:
+                self.scheduler.penalize(api_key, delay)
+            if time.monotonic() + delay > deadline:
+                break
+            if response is not None:
+                response.close()
+            self._settle(api_key, reserved, 0)
+            time.sleep(delay)
+
+        if response is None or response.status_code in RETRYABLE_STATUS_CODES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response, api_key, reserved
+
+    def chat(self, messages: List[Dict], model: str, temperature: float = 0.8,
+             max_tokens: int = 2000, operation: str = 'chat',
+             priority: int = PRIORITY_STANDARD, timeout: Optional[float] = None,
+             response_format: Optional[Dict] = None) -> Optional[str]:
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if response_format:
+            payload["response_format"] = response_format
+
+        started = time.monotonic()
+        response, api_key, reserved = self._post(payload, False, priority, timeout)
+        used = 0
+        try:
+            if response is None:
+                record_usage(operation, messages, None, '', started, ok=False)
+                return None
+
+            if response.status_code == 200:
+                data = response.json()
+                content = data["choices"][0]["message"]["content"]
+                used = record_usage(operation, messages, data.get("usage"), content, started, ok=True)
+                return content
+
+            record_usage(operation, messages, None, '', started, ok=False)
+            logger.warning(f"⚠️ {self.name} API error: {response.status_code} - {response.text}")
+            return None
+        finally:
+            self._settle(api_key, reserved, used)
+
+    def stream_chat(self, messages: List[Dict], model: str, temperature: float = 0.8,
+                    max_tokens: int = 2000, operation: str = 'chat',
+                    priority: int = PRIORITY_STANDARD, timeout: Optional[float] = None,
+                    response_format: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Yield completion text deltas as they arrive. Yields nothing if the
+        request could not be made and raises LLMStreamError if the stream
+        breaks off part way.
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        if response_format:
+            payload["response_format"] = response_format
+
+        started = time.monotonic()
+        response, api_key, reserved = self._post(payload, True, priority, timeout)
+        completion = []
+        usage = None
+        finished = False
+        try:
+            if response is None:
+                return
+            if response.status_code != 200:
+                logger.warning(f"⚠️ {self.name} API error: {response.status_code} - {response.text}")
+                return
+
+            for raw_line in response.iter_lines():
+                line = raw_line.decode('utf-8').strip()
+                if not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    finished = True
+                    return
+                chunk = json.loads(data)
+                usage = stream_chunk_usage(chunk) or usage
+                choices = chunk.get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    completion.append(delta)
+                    yield delta
+            raise LLMStreamError("stream ended without [DONE]")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise LLMStreamError(str(e)) from e
+        finally:
+            if response is not None:
+                response.close()
+            used = record_usage(operation, messages, usage, ''.join(completion), started, ok=finished)
+            self._settle(api_key, reserved, used)
+
+
+_shared_clients = {}
+_shared_lock = threading.Lock()
+
+
+def get_llm_client(api_key: str, api_url: str = GROQ_API_URL, keys: Optional[Sequence[str]] = None) -> LLMClient:
+    """
+    Return the process-wide client for this key, configured from GROQ_* env
+    vars. Requests go through the shared scheduler for `keys` (default: just
+    this key), which rate limits each key and rotates between them.
+    """
+    keys = tuple(keys or [api_key])
+    with _shared_lock:
+        client = _shared_clients.get((keys, api_url))
+        if client is None:
+            client = LLMClient(
+                api_key,
+                api_url=api_url,
+                pool_size=int(os.getenv('GROQ_POOL_SIZE', '10')),
+                connect_timeout=float(os.getenv('GROQ_CONNECT_TIMEOUT', '5')),
+                read_timeout=float(os.getenv('GROQ_READ_TIMEOUT', '60')),
+                max_retries=int(os.getenv('GROQ_MAX_RETRIES', '3')),
+                scheduler=get_groq_scheduler(keys)
+            )
+            _shared_clients[(keys, api_url)] = client
+        return client
@@ -0,0 +1,79 @@
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+def _percentile(samples, fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LLMMetrics:
+    """
+    Process-wide counters of prompt tokens, completion tokens and latency per
+    operation ('content', 'analysis', ...). Token counts come from the
+    provider's usage block when present and from offline estimates otherwise.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._operations = {}
+
+    def _operation(self, operation: str) -> Dict:
+        stats = self._operations.get(operation)
+        if stats is None:
+            stats = {
+                'calls': 0,
+                'failures': 0,
+                'estimated_usage': 0,
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+                'max_prompt_tokens': 0,
+                'latencies': deque(maxlen=self.window)
+            }
+            self._operations[operation] = stats
+        return stats
+
+    def record(self, operation: str, prompt_tokens: int, completion_tokens: int, latency: float,
+               ok: bool = True, estimated: bool = False) -> None:
+        with self._lock:
+            stats = self._operation(operation)
+            stats['calls'] += 1
+            if not ok:
+                stats['failures'] += 1
+            if estimated:
+                stats['estimated_usage'] += 1
+            stats['prompt_tokens'] += prompt_tokens
+            stats['completion_tokens'] += completion_tokens
+            stats['max_prompt_tokens'] = max(stats['max_prompt_tokens'], prompt_tokens)
+            stats['latencies'].append(latency)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            report = {}
+            for operation, stats in self._operations.items():
+                calls = stats['calls']
+                latencies = list(stats['latencies'])
+                report[operation] = {
+                    'calls': calls,
+                    'failures': stats['failures'],
+                    'estimated_usage': stats['estimated_usage'],
+                    'prompt_tokens': stats['prompt_tokens'],
+                    'completion_tokens': stats['completion_tokens'],
+                    'avg_prompt_tokens': round(stats['prompt_tokens'] / calls, 1) if calls else 0,
+                    'avg_completion_tokens': round(stats['completion_tokens'] / calls, 1) if calls else 0,
+                    'max_prompt_tokens': stats['max_prompt_tokens'],
+                    'latency_p50': _percentile(latencies, 0.5),
+                    'latency_p95': _percentile(latencies, 0.95)
+                }
+            return report
+
+    def reset(self) -> None:
+        with self._lock:
+            self._operations.clear()
+
+
+llm_metrics = LLMMetrics()
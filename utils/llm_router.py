@@ -0,0 +1,486 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.api_keys import get_groq_keys
+from utils.llm_client import GROQ_API_URL, LLMClient, LLMStreamError, get_llm_client
+from utils.metrics import metrics
+from utils.rate_limiter import PRIORITY_STANDARD, RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+MIN_SAMPLES = 3
+
+metrics.describe('llm_failover_total', 'LLM calls retried on the next provider after a failure')
+metrics.describe('llm_hedges_total', 'Hedged LLM calls, by which request answered first')
+
+
+class ProviderStats:
+    """
+    Rolling latency per operation and recent outcomes for one provider.
+    Outcomes older than `window_seconds` are forgotten, so a provider that
+    was failing is tried again once it has been left alone for a while.
+    """
+
+    def __init__(self, size: int = 100, window_seconds: float = 300.0):
+        self.size = size
+        self.window_seconds = window_seconds
+        self._latencies: Dict[str, deque] = {}
+        self._outcomes = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, latency: Optional[float], ok: bool) -> None:
+        with self._lock:
+            self._outcomes.append((time.monotonic(), ok))
+            if ok and latency is not None:
+                self._latencies.setdefault(operation, deque(maxlen=self.size)).append(latency)
+
+    def record_latency(self, operation: str, latency: float) -> None:
+        """
+        Lower bound for a call that was abandoned after another provider answered
+        """
+        with self._lock:
+            self._latencies.setdefault(operation, deque(maxlen=self.size)).append(latency)
+
+    def p95(self, operation: str) -> Optional[float]:
+        with self._lock:
+            latencies = sorted(self._latencies.get(operation, ()))
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def error_rate(self) -> Optional[float]:
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            outcomes = [ok for at, ok in self._outcomes if at >= cutoff]
+        if len(outcomes) < MIN_SAMPLES:
+            return None
+        return outcomes.count(False) / len(outcomes)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            operations = list(self._latencies)
+        return {
+            'error_rate': self.error_rate(),
+            'p95_by_operation': {operation: self.p95(operation) for operation in operations}
+        }
+
+
+class Provider:
+    """
+    One OpenAI-compatible endpoint: Groq, a hosted alternative, or a local
+    llama.cpp / Ollama server. A provider configured with its own model
+    ignores the model id callers ask for.
+    """
+
+    def __init__(self, name: str, client, model: Optional[str] = None, max_error_rate: float = 0.5):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.max_error_rate = max_error_rate
+        self.stats = ProviderStats()
+
+    def model_for(self, model: str) -> str:
+        return self.model or model
+
+    @property
+    def healthy(self) -> bool:
+        if self.client.breaker.state == 'open':
+            return False
+        error_rate = self.stats.error_rate()
+        return error_rate is None or error_rate <= self.max_error_rate
+
+    def get_status(self) -> Dict:
+        return {
+            'healthy': self.healthy,
+            'model': self.model,
+            'circuit': self.client.breaker.state,
+            **self.stats.get_stats()
+        }
+
+
+class _RouterBase:
+    def __init__(self, providers: Sequence[Provider], hedge_delay: float = 2.0):
+        self.providers = list(providers)
+        self.hedge_delay = hedge_delay
+
+    @property
+    def names(self) -> List[str]:
+        return [provider.name for provider in self.providers]
+
+    def ranked(self, operation: str) -> List[Provider]:
+        """
+        Healthy providers fastest first by p95, then unhealthy ones as a last
+        resort. Providers without enough samples for this operation go first
+        (in configured order) so that every provider gets measured.
+        """
+        healthy = [provider for provider in self.providers if provider.healthy]
+        unhealthy = [provider for provider in self.providers if not provider.healthy]
+        healthy.sort(key=lambda provider: provider.stats.p95(operation) or 0.0)
+        return healthy + unhealthy
+
+    def hedge_after(self, provider: Provider, operation: str) -> float:
+        """
+        Seconds to wait on the first provider before asking the next one too
+        """
+        p95 = provider.stats.p95(operation)
+        return max(0.05, p95) if p95 is not None else self.hedge_delay
+
+    def _record(self, provider: Provider, operation: str, latency: float, ok: bool) -> None:
+        provider.stats.record(operation, latency, ok)
+
+    def get_status(self) -> Dict[str, Dict]:
+        return {provider.name: provider.get_status() for provider in self.providers}
+
+
+class LLMRouter(_RouterBase):
+    """
+    Routes chat completions across providers with the same interface as
+    LLMClient. Each call goes to the fastest healthy provider and fails over
+    down the ranking; with `hedge=True` a second provider is also asked once
+    the first has taken longer than its p95, and the first answer wins.
+    """
+
+    def __init__(self, providers: Sequence[Provider], hedge_delay: float = 2.0, hedge_workers: int = 32):
+        super().__init__(providers, hedge_delay)
+        self._pool = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix='llm-hedge')
+
+    def _attempt(self, provider: Provider, operation: str,
+                 call: Callable[[Provider], Optional[str]]) -> Tuple[Optional[str], Optional[RateLimitExceeded]]:
+        started = time.monotonic()
+        try:
+            text = call(provider)
+        except RateLimitExceeded as e:
+            return None, e
+        except Exception as e:
+            logger.warning(f"⚠️ {provider.name} call failed: {e}")
+            text = None
+        self._record(provider, operation, time.monotonic() - started, bool(text))
+        return text, None
+
+    def _in_order(self, providers: List[Provider], operation: str, call: Callable,
+                  failover: bool = False, rate_limited: Optional[RateLimitExceeded] = None) -> Optional[str]:
+        for provider in providers:
+            if failover:
+                metrics.inc('llm_failover_total', {'provider': provider.name})
+            text, limited = self._attempt(provider, operation, call)
+            if text:
+                return text
+            rate_limited = rate_limited or limited
+            failover = True
+        if rate_limited:
+            raise rate_limited
+        return None
+
+    def _hedged(self, providers: List[Provider], operation: str, call: Callable,
+                failover: bool = False, rate_limited: Optional[RateLimitExceeded] = None) -> Optional[str]:
+        if len(providers) < 2:
+            return self._in_order(providers, operation, call, failover, rate_limited)
+        primary, backup = providers[0], providers[1]
+        if failover:
+            metrics.inc('llm_failover_total', {'provider': primary.name})
+        first = self._pool.submit(self._attempt, primary, operation, call)
+        try:
+            text, limited = first.result(timeout=self.hedge_after(primary, operation))
+        except concurrent.futures.TimeoutError:
+            pass
+        else:
+            return text or self._hedged(providers[1:], operation, call, True, rate_limited or limited)
+
+        second = self._pool.submit(self._attempt, backup, operation, call)
+        for future in concurrent.futures.as_completed([first, second]):
+            text, limited = future.result()
+            if text:
+                # The slower request is left to finish in the background and still updates its provider's stats
+                metrics.inc('llm_hedges_total', {'winner': 'primary' if future is first else 'hedge'})
+                return text
+            rate_limited = rate_limited or limited
+        metrics.inc('llm_hedges_total', {'winner': 'none'})
+        return self._hedged(providers[2:], operation, call, True, rate_limited)
+
+    def chat(self, messages: List[Dict], model: str, temperature: float = 0.8,
+             max_tokens: int = 2000, operation: str = 'chat', priority: int = PRIORITY_STANDARD,
+             hedge: bool = False, timeout: Optional[float] = None,
+             response_format: Optional[Dict] = None) -> Optional[str]:
+        def call(provider: Provider) -> Optional[str]:
+            return provider.client.chat(messages, model=provider.model_for(model), temperature=temperature,
+                                        max_tokens=max_tokens, operation=operation, priority=priority,
+                                        timeout=timeout, response_format=response_format)
+
+        providers = self.ranked(operation)
+        if hedge and len(providers) > 1:
+            return self._hedged(providers, operation, call)
+        return self._in_order(providers, operation, call)
+
+    def stream_chat(self, messages: List[Dict], model: str, temperature: float = 0.8,
+                    max_tokens: int = 2000, operation: str = 'chat',
+                    priority: int = PRIORITY_STANDARD, timeout: Optional[float] = None,
+                    response_format: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Stream from the fastest provider by time to first token. Failover is
+        only possible before the first delta; a stream that breaks later
+        raises LLMStreamError as LLMClient does.
+        """
+        stat_key = f'{operation}_first_token'
+        rate_limited = None
+        for index, provider in enumerate(self.ranked(stat_key)):
+            if index:
+                metrics.inc('llm_failover_total', {'provider': provider.name})
+            started = time.monotonic()
+            stream = provider.client.stream_chat(messages, model=provider.model_for(model), temperature=temperature,
+                                                 max_tokens=max_tokens, operation=operation, priority=priority,
+                                                 timeout=timeout, response_format=response_format)
+            try:
+                first = next(stream, None)
+            except RateLimitExceeded as e:
+                rate_limited = rate_limited or e
+                continue
+            except LLMStreamError as e:
+                logger.warning(f"⚠️ {provider.name} stream failed: {e}")
+                first = None
+            if first is None:
+                self._record(provider, stat_key, time.monotonic() - started, False)
+                continue
+
+            self._record(provider, stat_key, time.monotonic() - started, True)
+            yield first
+            try:
+                yield from stream
+            except LLMStreamError:
+                self._record(provider, stat_key, None, False)
+                raise
+            return
+        if rate_limited:
+            raise rate_limited
+
+
+class AsyncLLMRouter(_RouterBase):
+    """
+    Event-loop counterpart of LLMRouter over AsyncLLMClient providers; the
+    losing request of a hedged pair is cancelled
+    """
+
+    async def _attempt(self, provider: Provider, operation: str,
+                       call: Callable) -> Tuple[Optional[str], Optional[RateLimitExceeded]]:
+        started = time.monotonic()
+        try:
+            text = await call(provider)
+        except RateLimitExceeded as e:
+            return None, e
+        except asyncio.CancelledError:
+            provider.stats.record_latency(operation, time.monotonic() - started)
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ {provider.name} call failed: {e}")
+            text = None
+        self._record(provider, operation, time.monotonic() - started, bool(text))
+        return text, None
+
+    async def _in_order(self, providers: List[Provider], operation: str, call: Callable,
+                        failover: bool = False, rate_limited: Optional[RateLimitExceeded] = None) -> Optional[str]:
+        for provider in providers:
+            if failover:
+                metrics.inc('llm_failover_total', {'provider': provider.name})
+            text, limited = await self._attempt(provider, operation, call)
+            if text:
+                return text
+            rate_limited = rate_limited or limited
+            failover = True
+        if rate_limited:
+            raise rate_limited
+        return None
+
+    async def _hedged(self, providers: List[Provider], operation: str, call: Callable,
+                      failover: bool = False, rate_limited: Optional[RateLimitExceeded] = None) -> Optional[str]:
+        if len(providers) < 2:
+            return await self._in_order(providers, operation, call, failover, rate_limited)
+        primary, backup = providers[0], providers[1]
+        if failover:
+            metrics.inc('llm_failover_total', {'provider': primary.name})
+        first = asyncio.create_task(self._attempt(primary, operation, call))
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after(primary, operation))
+        if done:
+            text, limited = first.result()
+            return text or await self._hedged(providers[1:], operation, call, True, rate_limited or limited)
+
+        second = asyncio.create_task(self._attempt(backup, operation, call))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    text, limited = task.result()
+                    if text:
+                        metrics.inc('llm_hedges_total', {'winner': 'primary' if task is first else 'hedge'})
+                        return text
+                    rate_limited = rate_limited or limited
+        finally:
+            for task in pending:
+                task.cancel()
+        metrics.inc('llm_hedges_total', {'winner': 'none'})
+        return await self._hedged(providers[2:], operation, call, True, rate_limited)
+
+    async def chat(self, messages: List[Dict], model: str, temperature: float = 0.8,
+                   max_tokens: int = 2000, operation: str = 'chat', priority: int = PRIORITY_STANDARD,
+                   hedge: bool = False, timeout: Optional[float] = None,
+                   response_format: Optional[Dict] = None) -> Optional[str]:
+        async def call(provider: Provider) -> Optional[str]:
+            return await provider.client.chat(messages, model=provider.model_for(model), temperature=temperature,
+                                              max_tokens=max_tokens, operation=operation, priority=priority,
+                                              timeout=timeout, response_format=response_format)
+
+        providers = self.ranked(operation)
+        if hedge and len(providers) > 1:
+            return await self._hedged(providers, operation, call)
+        return await self._in_order(providers, operation, call)
+
+    async def stream_chat(self, messages: List[Dict], model: str, temperature: float = 0.8,
+                          max_tokens: int = 2000, operation: str = 'chat',
+                          priority: int = PRIORITY_STANDARD, timeout: Optional[float] = None,
+                          response_format: Optional[Dict] = None) -> AsyncIterator[str]:
+        stat_key = f'{operation}_first_token'
+        rate_limited = None
+        for index, provider in enumerate(self.ranked(stat_key)):
+            if index:
+                metrics.inc('llm_failover_total', {'provider': provider.name})
+            started = time.monotonic()
+            stream = provider.client.stream_chat(messages, model=provider.model_for(model), temperature=temperature,
+                                                 max_tokens=max_tokens, operation=operation, priority=priority,
+                                                 timeout=timeout, response_format=response_format)
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except RateLimitExceeded as e:
+                rate_limited = rate_limited or e
+                continue
+            except LLMStreamError as e:
+                logger.warning(f"⚠️ {provider.name} stream failed: {e}")
+                first = None
+            if first is None:
+                self._record(provider, stat_key, time.monotonic() - started, False)
+                continue
+
+            self._record(provider, stat_key, time.monotonic() - started, True)
+            yield first
+            try:
+                async for delta in stream:
+                    yield delta
+            except LLMStreamError:
+                self._record(provider, stat_key, None, False)
+                raise
+            return
+        if rate_limited:
+            raise rate_limited
+
+
+def provider_configs(api_keys: Dict[str, str]) -> List[Dict]:
+    """
+    Providers named in LLM_PROVIDERS (default: groq), in preference order.
+    Any provider other than groq is configured by LLM_<NAME>_URL (its chat
+    completions endpoint) and optionally LLM_<NAME>_MODEL, _API_KEY,
+    _TIMEOUT and _MAX_RETRIES.
+    """
+    configs = []
+    for name in os.getenv('LLM_PROVIDERS', 'groq').split(','):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name == 'groq':
+            keys = get_groq_keys(api_keys)
+            if keys:
+                configs.append({'name': name, 'url': GROQ_API_URL, 'keys': tuple(keys), 'model': None})
+            continue
+
+        prefix = f"LLM_{name.upper().replace('-', '_')}_"
+        url = os.getenv(prefix + 'URL')
+        if not url:
+            logger.warning(f"⚠️ {prefix}URL not set - skipping LLM provider {name}")
+            continue
+        configs.append({
+            'name': name,
+            'url': url,
+            'keys': (os.getenv(prefix + 'API_KEY', 'none'),),
+            'model': os.getenv(prefix + 'MODEL') or None,
+            'read_timeout': float(os.getenv(prefix + 'TIMEOUT', os.getenv('GROQ_READ_TIMEOUT', '60'))),
+            'max_retries': int(os.getenv(prefix + 'MAX_RETRIES', '1'))
+        })
+    return configs
+
+
+def _config_key(configs: List[Dict]) -> Tuple:
+    return tuple(tuple(sorted(config.items())) for config in configs)
+
+
+def _hedge_delay() -> float:
+    return float(os.getenv('LLM_HEDGE_DELAY', '2.0'))
+
+
+_routers = {}
+_routers_lock = threading.Lock()
+
+
+def get_llm_router(api_keys: Dict[str, str]) -> LLMRouter:
+    """
+    Process-wide router for the configured providers. Groq goes through the
+    shared Groq client and its scheduler; other providers get their own client.
+    """
+    configs = provider_configs(api_keys)
+    key = ('sync', _config_key(configs))
+    with _routers_lock:
+        router = _routers.get(key)
+        if router is None:
+            providers = []
+            for config in configs:
+                if config['name'] == 'groq':
+                    client = get_llm_client(config['keys'][0], keys=config['keys'])
+                else:
+                    client = LLMClient(config['keys'][0], api_url=config['url'], name=config['name'],
+                                       read_timeout=config['read_timeout'], max_retries=config['max_retries'])
+                providers.append(Provider(config['name'], client, config['model']))
+            router = LLMRouter(providers, hedge_delay=_hedge_delay(),
+                               hedge_workers=int(os.getenv('LLM_HEDGE_WORKERS', '32')))
+            _routers[key] = router
+        return router
+
+
+def get_async_llm_router(api_keys: Dict[str, str]) -> AsyncLLMRouter:
+    """
+    Event-loop-wide counterpart of get_llm_router
+    """
+    from utils.async_llm_client import AsyncLLMClient, get_async_llm_client
+
+    configs = provider_configs(api_keys)
+    key = ('async', _config_key(configs))
+    router = _routers.get(key)
+    if router is None:
+        providers = []
+        for config in configs:
+            if config['name'] == 'groq':
+                client = get_async_llm_client(config['keys'][0], keys=config['keys'])
+            else:
+                client = AsyncLLMClient(config['keys'][0], api_url=config['url'], name=config['name'],
+                                        read_timeout=config['read_timeout'], max_retries=config['max_retries'])
+            providers.append(Provider(config['name'], client, config['model']))
+        router = AsyncLLMRouter(providers, hedge_delay=_hedge_delay())
+        with _routers_lock:
+            _routers[key] = router
+    return router
+
+
+def get_router_stats() -> Dict[str, Dict]:
+    """
+    Per-provider health, error rate and p95 latency across every router
+    """
+    with _routers_lock:
+        routers = list(_routers.values())
+    stats = {}
+    for router in routers:
+        stats.update(router.get_status())
+    return stats
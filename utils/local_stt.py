@@ -0,0 +1,248 @@
+import asyncio
+import concurrent.futures
+import importlib.util
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Dict, Optional
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_model = None
+_load_error = None
+
+PEER_LOAD_FAILED = "another local STT worker failed to load the model"
+
+
+def _init_worker(model_name: str, compute_type: str, cpu_threads: int, loaded, load_timeout: float) -> None:
+    """
+    Load the model once per worker process, then wait at the pool's barrier
+    until every worker has it. A failed load aborts the barrier, so the
+    whole pool reports the failure instead of starting partly cold.
+    """
+    global _model, _load_error
+    try:
+        from faster_whisper import WhisperModel
+        _model = WhisperModel(model_name, device='cpu', compute_type=compute_type, cpu_threads=cpu_threads)
+    except Exception as e:
+        _load_error = f"{type(e).__name__}: {e}"
+        loaded.abort()
+        return
+    try:
+        loaded.wait(load_timeout)
+    except threading.BrokenBarrierError:
+        _load_error = PEER_LOAD_FAILED
+
+
+def _worker_load_error() -> Optional[str]:
+    return _load_error
+
+
+def _transcribe_in_worker(audio: bytes) -> str:
+    segments, _ = _model.transcribe(io.BytesIO(audio), beam_size=1, vad_filter=True)
+    return ' '.join(segment.text.strip() for segment in segments).strip()
+
+
+class LocalSTTBackend:
+    """
+    On-box speech-to-text with faster-whisper (CTranslate2, int8) in a pool
+    of worker processes, so inference runs on every core without touching
+    the web workers' GIL. Only clips up to LOCAL_STT_MAX_BYTES are accepted;
+    longer answers are left to the next backend. Every new pool loads the
+    model in all its workers in the background; calls wait for that (up to
+    LOCAL_STT_LOAD_TIMEOUT) so LOCAL_STT_TIMEOUT only covers inference. If
+    the load fails the backend reports load_error and stops accepting clips.
+    """
+
+    name = 'local'
+
+    def __init__(self, model: Optional[str] = None, workers: Optional[int] = None,
+                 cpu_threads: Optional[int] = None, compute_type: Optional[str] = None,
+                 max_bytes: Optional[int] = None, timeout: Optional[float] = None,
+                 load_timeout: Optional[float] = None):
+        self.model = model or os.getenv('LOCAL_STT_MODEL', 'base')
+        self.workers = workers or int(os.getenv('LOCAL_STT_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+        self.cpu_threads = cpu_threads or int(os.getenv('LOCAL_STT_THREADS', '1'))
+        self.compute_type = compute_type or os.getenv('LOCAL_STT_COMPUTE_TYPE', 'int8')
+        self.max_bytes = max_bytes or int(os.getenv('LOCAL_STT_MAX_BYTES', str(1024 * 1024)))
+        self.timeout = timeout or float(os.getenv('LOCAL_STT_TIMEOUT', '30'))
+        self.load_timeout = load_timeout or float(os.getenv('LOCAL_STT_LOAD_TIMEOUT', '300'))
+        self.available = importlib.util.find_spec('faster_whisper') is not None
+        self.load_error = None
+        self._pool = None
+        self._ready = threading.Event()
+        self._loaded = threading.Event()
+        self._lock = threading.Lock()
+        if not self.available:
+            logger.warning("⚠️ faster-whisper not installed - local speech-to-text disabled")
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context('spawn')
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self.model, self.compute_type, self.cpu_threads,
+                              context.Barrier(self.workers), self.load_timeout)
+                )
+                self._ready.clear()
+                self._loaded.clear()
+                threading.Thread(target=self._load, args=(self._pool,), name='local-stt-load', daemon=True).start()
+                logger.info(f"🔄 Started {self.workers} local STT workers ({self.model}, {self.compute_type})")
+            return self._pool
+
+    def _load(self, pool: ProcessPoolExecutor) -> None:
+        """
+        Wait for every worker of a new pool to load the model, then let
+        transcriptions through, or record why the load failed
+        """
+        started = time.monotonic()
+        try:
+            # The pool spawns a worker per submit while none is idle, and no
+            # worker leaves the initializer barrier before all have loaded,
+            # so these submits start every worker
+            futures = [pool.submit(_worker_load_error) for _ in range(self.workers)]
+            errors = [future.result(timeout=self.load_timeout) for future in futures]
+            error = next((e for e in errors if e and e != PEER_LOAD_FAILED), None) or next(filter(None, errors), None)
+        except concurrent.futures.TimeoutError:
+            error = f"the model did not load within {self.load_timeout:.0f}s"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self.load_error = error
+            if error is None:
+                self._ready.set()
+            else:
+                self.available = False
+                self._pool = None
+            self._loaded.set()
+        if error is None:
+            logger.info(f"✅ Local STT model loaded in {self.workers} workers in {time.monotonic() - started:.1f}s")
+        else:
+            logger.error(f"❌ Local STT model failed to load - local speech-to-text disabled: {error}")
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def warm(self, wait: bool = False) -> None:
+        """
+        Start the worker pool and load the model ahead of the first call
+        """
+        if not self.available:
+            return
+        self._executor()
+        if wait:
+            self._loaded.wait(self.load_timeout)
+
+    def _reset(self) -> None:
+        """
+        Drop a pool whose worker died (e.g. out of memory) so the next call starts a fresh one
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _model_error(self) -> Optional[str]:
+        """
+        Error message for a pool whose model load failed or has not finished
+        """
+        if not self._loaded.is_set():
+            return "❌ Local STT model is still loading"
+        if not self._ready.is_set():
+            return f"❌ Local STT model failed to load: {self.load_error}"
+        return None
+
+    def accepts(self, audio: BinaryIO) -> bool:
+        if not self.available:
+            return False
+        size = audio.seek(0, os.SEEK_END)
+        audio.seek(0)
+        return size <= self.max_bytes
+
+    def transcribe(self, audio: BinaryIO) -> str:
+        audio.seek(0)
+        data = audio.read()
+        if self.load_error:
+            return f"❌ Local STT model failed to load: {self.load_error}"
+        pool = self._executor()
+        self._loaded.wait(self.load_timeout)
+        error = self._model_error()
+        if error:
+            return error
+        with metrics.timed('stt_seconds', {'backend': self.name}):
+            future = None
+            try:
+                future = pool.submit(_transcribe_in_worker, data)
+                text = future.result(timeout=self.timeout)
+            except concurrent.futures.TimeoutError:
+                # Drops the job if it is still queued; a running one cannot be stopped
+                future.cancel()
+                return "❌ Local transcription timed out"
+            except BrokenProcessPool as e:
+                self._reset()
+                return f"❌ Local transcription error: {e}"
+            except Exception as e:
+                return f"❌ Local transcription error: {e}"
+        return text or "❌ Empty transcription result"
+
+    async def transcribe_async(self, audio: BinaryIO) -> str:
+        audio.seek(0)
+        data = audio.read()
+        loop = asyncio.get_running_loop()
+        if self.load_error:
+            return f"❌ Local STT model failed to load: {self.load_error}"
+        pool = self._executor()
+        if not self._loaded.is_set():
+            await loop.run_in_executor(None, self._loaded.wait, self.load_timeout)
+        error = self._model_error()
+        if error:
+            return error
+        with metrics.timed('stt_seconds', {'backend': self.name}):
+            try:
+                # Cancelling the awaited future on timeout also drops a still-queued job
+                text = await asyncio.wait_for(loop.run_in_executor(pool, _transcribe_in_worker, data), self.timeout)
+            except asyncio.TimeoutError:
+                return "❌ Local transcription timed out"
+            except BrokenProcessPool as e:
+                self._reset()
+                return f"❌ Local transcription error: {e}"
+            except Exception as e:
+                return f"❌ Local transcription error: {e}"
+        return text or "❌ Empty transcription result"
+
+    def get_status(self) -> Dict:
+        return {
+            'available': self.available,
+            'model': self.model,
+            'compute_type': self.compute_type,
+            'workers': self.workers,
+            'max_bytes': self.max_bytes,
+            'ready': self._ready.is_set(),
+            'load_error': self.load_error
+        }
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_local_stt() -> LocalSTTBackend:
+    """
+    Process-wide local backend, so every VoiceManager shares one worker pool
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = LocalSTTBackend()
+        return _backend
@@ -0,0 +1,239 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> Tuple:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(label_key: Tuple, extra: Tuple = ()) -> str:
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class MetricsRegistry:
+    """
+    In-process counters and latency histograms rendered in the Prometheus
+    text exposition format. Collectors let existing components (caches,
+    schedulers, token usage) publish their own stats at scrape time.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, amount: float = 1) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    @contextmanager
+    def timed(self, name: str, labels: Optional[Dict[str, str]] = None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+    def register_collector(self, collector: Callable[[], List[Tuple[str, str, Dict[str, str], float]]]) -> None:
+        """
+        Register a callable returning (name, type, labels, value) samples,
+        where type is 'counter' or 'gauge'
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+
+        def header(name: str, metric_type: str) -> None:
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                header(name, 'counter')
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+
+            for name, series in sorted(self._histograms.items()):
+                header(name, 'histogram')
+                for key, histogram in series.items():
+                    for bound, count in zip(self.buckets, histogram['buckets']):
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {histogram['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram['sum']:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram['count']}")
+
+        collected = {}
+        for collector in self._collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                samples = [('metrics_collector_errors', 'counter', {'error': type(e).__name__}, 1)]
+            for name, metric_type, labels, value in samples:
+                collected.setdefault((name, metric_type), []).append((labels, value))
+
+        for (name, metric_type), samples in sorted(collected.items()):
+            header(name, metric_type)
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(_label_key(labels))} {value if value is not None else 'NaN'}")
+
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+metrics.describe('http_request_duration_seconds', 'Time to produce a response, by route')
+metrics.describe('upstream_request_seconds', 'Latency of calls to upstream APIs (LLM providers and AssemblyAI)')
+metrics.describe('upstream_errors_total', 'Failed calls to upstream APIs, by reason')
+metrics.describe('fallback_to_mock_total', 'Responses served from mock content after an upstream failure')
+
+
+def record_upstream_error(upstream: str, call: str, reason) -> None:
+    metrics.inc('upstream_errors_total', {'upstream': upstream, 'call': call, 'reason': str(reason)})
+
+
+def stats_samples(prefix: str, stats: Dict, labels: Optional[Dict[str, str]] = None) -> List[Tuple]:
+    """
+    Turn the numeric fields of a get_stats()-style dict into gauge samples
+    """
+    return [
+        (f'{prefix}_{key}', 'gauge', labels or {}, value)
+        for key, value in stats.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    ]
+
+
+def collect_upstream_stats() -> List[Tuple]:
+    """
+    Collector for process-wide LLM token usage, scheduler queue state and
+    provider health
+    """
+    from utils.llm_metrics import llm_metrics
+    from utils.llm_router import get_router_stats
+    from utils.rate_limiter import get_scheduler_stats
+
+    samples = []
+    for operation, stats in llm_metrics.snapshot().items():
+        labels = {'operation': operation}
+        samples.append(('llm_calls_total', 'counter', labels, stats['calls']))
+        samples.append(('llm_failures_total', 'counter', labels, stats['failures']))
+        samples.append(('llm_prompt_tokens_total', 'counter', labels, stats['prompt_tokens']))
+        samples.append(('llm_completion_tokens_total', 'counter', labels, stats['completion_tokens']))
+
+    for name, stats in get_scheduler_stats().items():
+        labels = {'scheduler': name}
+        for priority, depth in stats['queue_depth_by_priority'].items():
+            samples.append(('scheduler_queue_depth', 'gauge', {**labels, 'priority': priority}, depth))
+        samples.append(('scheduler_wait_p95_seconds', 'gauge', labels, stats['wait_p95']))
+        for key in ('admitted', 'rejected', 'timed_out', 'throttled'):
+            samples.append((f'scheduler_{key}_total', 'counter', labels, stats[key]))
+
+    for name, stats in get_router_stats().items():
+        labels = {'provider': name}
+        samples.append(('llm_provider_healthy', 'gauge', labels, int(stats['healthy'])))
+        samples.append(('llm_provider_error_rate', 'gauge', labels, stats['error_rate']))
+        for operation, p95 in stats['p95_by_operation'].items():
+            samples.append(('llm_provider_p95_seconds', 'gauge', {**labels, 'operation': operation}, p95))
+    return samples
+
+
+_current_trace = contextvars.ContextVar('trace', default=None)
+
+
+class Trace:
+    """
+    Ordered timing spans collected for one request
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def server_timing(self) -> str:
+        """
+        Render the spans as a Server-Timing header value
+        """
+        entries = [f'{name};dur={duration * 1000:.1f}' for name, _, duration in self.spans]
+        entries.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.1f}')
+        return ', '.join(entries)
+
+    def to_dict(self) -> List[Dict]:
+        return [
+            {'span': name, 'start_ms': round(offset * 1000, 1), 'duration_ms': round(duration * 1000, 1)}
+            for name, offset, duration in self.spans
+        ]
+
+
+def start_trace() -> Trace:
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace() -> Optional[Trace]:
+    trace = _current_trace.get()
+    _current_trace.set(None)
+    return trace
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time a block into the current request's trace; a no-op when the
+    request is not being traced
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.spans.append((name, start - trace.started, time.perf_counter() - start))
+
+
+@contextmanager
+def track_upstream(upstream: str, call: str) -> Iterator[None]:
+    """
+    Record latency, network errors and a trace span for one upstream call
+    """
+    start = time.perf_counter()
+    try:
+        with span(f'{upstream}_{call}'):
+            yield
+    except Exception as e:
+        record_upstream_error(upstream, call, type(e).__name__)
+        raise
+    finally:
+        metrics.observe('upstream_request_seconds', time.perf_counter() - start, {'upstream': upstream, 'call': call})
@@ -0,0 +1,96 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from utils.prompt_budget import completion_budget, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Built-in settings per task. Grading is deterministic and capped near what a
+# full analysis actually uses; `analysis_fast` is the first-pass grader whose
+# borderline grades are escalated to `analysis`, and `analysis_repair` rewrites
+# a malformed JSON analysis.
+PROFILE_DEFAULTS = {
+    'generation': {'model': 'llama3-8b-8192', 'temperature': 0.8, 'max_tokens': 4000, 'timeout': 60.0},
+    'analysis': {'model': 'llama3-70b-8192', 'temperature': 0.0, 'max_tokens': 1200, 'timeout': 30.0},
+    'analysis_fast': {'model': 'llama3-8b-8192', 'temperature': 0.0, 'max_tokens': 1200, 'timeout': 15.0},
+    'analysis_repair': {'model': 'llama3-8b-8192', 'temperature': 0.0, 'max_tokens': 1200, 'timeout': 15.0},
+    'key_points': {'model': 'llama3-8b-8192', 'temperature': 0.0, 'max_tokens': 400, 'timeout': 15.0}
+}
+
+
+class ModelProfile:
+    """
+    Model id, sampling temperature, completion token cap and read timeout
+    for one kind of LLM call
+    """
+
+    def __init__(self, name: str, model: str, temperature: float, max_tokens: int, timeout: float):
+        self.name = name
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls, name: str, defaults: Dict) -> 'ModelProfile':
+        """
+        Built-in defaults overridden by <NAME>_MODEL, <NAME>_TEMPERATURE,
+        <NAME>_MAX_TOKENS and <NAME>_TIMEOUT
+        """
+        prefix = name.upper() + '_'
+        return cls(
+            name,
+            model=os.getenv(prefix + 'MODEL', defaults['model']),
+            temperature=float(os.getenv(prefix + 'TEMPERATURE', str(defaults['temperature']))),
+            max_tokens=int(os.getenv(prefix + 'MAX_TOKENS', str(defaults['max_tokens']))),
+            timeout=float(os.getenv(prefix + 'TIMEOUT', str(defaults['timeout'])))
+        )
+
+    def completion_tokens(self, prompt: str) -> int:
+        """
+        The token cap, clamped so prompt plus completion fits the context window
+        """
+        return completion_budget(estimate_tokens(prompt), self.max_tokens)
+
+    def chat_options(self, prompt: str) -> Dict:
+        """
+        Keyword arguments for LLMRouter.chat / stream_chat
+        """
+        return {
+            'model': self.model,
+            'temperature': self.temperature,
+            'max_tokens': self.completion_tokens(prompt),
+            'timeout': self.timeout
+        }
+
+    def get_status(self) -> Dict:
+        return {
+            'model': self.model,
+            'temperature': self.temperature,
+            'max_tokens': self.max_tokens,
+            'timeout': self.timeout
+        }
+
+
+_profiles: Optional[Dict[str, ModelProfile]] = None
+_profiles_lock = threading.Lock()
+
+
+def get_model_profiles() -> Dict[str, ModelProfile]:
+    """
+    Process-wide profile registry, read from the environment on first use
+    """
+    global _profiles
+    with _profiles_lock:
+        if _profiles is None:
+            _profiles = {name: ModelProfile.from_env(name, defaults) for name, defaults in PROFILE_DEFAULTS.items()}
+            logger.info("🧭 Model profiles: " + ', '.join(
+                f"{name}={profile.model}" for name, profile in _profiles.items()
+            ))
+        return _profiles
+
+
+def get_model_profile(name: str) -> ModelProfile:
+    return get_model_profiles()[name]
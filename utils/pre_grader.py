@@ -0,0 +1,208 @@
+import re
+import threading
+from typing import Dict, List, Set
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a about above after again against all also an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having here how however into its itself just more most much must other over own same
+should such than that the their them then there these they this those through under until very
+was were what when where which while will with within without would your you our out only
+introduction overview conclusion takeaways concepts concept analysis detailed fundamental advanced
+current research developments practical applications examples key sample
+""".split())
+
+
+def _stem(word: str) -> str:
+    for suffix in ('ing', 'ies', 'es', 'ed', 's'):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def _words(text: str) -> List[str]:
+    return WORD_PATTERN.findall((text or '').lower())
+
+
+def _terms(text: str) -> List[str]:
+    return [_stem(word) for word in _words(text) if len(word) > 3 and word not in STOPWORDS]
+
+
+class PreGrader:
+    """
+    Millisecond local checks run before the LLM analysis. Answers that are
+    empty or too short to mention any key term, copied from the lesson or
+    off-topic get a deterministic verdict; everything else, including short
+    answers that use the lesson's terms, is 'borderline' and goes to the LLM
+    with these findings attached.
+    """
+
+    def __init__(self, min_words: int = 15, copy_threshold: float = 0.6, off_topic_coverage: float = 0.05,
+                 shingle_size: int = 8):
+        self.min_words = min_words
+        self.copy_threshold = copy_threshold
+        self.off_topic_coverage = off_topic_coverage
+        self.shingle_size = shingle_size
+        self._lock = threading.Lock()
+        self.stats = {'assessed': 0, 'borderline': 0, 'too_short': 0, 'copied': 0, 'off_topic': 0}
+
+    def assess(self, user_response: str, original_content: Dict) -> Dict:
+        """
+        Score an answer against the lesson's key points, structure titles and text
+        """
+        words = _words(user_response)
+        reference = list(original_content.get('key_points', [])) + [
+            section.get('title', '') for section in original_content.get('structure', [])
+        ]
+
+        term_forms = self._key_terms(reference)
+        key_terms = list(term_forms)
+        answer_terms = set(_terms(user_response))
+        matched = [term for term in key_terms if term in answer_terms]
+
+        key_bigrams = self._bigrams(reference)
+        answer_term_list = _terms(user_response)
+        answer_bigrams = set(zip(answer_term_list, answer_term_list[1:]))
+        matched_bigrams = key_bigrams & answer_bigrams
+
+        findings = {
+            'word_count': len(words),
+            'keyword_coverage': round(len(matched) / len(key_terms), 3) if key_terms else None,
+            'bigram_coverage': round(len(matched_bigrams) / len(key_bigrams), 3) if key_bigrams else None,
+            'copied_ratio': self._copied_ratio(words, original_content.get('content', '')),
+            'matched_terms': [term_forms[term] for term in matched][:15],
+            'missing_terms': [term_forms[term] for term in key_terms if term not in answer_terms][:15]
+        }
+        findings['verdict'] = self._verdict(findings, key_terms)
+
+        with self._lock:
+            self.stats['assessed'] += 1
+            self.stats[findings['verdict']] += 1
+        return findings
+
+    def _key_terms(self, reference: List[str]) -> Dict[str, str]:
+        """
+        Map each stemmed key term to the first word form it appeared as
+        """
+        forms = {}
+        for line in reference:
+            for word in _words(line):
+                if len(word) > 3 and word not in STOPWORDS:
+                    forms.setdefault(_stem(word), word)
+        return forms
+
+    def _bigrams(self, reference: List[str]) -> Set[tuple]:
+        bigrams = set()
+        for line in reference:
+            terms = _terms(line)
+            bigrams.update(zip(terms, terms[1:]))
+        return bigrams
+
+    def _copied_ratio(self, words: List[str], content: str) -> float:
+        size = self.shingle_size
+        if len(words) < size or not content:
+            return 0.0
+        content_words = _words(content)
+        content_shingles = {tuple(content_words[i:i + size]) for i in range(len(content_words) - size + 1)}
+        answer_shingles = [tuple(words[i:i + size]) for i in range(len(words) - size + 1)]
+        copied = sum(1 for shingle in answer_shingles if shingle in content_shingles)
+        return round(copied / len(answer_shingles), 3)
+
+    def _verdict(self, findings: Dict, key_terms: List[str]) -> str:
+        # A short answer can still be correct, so only fail it locally when it
+        # touches none of the lesson's key terms
+        if findings['word_count'] < self.min_words and not (findings['matched_terms'] or findings['bigram_coverage']):
+            return 'too_short'
+        if findings['copied_ratio'] >= self.copy_threshold:
+            return 'copied'
+        if (len(key_terms) >= 5 and findings['keyword_coverage'] < self.off_topic_coverage
+                and not findings['bigram_coverage']):
+            return 'off_topic'
+        return 'borderline'
+
+    def build_analysis(self, findings: Dict, topic: str) -> Dict:
+        """
+        Deterministic parsed analysis for a decisive verdict, in the shape
+        returned by AIAnalyzer._parse_analysis
+        """
+        missing = [f"The lesson's discussion of '{term}'" for term in findings['missing_terms'][:5]]
+        verdict = findings['verdict']
+
+        if verdict == 'too_short':
+            return {
+                'strengths': ["You made a start on the question"] if findings['word_count'] else [],
+                'false_points': [],
+                'missing_points': missing or [f"An explanation of {topic}"],
+                'examples_quality': "No examples were given.",
+                'areas_lacking': [f"The answer has only {findings['word_count']} words - too short to show understanding"],
+                'improvements': [
+                    f"Write at least {self.min_words * 4} words explaining {topic} in your own words",
+                    "Cover the key points from the lesson and give one concrete example"
+                ],
+                'grade': 1,
+                'grade_explanation': "The response is too short to assess understanding of the topic.",
+                'detailed_feedback': "Take another look at the lesson, then explain the main ideas as if teaching them to a classmate.",
+                'next_steps': f"Re-read the key points on {topic} and submit a fuller answer."
+            }
+
+        if verdict == 'copied':
+            return {
+                'strengths': ["You identified relevant material from the lesson"],
+                'false_points': [],
+                'missing_points': missing,
+                'examples_quality': "Examples were copied from the lesson rather than your own.",
+                'areas_lacking': [
+                    f"About {int(findings['copied_ratio'] * 100)}% of the answer repeats the lesson text word for word"
+                ],
+                'improvements': [
+                    "Explain the ideas in your own words instead of copying the lesson",
+                    "Add an example of your own to show you can apply the concept"
+                ],
+                'grade': 2,
+                'grade_explanation': "Most of the response is copied verbatim from the learning content, so it does not show your own understanding.",
+                'detailed_feedback': "Copying shows you found the right material; now close the lesson and try to explain it from memory.",
+                'next_steps': f"Rewrite your answer on {topic} in your own words and resubmit."
+            }
+
+        return {
+            'strengths': [],
+            'false_points': [],
+            'missing_points': missing,
+            'examples_quality': "No examples related to the topic were given.",
+            'areas_lacking': [f"The answer does not address {topic}"],
+            'improvements': [
+                f"Focus your answer on {topic} and the key points from the lesson",
+                "Use the lesson's terminology when explaining the concepts"
+            ],
+            'grade': 1,
+            'grade_explanation': "The response does not appear to discuss the topic of the lesson.",
+            'detailed_feedback': "Check that you are answering the right question, then explain the main ideas of the lesson.",
+            'next_steps': f"Review the lesson on {topic} and try again."
+        }
+
+    def prompt_notes(self, findings: Dict) -> str:
+        """
+        Summarize the findings for the LLM prompt on borderline answers
+        """
+        lines = [
+            "",
+            "AUTOMATED PRE-CHECK (hints only - verify against the response yourself):",
+            f"- Response length: {findings['word_count']} words"
+        ]
+        if findings['keyword_coverage'] is not None:
+            lines.append(f"- Key term coverage: {int(findings['keyword_coverage'] * 100)}%")
+        if findings['matched_terms']:
+            lines.append(f"- Key terms mentioned: {', '.join(findings['matched_terms'])}")
+        if findings['missing_terms']:
+            lines.append(f"- Key terms not mentioned: {', '.join(findings['missing_terms'])}")
+        if findings['copied_ratio']:
+            lines.append(f"- Share copied verbatim from the lesson: {int(findings['copied_ratio'] * 100)}%")
+        return '\n'.join(lines) + '\n'
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats['short_circuited'] = stats['assessed'] - stats['borderline']
+        return stats
@@ -0,0 +1,88 @@
+import math
+import re
+from typing import List
+
+CONTEXT_WINDOW = 8192
+SAFETY_MARGIN = 256
+OMISSION_MARKER = "\n[... part of the response omitted for length ...]\n"
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Offline token estimate for llama-style BPE vocabularies. Takes the larger
+    of the ~4 characters per token rule and the word/punctuation count, so it
+    errs on the high side for both prose and symbol-heavy text.
+    """
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), len(_TOKEN_PATTERN.findall(text)))
+
+
+def estimate_message_tokens(messages: List[dict]) -> int:
+    return sum(estimate_tokens(message.get('content', '')) + 4 for message in messages)
+
+
+def truncate_middle(text: str, max_tokens: int, head_share: float = 0.7) -> str:
+    """
+    Fit text into max_tokens by dropping whole sentences from the middle,
+    keeping the opening (where answers state their thesis) and the ending
+    (where they conclude)
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = max_tokens - estimate_tokens(OMISSION_MARKER)
+    if budget <= 0:
+        return ''
+
+    sentences = _SENTENCE_END.split(text.strip())
+    head_budget = int(budget * head_share)
+    tail_budget = budget - head_budget
+
+    head = []
+    used = 0
+    for sentence in sentences:
+        cost = estimate_tokens(sentence) + 1
+        if used + cost > head_budget:
+            break
+        head.append(sentence)
+        used += cost
+
+    tail = []
+    used = 0
+    for sentence in reversed(sentences[len(head):]):
+        cost = estimate_tokens(sentence) + 1
+        if used + cost > tail_budget:
+            break
+        tail.insert(0, sentence)
+        used += cost
+
+    if not head and not tail:
+        return text[:budget * 4].rstrip() + OMISSION_MARKER.rstrip()
+
+    return ' '.join(head) + OMISSION_MARKER + ' '.join(tail)
+
+
+def fit_lines(lines: List[str], max_tokens: int) -> List[str]:
+    """
+    Keep lines in order until the token budget is spent
+    """
+    kept = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def completion_budget(prompt_tokens: int, requested: int, context_window: int = CONTEXT_WINDOW) -> int:
+    """
+    Clamp max_tokens so prompt plus completion stays inside the context window
+    """
+    return max(256, min(requested, context_window - prompt_tokens - SAFETY_MARGIN))
@@ -0,0 +1,302 @@
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Sequence
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_STANDARD = 1
+PRIORITY_BULK = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_STANDARD: 'standard',
+    PRIORITY_BULK: 'bulk'
+}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when the scheduler queue is full or a request waited too long for capacity"""
+
+
+class TokenBucket:
+    """
+    Continuously refilling bucket holding at most one minute of capacity.
+    The level may go negative when actual usage exceeds the reservation.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.per_minute, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.per_minute)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        self.level = min(self.per_minute, self.level + amount)
+
+
+class KeyLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets for one API key, plus
+    a cooldown set when the provider answers 429
+    """
+
+    def __init__(self, api_key: str, rpm: Optional[float], tpm: Optional[float]):
+        self.api_key = api_key
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.blocked_until = 0.0
+        self.granted = 0
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        wait = max(0.0, self.blocked_until - now)
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def take(self, tokens: int) -> None:
+        self.granted += 1
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens and tokens:
+            self.tokens.take(tokens)
+
+
+class RequestScheduler:
+    """
+    Central admission point for one upstream API. Callers wait in a bounded
+    priority queue; the head of the queue gets the next key (round-robin)
+    whose RPM and TPM buckets have room. Interactive work therefore always
+    goes ahead of queued bulk work.
+    """
+
+    def __init__(self, name: str, api_keys: Sequence[str], rpm: Optional[float] = None,
+                 tpm: Optional[float] = None, max_queue: int = 200, max_wait: float = 30.0):
+        self.name = name
+        self.limiters = [KeyLimiter(key, rpm, tpm) for key in api_keys]
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._cursor = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._wait_times = deque(maxlen=1000)
+        self.stats = {'admitted': 0, 'rejected': 0, 'timed_out': 0, 'throttled': 0}
+
+    def _enqueue(self, priority: int) -> tuple:
+        if len(self._waiters) >= self.max_queue:
+            self.stats['rejected'] += 1
+            raise RateLimitExceeded(f"{self.name} request queue is full ({self.max_queue} waiting)")
+        ticket = (priority, next(self._sequence))
+        heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def _leave(self, ticket: tuple) -> None:
+        self._waiters.remove(ticket)
+        heapq.heapify(self._waiters)
+        self._changed.notify_all()
+
+    def _try_grant(self, ticket: tuple, tokens: int) -> tuple:
+        """
+        Return (api_key, 0) if this ticket was granted a key, else (None, seconds to wait)
+        """
+        if self._waiters[0] != ticket:
+            return None, 0.05
+
+        now = time.monotonic()
+        count = len(self.limiters)
+        shortest = None
+        for offset in range(count):
+            index = (self._cursor + offset) % count
+            limiter = self.limiters[index]
+            wait = limiter.wait_time(tokens, now)
+            if wait == 0:
+                limiter.take(tokens)
+                self._cursor = (index + 1) % count
+                heapq.heappop(self._waiters)
+                self._changed.notify_all()
+                return limiter.api_key, 0
+            shortest = wait if shortest is None else min(shortest, wait)
+        return None, shortest
+
+    def _granted(self, started: float) -> None:
+        waited = time.monotonic() - started
+        self.stats['admitted'] += 1
+        if waited > 0.001:
+            self.stats['throttled'] += 1
+        self._wait_times.append(waited)
+
+    def _timed_out(self, ticket: tuple) -> RateLimitExceeded:
+        self.stats['timed_out'] += 1
+        self._leave(ticket)
+        return RateLimitExceeded(f"{self.name} rate limit: no capacity within {self.max_wait:g}s")
+
+    def acquire(self, tokens: int = 0, priority: int = PRIORITY_STANDARD) -> str:
+        """
+        Block until a key has capacity for one request of `tokens` tokens and
+        return that key; raises RateLimitExceeded on a full queue or timeout
+        """
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        with self._lock:
+            ticket = self._enqueue(priority)
+            while True:
+                api_key, wait = self._try_grant(ticket, tokens)
+                if api_key is not None:
+                    self._granted(started)
+                    return api_key
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise self._timed_out(ticket)
+                self._changed.wait(min(wait, remaining))
+
+    async def acquire_async(self, tokens: int = 0, priority: int = PRIORITY_STANDARD) -> str:
+        """
+        Event-loop variant of acquire that sleeps with asyncio instead of blocking
+        """
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        with self._lock:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._lock:
+                    api_key, wait = self._try_grant(ticket, tokens)
+                    if api_key is not None:
+                        self._granted(started)
+                        return api_key
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._timed_out(ticket)
+                await asyncio.sleep(min(wait, remaining, 0.25))
+        except asyncio.CancelledError:
+            with self._lock:
+                if ticket in self._waiters:
+                    self._leave(ticket)
+            raise
+
+    def settle(self, api_key: str, reserved: int, actual: int) -> None:
+        """
+        Correct a key's token bucket once the real usage of a call is known
+        """
+        limiter = self._limiter(api_key)
+        if limiter is None or limiter.tokens is None:
+            return
+        with self._lock:
+            if actual > reserved:
+                limiter.tokens.take(actual - reserved)
+            else:
+                limiter.tokens.give_back(reserved - actual)
+
+    def penalize(self, api_key: str, seconds: float) -> None:
+        """
+        Stop handing out a key that the provider just rate limited
+        """
+        limiter = self._limiter(api_key)
+        if limiter is None:
+            return
+        with self._lock:
+            limiter.blocked_until = max(limiter.blocked_until, time.monotonic() + seconds)
+            self._changed.notify_all()
+
+    def _limiter(self, api_key: str) -> Optional[KeyLimiter]:
+        return next((limiter for limiter in self.limiters if limiter.api_key == api_key), None)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._wait_times)
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._waiters:
+                depth[PRIORITY_NAMES.get(priority, str(priority))] += 1
+            return {
+                **self.stats,
+                'queue_depth': len(self._waiters),
+                'queue_depth_by_priority': depth,
+                'wait_p50': waits[len(waits) // 2] if waits else None,
+                'wait_p95': waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else None,
+                'wait_max': waits[-1] if waits else None,
+                'keys': len(self.limiters),
+                'granted_per_key': [limiter.granted for limiter in self.limiters]
+            }
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def _env_limit(name: str, default: str) -> Optional[float]:
+    value = float(os.getenv(name, default))
+    return value if value > 0 else None
+
+
+def get_groq_scheduler(api_keys: Sequence[str]) -> RequestScheduler:
+    """
+    Process-wide scheduler for this set of Groq keys, limited by GROQ_RPM and
+    GROQ_TPM per key (0 disables a limit)
+    """
+    keys = tuple(api_keys)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(('groq', keys))
+        if scheduler is None:
+            scheduler = RequestScheduler(
+                'Groq',
+                keys,
+                rpm=_env_limit('GROQ_RPM', '30'),
+                tpm=_env_limit('GROQ_TPM', '30000'),
+                max_queue=int(os.getenv('SCHEDULER_MAX_QUEUE', '200')),
+                max_wait=float(os.getenv('SCHEDULER_MAX_WAIT', '30'))
+            )
+            _schedulers[('groq', keys)] = scheduler
+        return scheduler
+
+
+def get_assemblyai_scheduler(api_key: str) -> RequestScheduler:
+    """
+    Process-wide scheduler for AssemblyAI transcription submissions, limited
+    by ASSEMBLYAI_RPM (0 disables the limit)
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(('assemblyai', (api_key,)))
+        if scheduler is None:
+            scheduler = RequestScheduler(
+                'AssemblyAI',
+                [api_key],
+                rpm=_env_limit('ASSEMBLYAI_RPM', '0'),
+                max_queue=int(os.getenv('SCHEDULER_MAX_QUEUE', '200')),
+                max_wait=float(os.getenv('SCHEDULER_MAX_WAIT', '30'))
+            )
+            _schedulers[('assemblyai', (api_key,))] = scheduler
+        return scheduler
+
+
+def get_scheduler_stats() -> Dict[str, Dict]:
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    stats = {}
+    for scheduler in schedulers:
+        name = scheduler.name.lower()
+        while name in stats:
+            name += '_'
+        stats[name] = scheduler.get_stats()
+    return stats
+
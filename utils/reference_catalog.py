@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import string
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, quote_plus
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reference_catalog.json')
+
+# Placeholders a reference template may use; titles get plain text, URLs get the escaped forms
+TITLE_FIELDS = frozenset({'topic', 'subject'})
+URL_FIELDS = frozenset({'topic_query', 'topic_path', 'topic_slug', 'subject_query'})
+REFERENCE_KEYS = ('title', 'url', 'type')
+
+_formatter = string.Formatter()
+
+
+def level_key(academic_level: str) -> str:
+    return '_'.join((academic_level or '').lower().split())
+
+
+def subject_key(subject: str) -> str:
+    return ' '.join((subject or '').split()).casefold()
+
+
+def _compile(template: str, allowed: frozenset, source: str) -> Callable[[Dict[str, str]], str]:
+    """
+    Validate a template's placeholders once and return its format function
+    """
+    for _, field, spec, conversion in _formatter.parse(template):
+        if field is None:
+            continue
+        if field not in allowed or spec or conversion:
+            raise ValueError(f"{source}: unsupported placeholder {{{field}}} in {template!r}")
+    return template.format_map
+
+
+def _template_values(subject: str, topic: str) -> Dict[str, str]:
+    return {
+        'topic': topic,
+        'subject': subject,
+        'topic_query': quote_plus(topic),
+        'topic_path': quote(topic, safe=''),
+        'topic_slug': quote('-'.join(topic.lower().split()), safe=''),
+        'subject_query': quote_plus(subject)
+    }
+
+
+class _CompiledReference:
+    __slots__ = ('title', 'url', 'type')
+
+    def __init__(self, entry: Dict, source: str):
+        missing = [key for key in REFERENCE_KEYS if not isinstance(entry.get(key), str)]
+        if missing:
+            raise ValueError(f"{source}: reference is missing {', '.join(missing)}")
+        self.title = _compile(entry['title'], TITLE_FIELDS, source)
+        self.url = _compile(entry['url'], URL_FIELDS, source)
+        self.type = entry['type']
+
+    def render(self, values: Dict[str, str]) -> Dict[str, str]:
+        return {'title': self.title(values), 'url': self.url(values), 'type': self.type}
+
+
+class ReferenceCatalog:
+    """
+    Reference links for generated lessons. Templates come from JSON files,
+    are compiled once at load, and are indexed by (academic level, subject);
+    rendered lists are memoized per (level, subject, topic).
+
+    A catalog file has `levels` and `subjects` maps of reference lists and an
+    optional `default_level` for unknown levels. Later files append to the
+    lists of earlier ones, so operators can add sources without code changes.
+    """
+
+    def __init__(self, paths: List[str], cache_size: int = 1024):
+        self.paths = paths
+        self.default_level = None
+        self._levels: Dict[str, List[_CompiledReference]] = {}
+        self._subjects: Dict[str, List[_CompiledReference]] = {}
+        for path in paths:
+            self._load(path)
+        if self.default_level not in self._levels:
+            raise ValueError(f"Reference catalog default level {self.default_level!r} has no references")
+
+        self._index: Dict[Tuple[str, str], Tuple[_CompiledReference, ...]] = {}
+        for level, level_refs in self._levels.items():
+            self._index[(level, '')] = tuple(level_refs)
+            for subject, subject_refs in self._subjects.items():
+                self._index[(level, subject)] = tuple(level_refs + subject_refs)
+        self._render = lru_cache(maxsize=cache_size)(self._render_uncached)
+
+    def _load(self, path: str) -> None:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        self.default_level = level_key(data.get('default_level', '')) or self.default_level
+        for name, entries in data.get('levels', {}).items():
+            compiled = [_CompiledReference(entry, f"{path} levels.{name}") for entry in entries]
+            self._levels.setdefault(level_key(name), []).extend(compiled)
+        for name, entries in data.get('subjects', {}).items():
+            compiled = [_CompiledReference(entry, f"{path} subjects.{name}") for entry in entries]
+            self._subjects.setdefault(subject_key(name), []).extend(compiled)
+
+    def _templates(self, level: str, subject: str) -> Tuple[_CompiledReference, ...]:
+        if level not in self._levels:
+            level = self.default_level
+        return self._index.get((level, subject)) or self._index[(level, '')]
+
+    def _render_uncached(self, level: str, subject: str, topic: str, subject_label: str) -> Tuple[Dict, ...]:
+        values = _template_values(subject_label, topic)
+        return tuple(template.render(values) for template in self._templates(level, subject))
+
+    def references(self, academic_level: str, subject: str, topic: str) -> List[Dict]:
+        """
+        Reference links for a lesson; each call gets its own copies
+        """
+        subject = (subject or '').strip()
+        rendered = self._render(level_key(academic_level), subject_key(subject), (topic or '').strip(), subject)
+        return [dict(reference) for reference in rendered]
+
+    def get_status(self) -> Dict:
+        info = self._render.cache_info()
+        return {
+            'paths': self.paths,
+            'levels': sorted(self._levels),
+            'subjects': len(self._subjects),
+            'cache_hits': info.hits,
+            'cache_misses': info.misses,
+            'cache_entries': info.currsize
+        }
+
+
+def catalog_paths() -> List[str]:
+    """
+    The built-in catalog followed by any files listed in REFERENCE_CATALOG_PATH
+    """
+    extra = os.getenv('REFERENCE_CATALOG_PATH', '')
+    return [BUILTIN_CATALOG] + [path for path in extra.split(os.pathsep) if path.strip()]
+
+
+_catalog: Optional[ReferenceCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_reference_catalog() -> ReferenceCatalog:
+    """
+    Process-wide catalog, loaded on first use
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ReferenceCatalog(catalog_paths(),
+                                        cache_size=int(os.getenv('REFERENCE_CACHE_SIZE', '1024')))
+            logger.info(f"📚 Reference catalog loaded from {len(_catalog.paths)} file(s)")
+        return _catalog
@@ -0,0 +1,59 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+?)\s*$')
+
+
+def parse_heading(line: str) -> Optional[Tuple[int, str]]:
+    """
+    Return (level, title) for a markdown heading line, or None
+    """
+    if not line.startswith('#'):
+        return None
+    match = HEADING_PATTERN.match(line)
+    if not match:
+        return None
+    return len(match.group(1)), match.group(2)
+
+
+class SectionParser:
+    """
+    Single-pass splitter of markdown text into named sections. Headers are
+    recognized with one compiled pattern and dispatched by exact title lookup,
+    so 'GRADE' never swallows 'GRADE EXPLANATION'.
+    """
+
+    def __init__(self, sections: Dict[str, str], min_level: int = 2):
+        self.min_level = min_level
+        self._lookup = {self._normalize(title): key for title, key in sections.items()}
+        self.keys = list(dict.fromkeys(sections.values()))
+
+    @staticmethod
+    def _normalize(title: str) -> str:
+        return ' '.join(title.strip('*_: ').split()).upper()
+
+    def match_header(self, line: str) -> Optional[str]:
+        heading = parse_heading(line)
+        if heading is None or heading[0] < self.min_level:
+            return None
+        return self._lookup.get(self._normalize(heading[1]))
+
+    def split(self, text: str) -> Dict[str, List[str]]:
+        """
+        Map each section key to its stripped, non-empty lines
+        """
+        sections = {key: [] for key in self.keys}
+        current = None
+
+        for line in text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+
+            key = self.match_header(line)
+            if key is not None:
+                current = key
+            elif current is not None:
+                sections[current].append(line)
+
+        return sections
@@ -0,0 +1,292 @@
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """
+    Base interface for server-side session backends
+    """
+
+    def __init__(self, ttl: int = 86400):
+        self.ttl = ttl
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def save(self, session_id: str, data: Dict) -> None:
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process LRU session store with per-entry TTL
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: int = 86400):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at < time.time():
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            return dict(data)
+
+    def save(self, session_id: str, data: Dict) -> None:
+        with self._lock:
+            self._entries[session_id] = (time.time() + self.ttl, dict(data))
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    File-backed session store shared by all workers on one host. Expired
+    rows are deleted by the first save after each purge_interval, so
+    abandoned sessions do not accumulate.
+    """
+
+    def __init__(self, path: str = 'temp/sessions.db', ttl: int = 86400, purge_interval: float = 3600):
+        super().__init__(ttl)
+        self.path = path
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        self._purge_lock = threading.Lock()
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            'id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)')
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            'SELECT data, expires_at FROM sessions WHERE id = ?', (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < time.time():
+            self.delete(session_id)
+            return None
+        return json.loads(row[0])
+
+    def save(self, session_id: str, data: Dict) -> None:
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)',
+            (session_id, json.dumps(data), time.time() + self.ttl)
+        )
+        conn.commit()
+        self._maybe_purge()
+
+    def _maybe_purge(self) -> None:
+        with self._purge_lock:
+            now = time.monotonic()
+            if now - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = now
+        purged = self.purge_expired()
+        if purged:
+            logger.info(f"🧹 Purged {purged} expired sessions")
+
+    def delete(self, session_id: str) -> None:
+        conn = self._connection()
+        conn.execute('DELETE FROM sessions WHERE id = ?', (session_id,))
+        conn.commit()
+
+    def purge_expired(self) -> int:
+        conn = self._connection()
+        cursor = conn.execute('DELETE FROM sessions WHERE expires_at < ?', (time.time(),))
+        conn.commit()
+        return cursor.rowcount
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Session store for any client exposing the redis-py get/setex/delete calls
+    """
+
+    def __init__(self, client, ttl: int = 86400, prefix: str = 'session:'):
+        super().__init__(ttl)
+        self.client = client
+        self.prefix = prefix
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        raw = self.client.get(self.prefix + session_id)
+        if raw is None:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8')
+        return json.loads(raw)
+
+    def save(self, session_id: str, data: Dict) -> None:
+        self.client.setex(self.prefix + session_id, self.ttl, json.dumps(data))
+
+    def delete(self, session_id: str) -> None:
+        self.client.delete(self.prefix + session_id)
+
+
+class FakeRedis:
+    """
+    Minimal in-process stand-in for a Redis client, for local runs and benchmarks
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def setex(self, key: str, ttl: int, value: str) -> bool:
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+        return True
+
+    def delete(self, key: str) -> int:
+        with self._lock:
+            return 1 if self._data.pop(key, None) is not None else 0
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial: Optional[Dict] = None, session_id: Optional[str] = None, new: bool = False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.session_id = session_id
+        self.new = new
+        self.modified = False
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Keeps session data in a SessionStore; the cookie only carries an opaque id
+    """
+
+    session_class = ServerSideSession
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+
+    def _new_session_id(self) -> str:
+        return secrets.token_urlsafe(32)
+
+    def open_session(self, app, request) -> ServerSideSession:
+        session_id = request.cookies.get(self.get_cookie_name(app))
+        if session_id:
+            data = self.store.load(session_id)
+            if data is not None:
+                return self.session_class(data, session_id=session_id)
+        return self.session_class(session_id=self._new_session_id(), new=True)
+
+    def persist(self, session: ServerSideSession) -> None:
+        """
+        Write the session to the store immediately, for streamed responses that
+        update the session after the headers have been sent
+        """
+        self.store.save(session.session_id, dict(session))
+        session.modified = False
+
+    def save_session(self, app, session: ServerSideSession, response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified:
+                self.store.delete(session.session_id)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.modified:
+            self.store.save(session.session_id, dict(session))
+
+        if session.new or session.modified or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name,
+                session.session_id,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app)
+            )
+
+
+def create_session_store(backend: Optional[str] = None) -> SessionStore:
+    """
+    Build the session store selected by SESSION_BACKEND (sqlite, memory or
+    redis). The default is sqlite because the memory store is per process
+    and loses sessions between workers of a multi-worker server.
+    """
+    backend = (backend or os.getenv('SESSION_BACKEND', 'sqlite')).lower()
+    ttl = int(os.getenv('SESSION_TTL_SECONDS', '86400'))
+
+    if backend == 'sqlite':
+        return SQLiteSessionStore(os.getenv('SESSION_SQLITE_PATH', 'temp/sessions.db'), ttl=ttl,
+                                  purge_interval=float(os.getenv('SESSION_PURGE_INTERVAL', '3600')))
+
+    if backend == 'redis':
+        redis_url = os.getenv('REDIS_URL')
+        if redis_url:
+            import redis
+            return RedisSessionStore(redis.Redis.from_url(redis_url), ttl=ttl)
+        logger.warning("⚠️ REDIS_URL not set - using in-process fake Redis for sessions")
+        return RedisSessionStore(FakeRedis(), ttl=ttl)
+
+    max_entries = int(os.getenv('SESSION_MAX_ENTRIES', '1000'))
+    return MemorySessionStore(max_entries=max_entries, ttl=ttl)
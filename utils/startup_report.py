@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_imports(module: str = 'app') -> List[Dict]:
+    """
+    Import a module in a fresh interpreter with -X importtime and return one
+    entry per imported module with self and cumulative time in milliseconds
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr.strip()[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        entries.append({
+            'module': parts[2].strip(),
+            'self_ms': int(parts[0]) / 1000,
+            'cumulative_ms': int(parts[1]) / 1000
+        })
+    return entries
+
+
+def measure_services() -> Dict[str, Dict]:
+    """
+    Build every lazy service in this process and report how long each took
+    """
+    sys.path.insert(0, PROJECT_ROOT)
+    import app
+    from utils.lazy import describe_services
+
+    for service in app.SERVICES.values():
+        service.get()
+    return describe_services(app.SERVICES)
+
+
+def build_report(top: int = 15, include_services: bool = False) -> Dict:
+    entries = measure_imports()
+    roots = [entry for entry in entries if entry['module'] == 'app']
+    total_ms = roots[-1]['cumulative_ms'] if roots else sum(entry['self_ms'] for entry in entries)
+
+    report = {
+        'total_import_ms': round(total_ms, 2),
+        'modules_imported': len(entries),
+        'slowest_modules': sorted(
+            (entry for entry in entries if entry['module'] != 'app'),
+            key=lambda entry: entry['cumulative_ms'],
+            reverse=True
+        )[:top]
+    }
+
+    if include_services:
+        start = time.perf_counter()
+        report['services'] = measure_services()
+        report['services_total_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+    return report
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='app.py --startup-report',
+        description='Report how long importing app.py takes, module by module'
+    )
+    parser.add_argument('--top', type=int, default=15, help='number of slowest modules to list')
+    parser.add_argument('--services', action='store_true', help='also time building each lazy service')
+    parser.add_argument('--max-import-ms', type=float, default=None,
+                        help='exit with status 1 if importing app takes longer than this')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = build_report(top=args.top, include_services=args.services)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"🚀 import app: {report['total_import_ms']:.1f} ms ({report['modules_imported']} modules)")
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for entry in report['slowest_modules']:
+            print(f"{entry['cumulative_ms']:>14.1f} {entry['self_ms']:>9.1f}  {entry['module']}")
+        if args.services:
+            print(f"🔧 building services: {report['services_total_ms']:.1f} ms")
+            for name, info in report['services'].items():
+                print(f"   {name}: {info['build_ms']} ms")
+
+    if args.max_import_ms is not None and report['total_import_ms'] > args.max_import_ms:
+        print(f"❌ import time {report['total_import_ms']:.1f} ms exceeds budget of {args.max_import_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from utils.audio_prep import FRAME_MS, pcm_rms, pcm_to_wav, silence_threshold, trim_wav_silence
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_STREAM_SECONDS = 15 * 60
+
+metrics.describe('stream_finalize_seconds', 'Time from the end of a live recording to its final transcript')
+
+
+class PcmSegmenter:
+    """
+    Cuts a live 16-bit mono PCM stream into standalone segments at pauses,
+    so each segment can be transcribed on its own without splitting a word.
+    A segment is closed after a pause once it is `min_seconds` long, or
+    unconditionally at `max_seconds`.
+    """
+
+    def __init__(self, sample_rate: int = 16000, min_seconds: float = 4.0, max_seconds: float = 15.0,
+                 pause_ms: int = 300, threshold: Optional[float] = None):
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_rate * FRAME_MS // 1000 * 2
+        self.min_bytes = int(min_seconds * sample_rate) * 2
+        self.max_bytes = int(max_seconds * sample_rate) * 2
+        self.pause_frames = max(1, pause_ms // FRAME_MS)
+        self.threshold = silence_threshold() if threshold is None else threshold
+        self._buffer = bytearray()
+        self._scanned = 0
+        self._quiet_frames = 0
+
+    def feed(self, pcm: bytes) -> List[bytes]:
+        """
+        Append audio and return any segments that are now complete
+        """
+        self._buffer += pcm
+        segments = []
+        while self._scanned + self.frame_bytes <= len(self._buffer):
+            frame = self._buffer[self._scanned:self._scanned + self.frame_bytes]
+            self._scanned += self.frame_bytes
+            self._quiet_frames = self._quiet_frames + 1 if pcm_rms(frame) < self.threshold else 0
+
+            paused = self._quiet_frames >= self.pause_frames and self._scanned >= self.min_bytes
+            if paused or self._scanned >= self.max_bytes:
+                segments.append(bytes(self._buffer[:self._scanned]))
+                del self._buffer[:self._scanned]
+                self._scanned = 0
+                self._quiet_frames = 0
+        return segments
+
+    def flush(self) -> Optional[bytes]:
+        """
+        Return whatever audio is left once the recording has stopped
+        """
+        remainder = bytes(self._buffer[:len(self._buffer) - len(self._buffer) % 2])
+        self._buffer.clear()
+        self._scanned = 0
+        self._quiet_frames = 0
+        return remainder or None
+
+
+def stitch(texts: List[str]) -> str:
+    return ' '.join(text.strip() for text in texts if text and text.strip())
+
+
+class _SegmentedTranscription:
+    """
+    Shared bookkeeping for a live recording transcribed segment by segment;
+    results are kept in recording order so partial text only ever grows
+    """
+
+    def __init__(self, sample_rate: int, max_seconds: float):
+        if not 8000 <= sample_rate <= 48000:
+            raise ValueError(f"Unsupported sample rate: {sample_rate}")
+        self.sample_rate = sample_rate
+        self.segmenter = PcmSegmenter(sample_rate)
+        self.max_bytes = int(max_seconds * sample_rate) * 2
+        self.received = 0
+        self.stopped_at = None
+
+    def _accept(self, pcm: bytes) -> List[bytes]:
+        self.received += len(pcm)
+        if self.received > self.max_bytes:
+            raise ValueError(f"Recording is longer than {self.max_bytes // (2 * self.sample_rate)} seconds")
+        return self.segmenter.feed(pcm)
+
+    def _prepare(self, pcm: bytes) -> Optional[BinaryIO]:
+        """
+        Wrap a segment as WAV and trim it; None for a silent segment
+        """
+        audio, _ = trim_wav_silence(pcm_to_wav(pcm, self.sample_rate))
+        if audio is None:
+            metrics.inc('stream_segments_total', {'result': 'silent'})
+        return audio
+
+    def _record(self, text: str) -> Tuple[str, bool]:
+        if text.startswith('❌'):
+            metrics.inc('stream_segments_total', {'result': 'failed'})
+            logger.warning(f"⚠️ Segment transcription failed: {text}")
+            return '', False
+        metrics.inc('stream_segments_total', {'result': 'ok'})
+        return text, True
+
+    def _summary(self, results: List[Tuple[str, bool]], pending: int) -> Dict:
+        return {
+            'text': stitch([text for text, _ in results]),
+            'segments': len(results),
+            'pending': pending,
+            'failed_segments': sum(1 for _, ok in results if not ok),
+            'audio_seconds': round(self.received / (2 * self.sample_rate), 2)
+        }
+
+    def _finished(self, summary: Dict) -> Dict:
+        finalize = time.perf_counter() - self.stopped_at
+        metrics.observe('stream_finalize_seconds', finalize)
+        summary['finalize_seconds'] = round(finalize, 3)
+        return summary
+
+
+class StreamingTranscription(_SegmentedTranscription):
+    """
+    Live transcription for the threaded server: completed segments are
+    transcribed in parallel on `executor` while the student keeps talking
+    """
+
+    def __init__(self, transcribe: Callable[[BinaryIO], str], executor: ThreadPoolExecutor,
+                 sample_rate: int = 16000, max_seconds: float = MAX_STREAM_SECONDS):
+        super().__init__(sample_rate, max_seconds)
+        self.transcribe = transcribe
+        self.executor = executor
+        self._futures: List[Future] = []
+
+    def feed(self, pcm: bytes) -> None:
+        for segment in self._accept(pcm):
+            self._futures.append(self.executor.submit(self._transcribe_segment, segment))
+
+    def _transcribe_segment(self, pcm: bytes) -> Tuple[str, bool]:
+        audio = self._prepare(pcm)
+        if audio is None:
+            return '', True
+        with audio:
+            return self._record(self.transcribe(audio))
+
+    def partial(self) -> Dict:
+        """
+        Text of the leading run of finished segments
+        """
+        results = []
+        for future in self._futures:
+            if not future.done():
+                break
+            results.append(future.result())
+        return self._summary(results, len(self._futures) - len(results))
+
+    def finish(self, timeout: float = 120) -> Dict:
+        """
+        Transcribe the remaining audio and wait for every segment
+        """
+        self.stopped_at = time.perf_counter()
+        remainder = self.segmenter.flush()
+        if remainder:
+            self._futures.append(self.executor.submit(self._transcribe_segment, remainder))
+        deadline = time.monotonic() + timeout
+        results = []
+        for future in self._futures:
+            try:
+                results.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except Exception as e:
+                logger.error(f"❌ Segment transcription error: {e}")
+                results.append(('', False))
+        return self._finished(self._summary(results, 0))
+
+
+class AsyncStreamingTranscription(_SegmentedTranscription):
+    """
+    Event-loop variant: each segment is an asyncio task awaiting the async
+    transcriber, bounded by a shared semaphore
+    """
+
+    def __init__(self, transcribe: Callable[[BinaryIO], Awaitable[str]], semaphore: asyncio.Semaphore,
+                 sample_rate: int = 16000, max_seconds: float = MAX_STREAM_SECONDS):
+        super().__init__(sample_rate, max_seconds)
+        self.transcribe = transcribe
+        self.semaphore = semaphore
+        self._tasks: List[asyncio.Task] = []
+
+    def feed(self, pcm: bytes) -> None:
+        for segment in self._accept(pcm):
+            self._tasks.append(asyncio.create_task(self._transcribe_segment(segment)))
+
+    async def _transcribe_segment(self, pcm: bytes) -> Tuple[str, bool]:
+        audio = self._prepare(pcm)
+        if audio is None:
+            return '', True
+        async with self.semaphore:
+            with audio:
+                return self._record(await self.transcribe(audio))
+
+    def partial(self) -> Dict:
+        results = []
+        for task in self._tasks:
+            if not task.done():
+                break
+            results.append(task.result() if not task.exception() else ('', False))
+        return self._summary(results, len(self._tasks) - len(results))
+
+    async def finish(self, timeout: float = 120) -> Dict:
+        self.stopped_at = time.perf_counter()
+        remainder = self.segmenter.flush()
+        if remainder:
+            self._tasks.append(asyncio.create_task(self._transcribe_segment(remainder)))
+        done, pending = await asyncio.wait(self._tasks, timeout=timeout) if self._tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+        results = []
+        for task in self._tasks:
+            if task in done and not task.exception():
+                results.append(task.result())
+            else:
+                results.append(('', False))
+        return self._finished(self._summary(results, 0))
+
+    def cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_segment_executor() -> ThreadPoolExecutor:
+    """
+    Process-wide pool for segment transcriptions, sized by STREAM_SEGMENT_WORKERS
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=int(os.getenv('STREAM_SEGMENT_WORKERS', '8')),
+                                           thread_name_prefix='stream-segment')
+        return _executor
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when the job table has no room for another pending job"""
+
+
+class TranscriptionJobManager:
+    """
+    Runs transcriptions on a background executor so request threads only
+    submit work and read results
+    """
+
+    def __init__(self, voice_manager, max_workers: int = 4, max_jobs: int = 500, job_ttl: int = 900):
+        self.voice_manager = voice_manager
+        self.max_jobs = max_jobs
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='transcribe')
+        self._jobs = OrderedDict()
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def _evict(self) -> None:
+        now = time.time()
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            finished = job['status'] in ('completed', 'error')
+            if finished and (now - job['finished_at'] > self.job_ttl or len(self._jobs) >= self.max_jobs):
+                del self._jobs[job_id]
+                self._events.pop(job_id, None)
+
+    def submit(self, audio_file_path: str, cleanup: bool = True) -> str:
+        """
+        Queue a transcription of a file on disk and return its job id immediately
+        """
+        def release():
+            if cleanup and os.path.exists(audio_file_path):
+                os.remove(audio_file_path)
+
+        return self._submit(lambda: self.voice_manager.transcribe_audio(audio_file_path), release)
+
+    def submit_stream(self, audio: BinaryIO) -> str:
+        """
+        Queue a transcription of an in-memory or spooled audio buffer; the
+        buffer is closed once the job finishes
+        """
+        return self._submit(lambda: self.voice_manager.transcribe_stream(audio), audio.close)
+
+    def _submit(self, transcribe: Callable[[], str], release: Callable[[], None]) -> str:
+        with self._lock:
+            self._evict()
+            if len(self._jobs) >= self.max_jobs:
+                release()
+                raise JobQueueFull(f'Too many pending transcriptions (max {self.max_jobs})')
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'transcription': None,
+                'error': None,
+                'created_at': time.time(),
+                'finished_at': None
+            }
+            self._events[job_id] = threading.Event()
+
+        self._executor.submit(self._run, job_id, transcribe, release)
+        return job_id
+
+    def _run(self, job_id: str, transcribe: Callable[[], str], release: Callable[[], None]) -> None:
+        self._update(job_id, status='processing')
+        try:
+            result = transcribe()
+            if result.startswith('❌') or result.startswith('⚠️'):
+                self._update(job_id, status='error', error=result)
+            else:
+                self._update(job_id, status='completed', transcription=result)
+        except Exception as e:
+            logger.error(f"❌ Transcription job {job_id} failed: {e}")
+            self._update(job_id, status='error', error=f'Transcription failed: {str(e)}')
+        finally:
+            release()
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            if job['status'] in ('completed', 'error'):
+                job['finished_at'] = time.time()
+                event = self._events.get(job_id)
+                if event:
+                    event.set()
+
+    def get(self, job_id: str, wait: float = 0) -> Optional[Dict]:
+        """
+        Return a snapshot of the job, optionally long-polling up to wait
+        seconds for it to finish
+        """
+        with self._lock:
+            event = self._events.get(job_id)
+            if job_id not in self._jobs:
+                return None
+
+        if wait > 0 and event is not None:
+            event.wait(wait)
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = {'total': len(self._jobs), 'max_jobs': self.max_jobs}
+            for job in self._jobs.values():
+                stats[job['status']] = stats.get(job['status'], 0) + 1
+        return stats
+
+
+class AsyncTranscriptionJobManager:
+    """
+    Event-loop counterpart of TranscriptionJobManager for the ASGI app; jobs
+    are asyncio tasks and long-polls wait on asyncio events
+    """
+
+    def __init__(self, voice_manager, max_jobs: int = 5000, job_ttl: int = 900):
+        self.voice_manager = voice_manager
+        self.max_jobs = max_jobs
+        self.job_ttl = job_ttl
+        self._jobs = OrderedDict()
+        self._events = {}
+        self._tasks = set()
+
+    def _evict(self) -> None:
+        now = time.time()
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            finished = job['status'] in ('completed', 'error')
+            if finished and (now - job['finished_at'] > self.job_ttl or len(self._jobs) >= self.max_jobs):
+                del self._jobs[job_id]
+                self._events.pop(job_id, None)
+
+    def submit_stream(self, audio: BinaryIO) -> str:
+        self._evict()
+        if len(self._jobs) >= self.max_jobs:
+            audio.close()
+            raise JobQueueFull(f'Too many pending transcriptions (max {self.max_jobs})')
+
+        job_id = uuid.uuid4().hex
+        self._jobs[job_id] = {
+            'job_id': job_id,
+            'status': 'queued',
+            'transcription': None,
+            'error': None,
+            'created_at': time.time(),
+            'finished_at': None
+        }
+        self._events[job_id] = asyncio.Event()
+
+        task = asyncio.ensure_future(self._run(job_id, audio))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    async def _run(self, job_id: str, audio: BinaryIO) -> None:
+        self._jobs[job_id]['status'] = 'processing'
+        try:
+            result = await self.voice_manager.transcribe_stream(audio)
+            if result.startswith('❌') or result.startswith('⚠️'):
+                self._finish(job_id, status='error', error=result)
+            else:
+                self._finish(job_id, status='completed', transcription=result)
+        except Exception as e:
+            logger.error(f"❌ Transcription job {job_id} failed: {e}")
+            self._finish(job_id, status='error', error=f'Transcription failed: {str(e)}')
+        finally:
+            audio.close()
+
+    def _finish(self, job_id: str, **fields) -> None:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.update(fields)
+        job['finished_at'] = time.time()
+        self._events[job_id].set()
+
+    async def get(self, job_id: str, wait: float = 0) -> Optional[Dict]:
+        event = self._events.get(job_id)
+        if job_id not in self._jobs:
+            return None
+
+        if wait > 0 and event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = {'total': len(self._jobs), 'max_jobs': self.max_jobs}
+        for job in self._jobs.values():
+            stats[job['status']] = stats.get(job['status'], 0) + 1
+        return stats
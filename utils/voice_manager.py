@@ -1,64 +1,107 @@
+import logging
 import os
 import requests
 import tempfile
 import re
-from typing import Optional, Dict
+import time
+from typing import BinaryIO, Dict, Iterator, Optional, Union
 
-ASSEMBLYAI_AVAILABLE = False
+from utils.audio_prep import SNIFF_BYTES, sniff_format, trim_wav_silence
+from utils.metrics import metrics, record_upstream_error, span, track_upstream
+from utils.rate_limiter import get_assemblyai_scheduler
 
-try:
-    import assemblyai as aai
-    ASSEMBLYAI_AVAILABLE = True
-    print("✅ AssemblyAI module loaded")
-except ImportError as e:
-    print(f"❌ AssemblyAI not available: {e}")
+logger = logging.getLogger(__name__)
+
+AUDIO_CHUNK_SIZE = 64 * 1024
+MAX_AUDIO_SIZE = 100 * 1024 * 1024
+MIN_AUDIO_SIZE = 1000
+STT_BACKEND_NAMES = ('local', 'assemblyai')
+
+_assemblyai_module = None
+_assemblyai_checked = False
+
+def load_assemblyai():
+    """
+    Import the AssemblyAI SDK on first use; returns None if it is not installed
+    """
+    global _assemblyai_module, _assemblyai_checked
+    if not _assemblyai_checked:
+        try:
+            import assemblyai
+            _assemblyai_module = assemblyai
+            logger.info("✅ AssemblyAI module loaded")
+        except ImportError as e:
+            logger.error(f"❌ AssemblyAI not available: {e}")
+        _assemblyai_checked = True
+    return _assemblyai_module
 
 class VoiceManager:
     def __init__(self, api_keys: Dict[str, str]):
         self.api_keys = api_keys
         self.assemblyai_available = False
+        self.aai = None
+        self.assemblyai_base_url = os.getenv('ASSEMBLYAI_BASE_URL', 'https://api.assemblyai.com').rstrip('/')
+        self.max_poll_wait = float(os.getenv('ASSEMBLYAI_MAX_POLL_WAIT', '120'))
+        self.trim_silence = os.getenv('AUDIO_TRIM_SILENCE', '1') != '0'
+        self.stt_backends = [
+            name.strip() for name in os.getenv('STT_BACKENDS', 'assemblyai').split(',')
+            if name.strip() in STT_BACKEND_NAMES
+        ] or ['assemblyai']
+        self.local_stt = None
+        if 'local' in self.stt_backends:
+            from utils.local_stt import get_local_stt
+            self.local_stt = get_local_stt()
+            self.local_stt.warm()
+        self.scheduler = get_assemblyai_scheduler(api_keys['ASSEMBLYAI_API_KEY']) if api_keys.get('ASSEMBLYAI_API_KEY') else None
         
         self._init_assemblyai()
-        self._print_status()
+        self._log_status()
         
     def _init_assemblyai(self):
         """Initialize AssemblyAI with API key"""
-        if ASSEMBLYAI_AVAILABLE and self.api_keys.get('ASSEMBLYAI_API_KEY'):
-            try:
-                aai.settings.api_key = self.api_keys['ASSEMBLYAI_API_KEY']
-                
-                test_config = aai.TranscriptionConfig(
-                    language_detection=True,
-                    punctuate=True,
-                    format_text=True
-                )
+        if not self.api_keys.get('ASSEMBLYAI_API_KEY'):
+            logger.error("❌ AssemblyAI API key not provided")
+            return
+        
+        self.aai = load_assemblyai()
+        if self.aai is None:
+            logger.error("❌ AssemblyAI module not installed")
+            return
+        
+        try:
+            self.aai.settings.api_key = self.api_keys['ASSEMBLYAI_API_KEY']
+            self.aai.settings.base_url = f"{self.assemblyai_base_url}/v2"
+            
+            self.assemblyai_available = True
+            logger.info("✅ AssemblyAI initialized successfully")
                 
-                self.assemblyai_available = True
-                print("✅ AssemblyAI initialized successfully")
-                    
-            except Exception as e:
-                print(f"❌ AssemblyAI initialization failed: {e}")
-                self.assemblyai_available = False
-        else:
-            if not ASSEMBLYAI_AVAILABLE:
-                print("❌ AssemblyAI module not installed")
-            else:
-                print("❌ AssemblyAI API key not provided")
+        except Exception as e:
+            logger.error(f"❌ AssemblyAI initialization failed: {e}")
+            self.assemblyai_available = False
     
-    def _print_status(self):
-        """Print voice features status"""
-        print("\n🎤 VOICE FEATURES STATUS:")
-        print(f"   AssemblyAI Available: {'✅' if self.assemblyai_available else '❌'}")
-        print(f"   Voice Recording: {'✅' if self.assemblyai_available else '❌'}")
-        print(f"   Audio Transcription: {'✅' if self.assemblyai_available else '❌'}")
-        print()
+    @property
+    def local_stt_available(self) -> bool:
+        return self.local_stt is not None and self.local_stt.available
+    
+    def _log_status(self):
+        """Log voice features status"""
+        transcription_available = self.assemblyai_available or self.local_stt_available
+        logger.info(
+            f"🎤 Voice features: AssemblyAI {'✅' if self.assemblyai_available else '❌'}, "
+            f"local STT {'✅' if self.local_stt_available else '❌'}, "
+            f"transcription {'✅' if transcription_available else '❌'}, "
+            f"backend order {' -> '.join(self.stt_backends)}"
+        )
     
     def get_voice_status(self) -> Dict[str, bool]:
         """Get current voice feature status"""
+        transcription_available = self.assemblyai_available or self.local_stt_available
         return {
             'assemblyai_available': self.assemblyai_available,
-            'voice_recording_available': self.assemblyai_available,
-            'transcription_available': self.assemblyai_available,
+            'local_stt_available': self.local_stt_available,
+            'stt_backends': self.stt_backends,
+            'voice_recording_available': transcription_available,
+            'transcription_available': transcription_available,
             'api_key_configured': bool(self.api_keys.get('ASSEMBLYAI_API_KEY'))
         }
     
@@ -69,11 +112,15 @@ class VoiceManager:
         if not os.path.exists(audio_file_path):
             return "❌ Audio file not found"
         
+        if self.stt_backends[0] == 'local':
+            with open(audio_file_path, 'rb') as audio:
+                return self._transcribe_with_backends(audio)
+        
         if self.assemblyai_available:
             try:
-                print("🔄 Trying AssemblyAI SDK...")
+                logger.info("🔄 Trying AssemblyAI SDK...")
                 
-                config = aai.TranscriptionConfig(
+                config = self.aai.TranscriptionConfig(
                     language_detection=True,
                     punctuate=True,
                     format_text=True,
@@ -81,61 +128,117 @@ class VoiceManager:
                     auto_highlights=False
                 )
                 
-                transcriber = aai.Transcriber(config=config)
+                transcriber = self.aai.Transcriber(config=config)
                 transcript = transcriber.transcribe(audio_file_path)
                 
                 if transcript.status == "completed":
-                    print("✅ AssemblyAI SDK transcription successful")
+                    logger.info("✅ AssemblyAI SDK transcription successful")
                     return self._clean_transcription(transcript.text)
                 elif transcript.status == "error":
-                    print(f"❌ AssemblyAI SDK error: {transcript.error}")
+                    logger.error(f"❌ AssemblyAI SDK error: {transcript.error}")
                     return f"❌ Transcription error: {transcript.error}"
                 else:
-                    print(f"⚠️ AssemblyAI SDK status: {transcript.status}")
+                    logger.warning(f"⚠️ AssemblyAI SDK status: {transcript.status}")
                     return f"⚠️ Transcription status: {transcript.status}"
                     
             except Exception as e:
-                print(f"❌ AssemblyAI SDK error: {e}")
+                logger.error(f"❌ AssemblyAI SDK error: {e}")
         
+        return self._transcribe_direct(audio_file_path)
+    
+    def transcribe_stream(self, audio: BinaryIO) -> str:
+        """
+        Transcribe an in-memory or spooled audio file object, streaming it to
+        AssemblyAI in chunks without writing it to disk
+        """
+        audio.seek(0)
+        return self._transcribe_with_backends(audio)
+    
+    def _transcribe_with_backends(self, audio: BinaryIO) -> str:
+        """
+        Try each configured STT backend in order (STT_BACKENDS), failing over
+        to the next one when a backend errors or declines the clip
+        """
+        result = "❌ No speech-to-text backend accepted this recording. Please type your response instead."
+        for name in self.stt_backends:
+            audio.seek(0)
+            if name == 'local':
+                if not self.local_stt_available or not self.local_stt.accepts(audio):
+                    continue
+                result = self.local_stt.transcribe(audio)
+                if not result.startswith("❌"):
+                    result = self._clean_transcription(result)
+            else:
+                with metrics.timed('stt_seconds', {'backend': name}):
+                    result = self._transcribe_direct(audio)
+            
+            metrics.inc('stt_requests_total', {'backend': name, 'result': 'failed' if result.startswith("❌") else 'ok'})
+            if not result.startswith("❌"):
+                return result
+            logger.warning(f"⚠️ {name} transcription failed, trying next backend: {result}")
+        return result
+    
+    def _transcribe_direct(self, audio: Union[str, BinaryIO]) -> str:
         if self.api_keys.get('ASSEMBLYAI_API_KEY'):
             try:
-                print("🔄 Trying AssemblyAI Direct API...")
-                result = self._transcribe_with_api(audio_file_path)
+                logger.info("🔄 Trying AssemblyAI Direct API...")
+                result = self._transcribe_with_api(audio)
                 if result and not result.startswith("❌") and not result.startswith("Error"):
-                    print("✅ AssemblyAI API transcription successful")
+                    logger.info("✅ AssemblyAI API transcription successful")
                     return self._clean_transcription(result)
                 else:
-                    print(f"❌ AssemblyAI API failed: {result}")
+                    logger.error(f"❌ AssemblyAI API failed: {result}")
                     return result
             except Exception as e:
-                print(f"❌ AssemblyAI API error: {e}")
+                logger.error(f"❌ AssemblyAI API error: {e}")
                 return f"❌ API transcription error: {str(e)}"
         
         return "❌ Transcription failed. AssemblyAI API key may be missing or invalid. Please type your response instead."
     
-    def _transcribe_with_api(self, audio_file_path: str) -> str:
+    def _iter_chunks(self, audio: BinaryIO) -> Iterator[bytes]:
+        while True:
+            chunk = audio.read(AUDIO_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    
+    def _transcribe_with_api(self, audio: Union[str, BinaryIO]) -> str:
         """
-        Transcribe using direct AssemblyAI API calls
+        Transcribe using direct AssemblyAI API calls, from a file path or a
+        file object that is streamed as a chunked request body
         """
         try:
             headers = {'authorization': self.api_keys['ASSEMBLYAI_API_KEY']}
+            if self.scheduler:
+                with span('assemblyai_rate_limit'):
+                    self.scheduler.acquire()
             
-            print("📤 Uploading audio file...")
-            with open(audio_file_path, 'rb') as f:
-                response = requests.post(
-                    'https://api.assemblyai.com/v2/upload',
-                    headers=headers,
-                    files={'file': f},
-                    timeout=60
-                )
+            logger.info("📤 Uploading audio file...")
+            with track_upstream('assemblyai', 'upload'):
+                if isinstance(audio, str):
+                    with open(audio, 'rb') as f:
+                        response = requests.post(
+                            f'{self.assemblyai_base_url}/v2/upload',
+                            headers=headers,
+                            files={'file': f},
+                            timeout=60
+                        )
+                else:
+                    response = requests.post(
+                        f'{self.assemblyai_base_url}/v2/upload',
+                        headers={**headers, 'Content-Type': 'application/octet-stream'},
+                        data=self._iter_chunks(audio),
+                        timeout=60
+                    )
             
             if response.status_code != 200:
+                record_upstream_error('assemblyai', 'upload', response.status_code)
                 return f"❌ Upload failed: {response.status_code} - {response.text}"
             
             upload_url = response.json()['upload_url']
-            print(f"✅ File uploaded: {upload_url}")
+            logger.info(f"✅ File uploaded: {upload_url}")
             
-            print("🔄 Requesting transcription...")
+            logger.info("🔄 Requesting transcription...")
             data = {
                 'audio_url': upload_url,
                 'language_detection': True,
@@ -145,47 +248,54 @@ class VoiceManager:
                 'auto_highlights': False
             }
             
-            response = requests.post(
-                'https://api.assemblyai.com/v2/transcript',
-                headers=headers,
-                json=data,
-                timeout=30
-            )
+            with track_upstream('assemblyai', 'submit'):
+                response = requests.post(
+                    f'{self.assemblyai_base_url}/v2/transcript',
+                    headers=headers,
+                    json=data,
+                    timeout=30
+                )
             
             if response.status_code != 200:
+                record_upstream_error('assemblyai', 'submit', response.status_code)
                 return f"❌ Transcription request failed: {response.status_code} - {response.text}"
             
             transcript_id = response.json()['id']
-            print(f"🔄 Transcription ID: {transcript_id}")
+            logger.info(f"🔄 Transcription ID: {transcript_id}")
             
-            print("⏳ Waiting for transcription to complete...")
-            max_attempts = 60
+            logger.info("⏳ Waiting for transcription to complete...")
+            poll_interval = 0.5
+            deadline = time.monotonic() + self.max_poll_wait
             attempt = 0
             
-            while attempt < max_attempts:
-                response = requests.get(
-                    f'https://api.assemblyai.com/v2/transcript/{transcript_id}',
-                    headers=headers,
-                    timeout=30
-                )
+            while time.monotonic() < deadline:
+                with track_upstream('assemblyai', 'poll'):
+                    response = requests.get(
+                        f'{self.assemblyai_base_url}/v2/transcript/{transcript_id}',
+                        headers=headers,
+                        timeout=30
+                    )
                 
                 if response.status_code != 200:
+                    record_upstream_error('assemblyai', 'poll', response.status_code)
                     return f"❌ Status check failed: {response.status_code}"
                 
                 result = response.json()
                 status = result['status']
                 
                 if status == 'completed':
-                    print("✅ Transcription completed")
+                    logger.info("✅ Transcription completed")
                     return result['text'] or "❌ No text in transcription result"
                 elif status == 'error':
                     error_msg = result.get('error', 'Unknown error')
+                    record_upstream_error('assemblyai', 'transcribe', 'error')
                     return f"❌ Transcription error: {error_msg}"
                 elif status in ['queued', 'processing']:
-                    print(f"⏳ Status: {status} (attempt {attempt + 1}/{max_attempts})")
-                    import time
-                    time.sleep(2)
                     attempt += 1
+                    logger.debug(f"⏳ Status: {status} (attempt {attempt}, next poll in {poll_interval:.1f}s)")
+                    with span('assemblyai_poll_wait'):
+                        time.sleep(poll_interval)
+                    poll_interval = min(poll_interval * 1.5, 5.0)
                 else:
                     return f"❌ Unknown status: {status}"
             
@@ -230,17 +340,88 @@ class VoiceManager:
                 'file_size': 0
             }
         
-        file_size = os.path.getsize(file_path)
-        max_size = 100 * 1024 * 1024
+        return self._validate_size(os.path.getsize(file_path))
+    
+    def validate_audio_stream(self, stream: BinaryIO, content_length: Optional[int] = None) -> Dict[str, any]:
+        """
+        Read an upload stream in chunks into a spooled buffer that only spills
+        to a uniquely named temp file above AUDIO_SPOOL_THRESHOLD. Oversized
+        uploads are rejected as soon as the limit is crossed.
+        """
+        if content_length is not None and content_length > MAX_AUDIO_SIZE:
+            return self._validate_size(content_length)
+        
+        spool_threshold = int(os.getenv('AUDIO_SPOOL_THRESHOLD', str(5 * 1024 * 1024)))
+        audio = tempfile.SpooledTemporaryFile(max_size=spool_threshold, prefix='audio_')
+        file_size = 0
+        header = b''
+        
+        while True:
+            chunk = stream.read(AUDIO_CHUNK_SIZE)
+            if not chunk:
+                break
+            if len(header) < SNIFF_BYTES:
+                header += chunk[:SNIFF_BYTES - len(header)]
+            file_size += len(chunk)
+            if file_size > MAX_AUDIO_SIZE:
+                audio.close()
+                return self._validate_size(file_size)
+            audio.write(chunk)
+        
+        result = self._validate_size(file_size)
+        if not result['valid']:
+            audio.close()
+            return result
+        
+        result['format'] = sniff_format(header)
+        metrics.inc('audio_uploads_total', {'format': result['format']})
+        if result['format'] == 'wav' and self.trim_silence:
+            return self._trim_upload(audio, result, spool_threshold)
+        
+        audio.seek(0)
+        result['audio'] = audio
+        return result
+    
+    def _trim_upload(self, audio: BinaryIO, result: Dict[str, any], spool_threshold: int) -> Dict[str, any]:
+        """
+        Drop leading and trailing silence from PCM uploads and reject clips
+        with no speech at all before anything is sent to AssemblyAI
+        """
+        with span('audio_trim'):
+            trimmed, stats = trim_wav_silence(audio, spool_threshold=spool_threshold)
+        
+        if trimmed is None:
+            audio.close()
+            metrics.inc('audio_silent_rejected_total')
+            return {
+                'valid': False,
+                'error': 'No speech detected - the recording is silent',
+                'file_size': result['file_size']
+            }
+        
+        if trimmed is not audio:
+            audio.close()
+            trimmed_size = trimmed.seek(0, os.SEEK_END)
+            trimmed.seek(0)
+            metrics.inc('audio_trimmed_bytes_total', amount=result['file_size'] - trimmed_size)
+            logger.info(f"✂️ Trimmed silence: {stats['duration']}s -> {stats['trimmed_duration']}s "
+                        f"({result['file_size']} -> {trimmed_size} bytes)")
+            result['original_size'] = result['file_size']
+            result['file_size'] = trimmed_size
+            result['file_size_mb'] = trimmed_size / (1024 * 1024)
         
-        if file_size > max_size:
+        result['audio'] = trimmed
+        return result
+    
+    def _validate_size(self, file_size: int) -> Dict[str, any]:
+        if file_size > MAX_AUDIO_SIZE:
             return {
                 'valid': False,
                 'error': f'File too large: {file_size / (1024*1024):.1f}MB (max 100MB)',
                 'file_size': file_size
             }
         
-        if file_size < 1000:
+        if file_size < MIN_AUDIO_SIZE:
             return {
                 'valid': False,
                 'error': 'File too small - may be empty or corrupted',